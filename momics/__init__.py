@@ -6,13 +6,35 @@ import logging
 # This goes into your library somewhere
 logging.getLogger("momics").addHandler(logging.NullHandler())
 
-submoduless = [
+# submodules are imported on first attribute access (PEP 562), so that
+# `import momics` does not pull in the plotting and dashboard dependencies
+submodules = [
+    "benchmarks",
+    "cache",
+    "constants",
+    "distances",
     "diversity",
     "galaxy",
     "loader",
     "metadata",
     "networks",
+    "panel_utils",
+    "pipeline",
     "plotting",
+    "profiling",
     "stats",
+    "store",
     "taxonomy",
+    "taxonomy_polars",
+    "utils",
 ]
+
+
+def __dir__():
+    return submodules
+
+
+def __getattr__(name):
+    if name in submodules:
+        return _importlib.import_module(f"momics.{name}")
+    raise AttributeError(f"module 'momics' has no attribute '{name}'")
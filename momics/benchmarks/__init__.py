@@ -0,0 +1,16 @@
+from .synthetic import (
+    synthetic_emobon,
+    synthetic_functional,
+    synthetic_metadata,
+    synthetic_taxonomy,
+    taxonomy_hierarchy,
+)
+from .imports import import_times
+from .suite import (
+    BENCHMARKS,
+    SCALES,
+    compare_to_baseline,
+    load_results,
+    run_benchmarks,
+    save_results,
+)
@@ -0,0 +1,60 @@
+"""
+Run the momics benchmarks from the command line, e.g.
+
+    python -m momics.benchmarks --scales small medium --output results.json \
+        --baseline baseline.json
+"""
+
+import sys
+import argparse
+
+from .imports import import_times
+from .suite import (
+    BENCHMARKS,
+    SCALES,
+    compare_to_baseline,
+    load_results,
+    run_benchmarks,
+    save_results,
+)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark momics on synthetic EMO BON data."
+    )
+    parser.add_argument("--scales", nargs="+", default=["small"], choices=list(SCALES))
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON file to save the results to.")
+    parser.add_argument("--baseline", help="JSON results to compare to.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--imports", action="store_true", help="Benchmark the module import times only."
+    )
+    args = parser.parse_args(argv)
+
+    if args.imports:
+        print(import_times(repeat=args.repeat).to_string(index=False))
+        return 0
+
+    results = run_benchmarks(
+        args.scales, names=args.benchmarks, repeat=args.repeat, seed=args.seed
+    )
+    print(results.to_string(index=False))
+    if args.output:
+        save_results(results, args.output)
+
+    if args.baseline:
+        comparison = compare_to_baseline(
+            results, load_results(args.baseline), tolerance=args.tolerance
+        )
+        print(comparison.to_string(index=False))
+        if comparison["regression"].any():
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Import-time benchmark of the momics modules.
+
+Every module is imported in a fresh interpreter, so the measured time includes
+all its dependencies, and the heavy optional dependencies loaded by the import
+are reported. Batch jobs using only the taxonomy and statistics functions
+should not load any of them.
+"""
+
+import sys
+import json
+import subprocess
+import pandas as pd
+from typing import List
+
+IMPORT_MODULES = [
+    "momics",
+    "momics.taxonomy",
+    "momics.stats",
+    "momics.networks",
+    "momics.metadata",
+    "momics.loader",
+    "momics.utils",
+    "momics.diversity",
+    "momics.plotting",
+]
+
+HEAVY_DEPENDENCIES = [
+    "bokeh",
+    "holoviews",
+    "IPython",
+    "matplotlib",
+    "mgo",
+    "panel",
+    "plotly",
+    "requests",
+    "seaborn",
+    "skbio",
+    "sklearn",
+    "statsmodels",
+    "tqdm",
+]
+
+_IMPORT_SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"time_s": elapsed, "heavy": heavy}}))
+"""
+
+
+def import_times(modules: List[str] = None, repeat: int = 3) -> pd.DataFrame:
+    """
+    Measure the import time of modules, each in a fresh interpreter.
+
+    Args:
+        modules (List[str], optional): Modules to import. Defaults to `IMPORT_MODULES`.
+        repeat (int): Number of imports per module, the minimum is reported.
+            Defaults to 3.
+
+    Returns:
+        pd.DataFrame: Columns module, time_s, heavy_dependencies and status, which
+            is 'error' if the import failed, e.g. for a missing dependency.
+    """
+    modules = IMPORT_MODULES if modules is None else modules
+    rows = []
+    for module in modules:
+        script = _IMPORT_SCRIPT.format(module=module, heavy=HEAVY_DEPENDENCIES)
+        times, heavy, status = [], [], "ok"
+        for _ in range(repeat):
+            proc = subprocess.run(
+                [sys.executable, "-c", script], capture_output=True, text=True
+            )
+            if proc.returncode != 0:
+                status = "error"
+                break
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            times.append(result["time_s"])
+            heavy = result["heavy"]
+        rows.append(
+            {
+                "module": module,
+                "time_s": min(times) if times else float("nan"),
+                "heavy_dependencies": ", ".join(heavy),
+                "status": status,
+            }
+        )
+    return pd.DataFrame(rows, columns=["module", "time_s", "heavy_dependencies", "status"])
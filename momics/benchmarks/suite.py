@@ -0,0 +1,420 @@
+"""
+Benchmarks of the momics pipeline steps on synthetic EMO BON data.
+
+Each benchmark has a setup, which prepares its inputs and is not measured, and
+a measured run. The run is timed `repeat` times, the minimum and mean are
+reported, and its peak memory is measured by `tracemalloc` in an extra run,
+which covers the numpy and pandas allocations.
+
+Example:
+    >>> from momics.benchmarks import run_benchmarks, compare_to_baseline
+    >>> results = run_benchmarks(["small", "medium"])
+    >>> save_results(results, "benchmarks.json")
+    >>> compare_to_baseline(results, load_results("baseline.json"))
+
+Results of the memoised functions are served from the cache if it was enabled
+with `momics.cache.enable_cache`, keep it disabled when benchmarking.
+"""
+
+import os
+import gc
+import time
+import shutil
+import logging
+import tempfile
+import tracemalloc
+import pandas as pd
+from typing import Callable, Dict, List, Union
+
+from momics.constants import TAXONOMY_RANKS
+from .synthetic import synthetic_emobon
+
+# logger setup
+FORMAT = "%(levelname)s | %(name)s | %(message)s"
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(__name__)
+
+# parameters of synthetic_emobon and the number of most prevalent taxa
+# used for the correlation and network benchmarks
+SCALES = {
+    "small": {
+        "n_samples": 100,
+        "n_taxa": 2000,
+        "taxa_per_sample": 300,
+        "n_terms": 3000,
+        "terms_per_sample": 500,
+        "network_taxa": 100,
+    },
+    "medium": {
+        "n_samples": 1000,
+        "n_taxa": 10000,
+        "taxa_per_sample": 500,
+        "n_terms": 10000,
+        "terms_per_sample": 1000,
+        "network_taxa": 300,
+    },
+    "large": {
+        "n_samples": 10000,
+        "n_taxa": 30000,
+        "taxa_per_sample": 800,
+        "n_terms": 20000,
+        "terms_per_sample": 1500,
+        "network_taxa": 1000,
+    },
+}
+
+# benchmark name mapped to (setup, run), the setup returns the run arguments
+BENCHMARKS = {}
+
+
+def register(name: str, setup: Callable) -> Callable:
+    """
+    Register a benchmark run function under `name`.
+
+    Args:
+        name (str): Name of the benchmark.
+        setup (Callable): Function of the prepared data returning the tuple of
+            run arguments.
+
+    Returns:
+        Callable: Decorator of the run function.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        BENCHMARKS[name] = (setup, func)
+        return func
+
+    return decorator
+
+
+###########
+# Prepare #
+###########
+def prepare_data(scale: Union[str, Dict], seed: int = 42) -> Dict:
+    """
+    Generate the synthetic data of a scale.
+
+    Args:
+        scale (Union[str, Dict]): Name of a scale in `SCALES` or a dictionary of
+            its parameters.
+        seed (int): Random seed. Defaults to 42.
+
+    Returns:
+        Dict: Metadata indexed by `ref_code`, the long tables and the scale
+            parameters. Intermediate results of the setups are added to it.
+
+    Raises:
+        ValueError: If the scale is unknown.
+    """
+    if isinstance(scale, str):
+        if scale not in SCALES:
+            raise ValueError(f"Unknown scale: {scale}")
+        params = SCALES[scale]
+    else:
+        params = scale
+    generator_params = {k: v for k, v in params.items() if k != "network_taxa"}
+    metadata, tables = synthetic_emobon(seed=seed, **generator_params)
+    return {
+        "params": params,
+        "metadata": metadata.set_index("ref_code"),
+        "tables": tables,
+        "ssu": tables["ssu"].set_index("ref_code"),
+    }
+
+
+def _pivot(data: Dict) -> pd.DataFrame:
+    from momics.taxonomy import pivot_taxonomic_data
+
+    if "pivot" not in data:
+        data["pivot"] = pivot_taxonomic_data(data["ssu"])
+    return data["pivot"]
+
+
+def _split(data: Dict) -> Dict[str, pd.DataFrame]:
+    from momics.taxonomy import split_taxonomic_data_pivoted
+
+    if "split" not in data:
+        pivot = _pivot(data)
+        prevalence = pivot.gt(0).sum(axis=1)
+        top = pivot.loc[prevalence.nlargest(data["params"]["network_taxa"]).index]
+        groups = {
+            str(k): [c for c in v if c in top.columns]
+            for k, v in data["metadata"].groupby("env_package").groups.items()
+        }
+        data["split"] = split_taxonomic_data_pivoted(top, groups)
+    return data["split"]
+
+
+def _correlations(data: Dict) -> Dict:
+    from momics.stats import spearman_from_taxonomy
+    from momics.taxonomy import fdr_pvals
+
+    if "correlations" not in data:
+        correlations = spearman_from_taxonomy(_split(data))
+        for factor in correlations:
+            correlations[factor]["p_vals_fdr"] = fdr_pvals(
+                correlations[factor]["p_vals"], 0.05
+            )
+        data["correlations"] = correlations
+    return data["correlations"]
+
+
+def _parquet_folder(data: Dict) -> str:
+    folder = tempfile.mkdtemp(prefix="momics_benchmark_")
+    for name, df in data["tables"].items():
+        df.to_parquet(os.path.join(folder, f"metagoflow_analyses.{name}.parquet"))
+    data.setdefault("cleanup", []).append(folder)
+    return folder
+
+
+##############
+# Benchmarks #
+##############
+@register("load_parquets", setup=lambda data: (_parquet_folder(data),))
+def bench_load_parquets(folder):
+    from momics.loader import load_parquets
+
+    return load_parquets(folder)
+
+
+@register("taxonomy_preprocess", setup=lambda data: (data["ssu"],))
+def bench_taxonomy_preprocess(ssu):
+    from momics.utils import taxonomy_common_preprocess01
+
+    return taxonomy_common_preprocess01(
+        ssu, "phylum", False, 10, TAXONOMY_RANKS, pivot=True
+    )
+
+
+@register("taxonomy_preprocess_polars", setup=lambda data: (data["ssu"],))
+def bench_taxonomy_preprocess_polars(ssu):
+    from momics.utils import taxonomy_common_preprocess01
+
+    return taxonomy_common_preprocess01(
+        ssu, "phylum", False, 10, TAXONOMY_RANKS, pivot=True, backend="polars"
+    )
+
+
+@register("pivot_taxonomic_data", setup=lambda data: (data["ssu"],))
+def bench_pivot_taxonomic_data(ssu):
+    from momics.taxonomy import pivot_taxonomic_data
+
+    return pivot_taxonomic_data(ssu)
+
+
+@register(
+    "alpha_diversity",
+    setup=lambda data: (
+        {"go": data["tables"]["go"].set_index("ref_code")},
+        data["metadata"],
+    ),
+)
+def bench_alpha_diversity(tables, metadata):
+    from momics.diversity import alpha_diversity_parametrized
+
+    return alpha_diversity_parametrized(tables, "go", metadata)
+
+
+@register("bray_curtis", setup=lambda data: (_pivot(data),))
+def bench_bray_curtis(pivot):
+    from momics.taxonomy import compute_bray_curtis
+
+    return compute_bray_curtis(pivot)
+
+
+@register("jaccard", setup=lambda data: (_pivot(data),))
+def bench_jaccard(pivot):
+    from momics.distances import distance_matrix
+
+    return distance_matrix(pivot, metric="jaccard")
+
+
+@register("aitchison", setup=lambda data: (_pivot(data),))
+def bench_aitchison(pivot):
+    from momics.distances import distance_matrix
+
+    return distance_matrix(pivot, metric="aitchison")
+
+
+@register("spearman", setup=lambda data: (_split(data),))
+def bench_spearman(split):
+    from momics.stats import spearman_from_taxonomy
+
+    return spearman_from_taxonomy(split)
+
+
+@register("sparcc", setup=lambda data: (_split(data),))
+def bench_sparcc(split):
+    from momics.stats import compositional_from_taxonomy
+
+    return compositional_from_taxonomy(split, method="sparcc", n_bootstraps=20)
+
+
+@register(
+    "fdr",
+    setup=lambda data: (
+        [d["p_vals"] for d in _correlations(data).values()],
+    ),
+)
+def bench_fdr(p_vals):
+    from momics.taxonomy import fdr_pvals
+
+    return [fdr_pvals(p, 0.05) for p in p_vals]
+
+
+@register("network", setup=lambda data: (_correlations(data),))
+def bench_network(correlations):
+    from momics.networks import build_interaction_graphs
+
+    return build_interaction_graphs(correlations)
+
+
+###########
+# Measure #
+###########
+def measure(func: Callable, *args, repeat: int = 3) -> Dict[str, float]:
+    """
+    Measure the wall time and peak traced memory of a call.
+
+    Args:
+        func (Callable): The function to measure.
+        *args: Its arguments.
+        repeat (int): Number of timed calls. Defaults to 3.
+
+    Returns:
+        Dict[str, float]: Minimum and mean time in seconds and peak memory in MB.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "time_s": min(times),
+        "mean_time_s": sum(times) / len(times),
+        "peak_mb": peak / 1e6,
+    }
+
+
+def run_benchmarks(
+    scales: List[Union[str, Dict]] = ("small",),
+    names: List[str] = None,
+    repeat: int = 3,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """
+    Run the benchmarks at several scales.
+
+    Benchmarks failing with an ImportError, e.g. of an optional dependency, are
+    reported as skipped, other failures as errors.
+
+    Args:
+        scales (List[Union[str, Dict]]): Names of `SCALES` or dictionaries of the
+            scale parameters. Defaults to ("small",).
+        names (List[str], optional): Benchmarks to run. Defaults to all registered.
+        repeat (int): Number of timed calls per benchmark. Defaults to 3.
+        seed (int): Random seed of the synthetic data. Defaults to 42.
+
+    Returns:
+        pd.DataFrame: One row per scale and benchmark with the columns scale,
+            benchmark, n_samples, time_s, mean_time_s, peak_mb and status.
+
+    Raises:
+        ValueError: If a benchmark name is unknown.
+    """
+    names = list(BENCHMARKS) if names is None else list(names)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {sorted(unknown)}")
+
+    rows = []
+    for scale in scales:
+        scale_name = scale if isinstance(scale, str) else "custom"
+        logger.info(f"Generating the {scale_name} data...")
+        data = prepare_data(scale, seed=seed)
+        try:
+            for name in names:
+                setup, run = BENCHMARKS[name]
+                row = {
+                    "scale": scale_name,
+                    "benchmark": name,
+                    "n_samples": data["params"]["n_samples"],
+                }
+                try:
+                    row.update(measure(run, *setup(data), repeat=repeat))
+                    row["status"] = "ok"
+                except ImportError as e:
+                    logger.warning(f"Skipping {name}: {e}")
+                    row["status"] = "skipped"
+                except Exception as e:
+                    logger.error(f"Benchmark {name} failed: {e}")
+                    row["status"] = "error"
+                rows.append(row)
+                logger.info(f"{scale_name} {name}: {row.get('time_s', float('nan')):.3f} s")
+        finally:
+            for folder in data.get("cleanup", []):
+                shutil.rmtree(folder, ignore_errors=True)
+
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "scale",
+            "benchmark",
+            "n_samples",
+            "time_s",
+            "mean_time_s",
+            "peak_mb",
+            "status",
+        ],
+    )
+
+
+def save_results(results: pd.DataFrame, path: str) -> None:
+    """Save benchmark results to a JSON file."""
+    results.to_json(path, orient="records", indent=2)
+
+
+def load_results(path: str) -> pd.DataFrame:
+    """Load benchmark results from a JSON file."""
+    return pd.read_json(path, orient="records")
+
+
+def compare_to_baseline(
+    results: pd.DataFrame, baseline: pd.DataFrame, tolerance: float = 0.25
+) -> pd.DataFrame:
+    """
+    Compare benchmark results to a baseline run.
+
+    Args:
+        results (pd.DataFrame): Results of `run_benchmarks`.
+        baseline (pd.DataFrame): Baseline results of `run_benchmarks`.
+        tolerance (float): Relative increase of time or memory considered a
+            regression. Defaults to 0.25.
+
+    Returns:
+        pd.DataFrame: Time and memory of both runs, their ratios and a regression
+            flag, for the benchmarks present in both runs.
+    """
+    columns = ["scale", "benchmark", "time_s", "peak_mb"]
+    merged = pd.merge(
+        results[columns],
+        baseline[columns],
+        on=["scale", "benchmark"],
+        suffixes=("", "_baseline"),
+    )
+    merged["time_ratio"] = merged["time_s"] / merged["time_s_baseline"]
+    merged["memory_ratio"] = merged["peak_mb"] / merged["peak_mb_baseline"]
+    merged["regression"] = (merged["time_ratio"] > 1 + tolerance) | (
+        merged["memory_ratio"] > 1 + tolerance
+    )
+    return merged
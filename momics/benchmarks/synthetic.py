@@ -0,0 +1,337 @@
+"""
+Seeded generators of synthetic EMO BON shaped data.
+
+The long taxonomy tables follow the layout of the metaGOflow LSU/SSU tables
+(`ref_code`, `ncbi_tax_id`, `abundance` and the `TAXONOMY_RANKS` columns), the
+functional tables that of the GO, GO slim, InterPro, KEGG and Pfam tables, and
+the metadata that of the combined logsheets. Abundances are Zipf distributed,
+taxa are shared across samples by a Zipf distributed prevalence and annotated
+to a random depth of a consistent rank hierarchy.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Tuple
+
+from momics.constants import TAXONOMY_RANKS
+
+# number of distinct names per rank below the superkingdom
+RANK_SIZES = {
+    "kingdom": 6,
+    "phylum": 60,
+    "class": 150,
+    "order": 400,
+    "family": 1000,
+    "genus": 3000,
+    "species": 10000,
+}
+
+# superkingdoms and their share of the taxa
+SUPERKINGDOMS = {"Bacteria": 0.8, "Archaea": 0.05, "Eukaryota": 0.15}
+
+# probability of a taxon being annotated down to each rank
+ANNOTATION_DEPTH = [0.02, 0.0, 0.08, 0.1, 0.15, 0.2, 0.3, 0.15]
+
+# probability of an intermediate rank missing from a lineage
+MISSING_RANK = 0.05
+
+# functional tables, their key column and key format
+FUNCTIONAL_TABLES = {
+    "go": ("id", "GO:{:07d}"),
+    "go_slim": ("id", "GO:{:07d}"),
+    "ips": ("accession", "IPR{:06d}"),
+    "ko": ("entry", "K{:05d}"),
+    "pfam": ("entry", "PF{:05d}"),
+}
+
+ENV_PACKAGES = ["water", "sediment"]
+SIZE_FRACTIONS = ["0.2-3 µm", "3-200 µm", "0-0.2 µm"]
+
+
+def ref_codes(n_samples: int) -> np.ndarray:
+    """EMO BON reference codes of the synthetic samples."""
+    return np.array([f"EMOBON{i:05d}" for i in range(1, n_samples + 1)])
+
+
+def taxonomy_hierarchy(n_taxa: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Generate a consistent rank hierarchy of `n_taxa` taxa.
+
+    Every name at a rank has a single parent at the rank above, so that the
+    lineages aggregate correctly. Taxa are annotated to a random depth following
+    `ANNOTATION_DEPTH`, with ranks below missing, and intermediate ranks are
+    occasionally missing as in the real tables.
+
+    Args:
+        n_taxa (int): Number of taxa.
+        seed (int): Random seed. Defaults to 42.
+
+    Returns:
+        pd.DataFrame: Taxa with `ncbi_tax_id` and the `TAXONOMY_RANKS` columns.
+    """
+    rng = np.random.default_rng(seed)
+    names = list(SUPERKINGDOMS)
+    superkingdom = rng.choice(len(names), size=n_taxa, p=list(SUPERKINGDOMS.values()))
+
+    # every name has a parent at the rank above and every parent at least one
+    # child, a taxon picks one of the children of its parent at each rank
+    lineage = {"superkingdom": superkingdom}
+    parent_codes = superkingdom
+    n_parents = len(names)
+    for rank, size in RANK_SIZES.items():
+        size = max(size, n_parents)
+        parents = np.sort(
+            np.concatenate(
+                [np.arange(n_parents), rng.integers(0, n_parents, size - n_parents)]
+            )
+        )
+        starts = np.searchsorted(parents, np.arange(n_parents))
+        counts = np.bincount(parents, minlength=n_parents)
+        pick = (rng.random(n_taxa) * counts[parent_codes]).astype(int)
+        parent_codes = starts[parent_codes] + pick
+        lineage[rank] = parent_codes
+        n_parents = size
+
+    out = pd.DataFrame(index=pd.RangeIndex(n_taxa))
+    out["ncbi_tax_id"] = np.sort(
+        rng.choice(np.arange(2, 3_000_000), size=n_taxa, replace=False)
+    )
+    depth = rng.choice(len(TAXONOMY_RANKS), size=n_taxa, p=ANNOTATION_DEPTH)
+    for level, rank in enumerate(TAXONOMY_RANKS):
+        if rank == "superkingdom":
+            values = np.array(names, dtype=object)[lineage[rank]]
+        else:
+            values = np.array(
+                [f"{rank.capitalize()}_{code}" for code in lineage[rank]], dtype=object
+            )
+            missing = depth < level
+            # only eukaryotes are annotated at the kingdom level
+            if rank == "kingdom":
+                missing |= lineage["superkingdom"] != names.index("Eukaryota")
+            elif rank != "species":
+                missing |= rng.random(n_taxa) < MISSING_RANK
+            values[missing] = np.nan
+        out[rank] = values
+    return out
+
+
+def zipf_counts(
+    n_samples: int,
+    n_features: int,
+    features_per_sample: int,
+    zipf_a: float = 1.2,
+    depth: int = 50000,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """
+    Generate sparse Zipf distributed counts in long format.
+
+    The features detected in a sample are drawn with a Zipf distributed prevalence,
+    so that few features are found in most samples and most in few. Within a
+    sample, the counts follow a Zipf distribution of a random feature order, with
+    a log-normally distributed sequencing depth.
+
+    Args:
+        n_samples (int): Number of samples.
+        n_features (int): Number of features (taxa or functional terms).
+        features_per_sample (int): Number of features drawn per sample.
+        zipf_a (float): Exponent of the Zipf distributions. Defaults to 1.2.
+        depth (int): Median sequencing depth. Defaults to 50000.
+        seed (int): Random seed. Defaults to 42.
+
+    Returns:
+        pd.DataFrame: Columns `sample` (position), `feature` (position) and `abundance`.
+    """
+    rng = np.random.default_rng(seed)
+    features_per_sample = min(features_per_sample, n_features)
+    prevalence = 1.0 / np.arange(1, n_features + 1) ** zipf_a
+    prevalence = rng.permutation(prevalence)
+    log_prevalence = np.log(prevalence)
+    rank_weights = 1.0 / np.arange(1, features_per_sample + 1) ** zipf_a
+    rank_weights /= rank_weights.sum()
+    depths = rng.lognormal(np.log(depth), 0.5, size=n_samples).astype(np.int64)
+
+    samples, features, abundances = [], [], []
+    for i in range(n_samples):
+        # weighted sampling without replacement by the Gumbel top-k trick
+        keys = log_prevalence + rng.gumbel(size=n_features)
+        detected = np.argpartition(keys, -features_per_sample)[-features_per_sample:]
+        counts = rng.multinomial(depths[i], rng.permutation(rank_weights))
+        present = counts > 0
+        samples.append(np.full(present.sum(), i))
+        features.append(detected[present])
+        abundances.append(counts[present])
+
+    return pd.DataFrame(
+        {
+            "sample": np.concatenate(samples),
+            "feature": np.concatenate(features),
+            "abundance": np.concatenate(abundances).astype(float),
+        }
+    )
+
+
+def synthetic_taxonomy(
+    n_samples: int = 100,
+    n_taxa: int = 2000,
+    taxa_per_sample: int = 300,
+    zipf_a: float = 1.2,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """
+    Generate a long LSU/SSU taxonomy table.
+
+    Args:
+        n_samples (int): Number of samples. Defaults to 100.
+        n_taxa (int): Number of distinct taxa. Defaults to 2000.
+        taxa_per_sample (int): Number of taxa drawn per sample. Defaults to 300.
+        zipf_a (float): Exponent of the Zipf distributions. Defaults to 1.2.
+        seed (int): Random seed. Defaults to 42.
+
+    Returns:
+        pd.DataFrame: Long table with `ref_code`, `ncbi_tax_id`, `abundance` and
+            the `TAXONOMY_RANKS` columns.
+    """
+    hierarchy = taxonomy_hierarchy(n_taxa, seed=seed)
+    counts = zipf_counts(
+        n_samples, n_taxa, taxa_per_sample, zipf_a=zipf_a, seed=seed + 1
+    )
+    out = hierarchy.iloc[counts["feature"].values].reset_index(drop=True)
+    out.insert(0, "ref_code", ref_codes(n_samples)[counts["sample"].values])
+    out.insert(2, "abundance", counts["abundance"].values)
+    return out
+
+
+def synthetic_functional(
+    table_name: str = "go",
+    n_samples: int = 100,
+    n_terms: int = 3000,
+    terms_per_sample: int = 500,
+    zipf_a: float = 1.2,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """
+    Generate a long functional annotation table.
+
+    Args:
+        table_name (str): One of 'go', 'go_slim', 'ips', 'ko' or 'pfam'. Defaults to "go".
+        n_samples (int): Number of samples. Defaults to 100.
+        n_terms (int): Number of distinct terms. Defaults to 3000.
+        terms_per_sample (int): Number of terms drawn per sample. Defaults to 500.
+        zipf_a (float): Exponent of the Zipf distributions. Defaults to 1.2.
+        seed (int): Random seed. Defaults to 42.
+
+    Returns:
+        pd.DataFrame: Long table with `ref_code`, the key column of the table
+            (see `momics.diversity.get_key_column`), `name` and `abundance`.
+
+    Raises:
+        ValueError: If the table name is unknown.
+    """
+    if table_name not in FUNCTIONAL_TABLES:
+        raise ValueError(f"Unknown table: {table_name}")
+    key_column, key_format = FUNCTIONAL_TABLES[table_name]
+
+    counts = zipf_counts(
+        n_samples, n_terms, terms_per_sample, zipf_a=zipf_a, depth=20000, seed=seed
+    )
+    keys = np.array([key_format.format(k) for k in range(1, n_terms + 1)])
+    out = pd.DataFrame(
+        {
+            "ref_code": ref_codes(n_samples)[counts["sample"].values],
+            key_column: keys[counts["feature"].values],
+            "name": np.char.add("term ", keys)[counts["feature"].values],
+            "abundance": counts["abundance"].values,
+        }
+    )
+    if table_name in ["go", "go_slim"]:
+        aspects = np.array(
+            ["biological_process", "molecular_function", "cellular_component"]
+        )
+        out["aspect"] = aspects[counts["feature"].values % len(aspects)]
+    return out
+
+
+def synthetic_metadata(
+    n_samples: int = 100, n_observatories: int = 16, seed: int = 42
+) -> pd.DataFrame:
+    """
+    Generate logsheet metadata of the synthetic samples.
+
+    Args:
+        n_samples (int): Number of samples. Defaults to 100.
+        n_observatories (int): Number of observatories. Defaults to 16.
+        seed (int): Random seed. Defaults to 42.
+
+    Returns:
+        pd.DataFrame: Metadata with `ref_code`, `source_mat_id`, `obs_id`, `env_package`,
+            `collection_date`, `size_frac`, `failure` and environmental measurements.
+    """
+    rng = np.random.default_rng(seed)
+    observatories = np.array([f"OBS{k:02d}" for k in range(n_observatories)])
+    obs = rng.integers(0, n_observatories, size=n_samples)
+    env_package = np.array(ENV_PACKAGES)[rng.integers(0, len(ENV_PACKAGES), n_samples)]
+    size_frac = np.array(SIZE_FRACTIONS)[rng.integers(0, len(SIZE_FRACTIONS), n_samples)]
+    dates = pd.Timestamp("2021-06-01") + pd.to_timedelta(
+        rng.integers(0, 3 * 365, size=n_samples), unit="D"
+    )
+    latitude = rng.uniform(35, 70, size=n_observatories)
+    longitude = rng.uniform(-10, 30, size=n_observatories)
+
+    codes = ref_codes(n_samples)
+    source_mat_id = [
+        f"EMOBON_{observatories[o]}_{e[:2].capitalize()}_{d:%y%m%d}_{i}"
+        for i, (o, e, d) in enumerate(zip(obs, env_package, dates))
+    ]
+    return pd.DataFrame(
+        {
+            "ref_code": codes,
+            "source_mat_id": source_mat_id,
+            "obs_id": observatories[obs],
+            "env_package": env_package,
+            "collection_date": dates.strftime("%Y-%m-%d"),
+            "size_frac": size_frac,
+            "failure": np.where(rng.random(n_samples) < 0.05, "failed", "NA"),
+            "depth": np.round(rng.gamma(1.5, 5, size=n_samples), 1),
+            "temperature": np.round(rng.normal(16, 5, size=n_samples), 2),
+            "salinity": np.round(rng.normal(35, 2, size=n_samples), 2),
+            "latitude": latitude[obs],
+            "longitude": longitude[obs],
+        }
+    )
+
+
+def synthetic_emobon(
+    n_samples: int = 100,
+    n_taxa: int = 2000,
+    taxa_per_sample: int = 300,
+    n_terms: int = 3000,
+    terms_per_sample: int = 500,
+    seed: int = 42,
+) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """
+    Generate metadata and all the tables of a synthetic EMO BON release.
+
+    Args:
+        n_samples (int): Number of samples. Defaults to 100.
+        n_taxa (int): Number of distinct taxa of the LSU and SSU tables. Defaults to 2000.
+        taxa_per_sample (int): Number of taxa per sample. Defaults to 300.
+        n_terms (int): Number of distinct terms of the functional tables. Defaults to 3000.
+        terms_per_sample (int): Number of terms per sample. Defaults to 500.
+        seed (int): Random seed. Defaults to 42.
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]: The metadata and the tables
+            keyed like `momics.loader.load_parquets` output.
+    """
+    metadata = synthetic_metadata(n_samples, seed=seed)
+    tables = {}
+    for k, name in enumerate(["ssu", "lsu"]):
+        tables[name] = synthetic_taxonomy(
+            n_samples, n_taxa, taxa_per_sample, seed=seed + 10 * k
+        )
+    for k, name in enumerate(FUNCTIONAL_TABLES):
+        tables[name] = synthetic_functional(
+            name, n_samples, n_terms, terms_per_sample, seed=seed + 100 + 10 * k
+        )
+    return metadata, tables
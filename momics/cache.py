@@ -0,0 +1,332 @@
+"""
+Opt-in memoisation of the analysis functions, which are pure in their DataFrame
+inputs and parameters.
+
+Caching is disabled by default. Once enabled with `enable_cache`, the decorated
+functions (`pivot_taxonomic_data`, `normalize_abundance`, `compute_bray_curtis`,
+`spearman_from_taxonomy`, `alpha_input`, `diversity_input`) return stored results
+for inputs with the same fingerprint.
+
+DataFrames are fingerprinted cheaply from their shape, dtypes, column labels and
+the hash of a few sampled row blocks, therefore a change of values outside of
+the sampled blocks is not detected. Use `fingerprint(df, full=True)` semantics by
+enabling the cache with `full_hash=True` if the inputs are modified in place.
+
+Note that `normalize_abundance(method="rarefy")` is random, a cached call returns
+the same rarefaction as the first one.
+
+Example:
+    >>> from momics.cache import enable_cache, cache_stats
+    >>> enable_cache("memory", maxsize=64)
+    >>> pivot = pivot_taxonomic_data(ssu)  # computed
+    >>> pivot = pivot_taxonomic_data(ssu)  # from the cache
+    >>> cache_stats()
+"""
+
+import os
+import copy
+import pickle
+import hashlib
+import inspect
+import logging
+import functools
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, Callable
+
+# logger setup
+FORMAT = "%(levelname)s | %(name)s | %(message)s"
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(__name__)
+
+# number of sampled row blocks and their size for DataFrame fingerprints
+FINGERPRINT_BLOCKS = 8
+FINGERPRINT_BLOCK_ROWS = 256
+
+# arguments fingerprinted by their repr, which reflects their value
+SCALAR_TYPES = (type(None), bool, int, float, complex, str, bytes, np.generic)
+
+
+###############
+# Fingerprint #
+###############
+def fingerprint(obj: Any, full: bool = False) -> str:
+    """
+    Cheap content fingerprint of function arguments.
+
+    DataFrames and Series are fingerprinted from shape, dtypes, index names, column
+    labels and `pd.util.hash_pandas_object` of `FINGERPRINT_BLOCKS` evenly spaced
+    blocks of `FINGERPRINT_BLOCK_ROWS` rows (all rows if `full`). Numpy arrays
+    likewise from shape, dtype and sampled rows. Dictionaries, lists and tuples are
+    fingerprinted recursively and the scalars of `SCALAR_TYPES` by their repr.
+
+    Args:
+        obj (Any): The object to fingerprint.
+        full (bool): Whether to hash all rows of DataFrames and arrays. Defaults to False.
+
+    Returns:
+        str: Hex digest of the fingerprint.
+
+    Raises:
+        TypeError: If `obj` contains an object of another type, whose default
+            repr would only identify its memory address.
+    """
+    h = hashlib.sha1()
+    _update_fingerprint(h, obj, full)
+    return h.hexdigest()
+
+
+def _sample_positions(n: int, full: bool) -> np.ndarray:
+    """Row positions of the sampled blocks, all rows if small or full."""
+    if full or n <= FINGERPRINT_BLOCKS * FINGERPRINT_BLOCK_ROWS:
+        return np.arange(n)
+    starts = np.linspace(0, n - FINGERPRINT_BLOCK_ROWS, FINGERPRINT_BLOCKS).astype(int)
+    return (starts[:, None] + np.arange(FINGERPRINT_BLOCK_ROWS)).ravel()
+
+
+def _update_fingerprint(h, obj: Any, full: bool) -> None:
+    """Update a hashlib object with the fingerprint of `obj`."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        h.update(type(obj).__name__.encode())
+        h.update(repr(obj.shape).encode())
+        h.update(repr(list(obj.index.names)).encode())
+        if isinstance(obj, pd.DataFrame):
+            h.update(repr(obj.columns.tolist()).encode())
+            h.update(repr(obj.dtypes.astype(str).tolist()).encode())
+        else:
+            h.update(repr((obj.name, str(obj.dtype))).encode())
+        sampled = obj.iloc[_sample_positions(len(obj), full)]
+        h.update(pd.util.hash_pandas_object(sampled, index=True).values.tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(repr((obj.shape, str(obj.dtype))).encode())
+        if obj.ndim > 0:
+            h.update(np.ascontiguousarray(obj[_sample_positions(len(obj), full)]).tobytes())
+        else:
+            h.update(obj.tobytes())
+    elif isinstance(obj, dict):
+        h.update(b"dict")
+        for k in sorted(obj, key=str):
+            h.update(repr(k).encode())
+            _update_fingerprint(h, obj[k], full)
+    elif isinstance(obj, (list, tuple)):
+        h.update(type(obj).__name__.encode())
+        for item in obj:
+            _update_fingerprint(h, item, full)
+    elif isinstance(obj, SCALAR_TYPES):
+        h.update(type(obj).__name__.encode())
+        h.update(repr(obj).encode())
+    else:
+        raise TypeError(f"Cannot fingerprint an object of type {type(obj).__name__}.")
+
+
+############
+# Backends #
+############
+class MemoryCache:
+    """
+    In-memory least recently used cache.
+
+    Args:
+        maxsize (int): Maximum number of stored results. Defaults to 128.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        """Return the stored value and mark it as recently used, KeyError if missing."""
+        value = self._data[key]
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used ones above `maxsize`."""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all stored values."""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DiskCache:
+    """
+    Cache of pickled results in a folder, which persists between sessions and
+    can be shared by processes on the same host.
+
+    Args:
+        folder (str): Folder of the pickle files, created if missing.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, f"{key}.pkl")
+
+    def get(self, key: str) -> Any:
+        """Return the stored value, KeyError if missing."""
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            raise KeyError(key)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, written to a temporary file first to be atomic."""
+        tmp = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+
+    def clear(self) -> None:
+        """Remove all stored values."""
+        for file_name in os.listdir(self.folder):
+            if file_name.endswith(".pkl"):
+                os.remove(os.path.join(self.folder, file_name))
+
+    def __len__(self) -> int:
+        return sum(f.endswith(".pkl") for f in os.listdir(self.folder))
+
+
+##############
+# Memoise it #
+##############
+_config = {"backend": None, "full_hash": False}
+_stats = {}
+_lock = threading.Lock()
+
+
+def enable_cache(
+    backend: str = "memory",
+    maxsize: int = 128,
+    folder: str = None,
+    full_hash: bool = False,
+) -> None:
+    """
+    Enable memoisation of the decorated momics functions.
+
+    Args:
+        backend (str): 'memory' for an in-process LRU cache or 'disk' for pickles
+            in `folder`. Defaults to "memory".
+        maxsize (int): Maximum number of results of the memory backend. Defaults to 128.
+        folder (str, optional): Folder of the disk backend.
+        full_hash (bool): Whether to hash all rows of DataFrame arguments instead
+            of sampled blocks. Defaults to False.
+
+    Raises:
+        ValueError: If the backend is unknown or the disk backend has no folder.
+    """
+    if backend == "memory":
+        store = MemoryCache(maxsize=maxsize)
+    elif backend == "disk":
+        if folder is None:
+            raise ValueError("The disk cache backend needs a folder.")
+        store = DiskCache(folder)
+    else:
+        raise ValueError(f"Unknown cache backend: {backend}")
+
+    with _lock:
+        _config["backend"] = store
+        _config["full_hash"] = full_hash
+    logger.info(f"Enabled {backend} cache.")
+
+
+def disable_cache() -> None:
+    """Disable memoisation, stored results are dropped."""
+    with _lock:
+        _config["backend"] = None
+
+
+def clear_cache() -> None:
+    """Remove all stored results and reset the statistics."""
+    with _lock:
+        if _config["backend"] is not None:
+            _config["backend"].clear()
+        _stats.clear()
+
+
+def cache_stats() -> pd.DataFrame:
+    """
+    Cache statistics per memoised function, e.g. to show in a Panel table.
+
+    Returns:
+        pd.DataFrame: Hits, misses and hit ratio indexed by function name.
+    """
+    with _lock:
+        stats = pd.DataFrame.from_dict(
+            _stats, orient="index", columns=["hits", "misses"]
+        )
+    stats.index.name = "function"
+    total = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = (stats["hits"] / total).where(total > 0)
+    return stats
+
+
+def memoize(func: Callable) -> Callable:
+    """
+    Decorator memoising a pure function of DataFrames and parameters in the
+    backend set by `enable_cache`. When the cache is disabled, the function is
+    called directly.
+
+    Arguments are bound to the function signature with defaults applied, so
+    positional and keyword calls share the cache entries. Results are copied on
+    return (containers deeply), so callers cannot modify the stored result.
+    Calls with an argument which cannot be fingerprinted, see `fingerprint`, are
+    not cached.
+
+    Args:
+        func (Callable): The function to memoise.
+
+    Returns:
+        Callable: The memoised function.
+    """
+    signature = inspect.signature(func)
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        store = _config["backend"]
+        if store is None:
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        try:
+            key = fingerprint(
+                (name, dict(bound.arguments)), full=_config["full_hash"]
+            )
+        except TypeError as e:
+            logger.debug(f"{name} is not cached: {e}")
+            return func(*args, **kwargs)
+        with _lock:
+            stats = _stats.setdefault(name, [0, 0])
+            try:
+                result = store.get(key)
+                stats[0] += 1
+                hit = True
+            except KeyError:
+                stats[1] += 1
+                hit = False
+
+        if not hit:
+            result = func(*args, **kwargs)
+            with _lock:
+                store.set(key, result)
+
+        if isinstance(result, (pd.DataFrame, pd.Series)):
+            return result.copy()
+        if isinstance(result, (dict, list, tuple)):
+            return copy.deepcopy(result)
+        return result
+
+    return wrapper
@@ -0,0 +1,72 @@
+"""
+`momics` command-line entry point.
+
+Examples:
+    momics run data/ results/ --metadata logsheets.csv --factor env_package
+    momics run data/ results/ --config pipeline.json --workers 2
+    momics benchmark --scales small medium
+"""
+
+import sys
+import argparse
+
+from .pipeline import PIPELINE_STEPS, load_metadata_file, pipeline_config, run_pipeline
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="momics", description="Marine omics batch pipelines."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser(
+        "run", help="Run the taxonomy pipeline over local parquet files."
+    )
+    run.add_argument("input", help="Folder of the parquet files.")
+    run.add_argument("output", help="Folder of the results.")
+    run.add_argument("--metadata", help="Logsheet metadata, CSV or parquet.")
+    run.add_argument("--config", help="JSON file with the pipeline configuration.")
+    run.add_argument("--tables", nargs="+", help="Taxonomy tables, e.g. ssu lsu.")
+    run.add_argument("--steps", nargs="+", choices=PIPELINE_STEPS)
+    run.add_argument("--factor", help="Metadata factor of the networks.")
+    run.add_argument("--normalize", choices=["tss", "tss_sqrt", "rarefy"])
+    run.add_argument("--prevalence-cutoff", type=float)
+    run.add_argument("--backend", choices=["pandas", "polars"])
+    run.add_argument("--workers", type=int, help="Number of processes.")
+
+    subparsers.add_parser(
+        "benchmark", help="Run the benchmarks, see 'python -m momics.benchmarks -h'."
+    )
+
+    args, remaining = parser.parse_known_args(argv)
+    if args.command == "benchmark":
+        from .benchmarks.__main__ import main as benchmark_main
+
+        return benchmark_main(remaining)
+    if remaining:
+        parser.error(f"unrecognized arguments: {' '.join(remaining)}")
+
+    try:
+        config = pipeline_config(
+            {
+                "tables": args.tables,
+                "steps": args.steps,
+                "factor": args.factor,
+                "normalize": args.normalize,
+                "prevalence_cutoff": args.prevalence_cutoff,
+                "backend": args.backend,
+            },
+            path=args.config,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    metadata = load_metadata_file(args.metadata) if args.metadata else None
+
+    run_pipeline(
+        args.input, args.output, metadata=metadata, config=config, workers=args.workers
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
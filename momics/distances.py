@@ -0,0 +1,286 @@
+"""
+Blocked pairwise distances of samples, computed in tiles on a thread pool.
+
+The distance matrix is split into tiles of `tile` x `tile` samples. The tiles are
+independent and computed by numpy operations on whole arrays (gathers, ufuncs,
+reductions and BLAS products), which release the GIL, so the threads of the pool
+run in parallel. Of a symmetric matrix only the tiles on and above the diagonal
+are computed.
+
+Metrics of the samples x features abundances u and v:
+
+- 'braycurtis': 1 - 2 * sum(min(u, v)) / (sum(u) + sum(v)).
+- 'jaccard': unweighted, 1 - |u & v| / |u | v| of the present features.
+- 'weighted_jaccard': Ruzicka, 1 - sum(min(u, v)) / sum(max(u, v)).
+- 'aitchison': euclidean distance of the CLR transformed abundances plus a
+  pseudocount.
+
+The results equal `skbio.diversity.beta_diversity` and `scipy.spatial.distance`
+within floating point tolerance. Sparse input is not densified, except by the
+CLR of 'aitchison', which is dense.
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+from typing import List, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+
+from .profiling import profiled
+
+# logger setup
+FORMAT = "%(levelname)s | %(name)s | %(message)s"
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(__name__)
+
+DISTANCE_METRICS = ["braycurtis", "jaccard", "weighted_jaccard", "aitchison"]
+
+# samples per side of a tile
+DISTANCE_TILE = 256
+
+# dense input with fewer non-zero entries is converted to sparse for the
+# metrics of the pairwise minima
+SPARSE_DENSITY = 0.25
+
+
+@profiled
+def pairwise_distances(
+    x: Union[np.ndarray, "sparse.csr_matrix"],
+    y: Union[np.ndarray, "sparse.csr_matrix"] = None,
+    metric: str = "braycurtis",
+    tile: int = DISTANCE_TILE,
+    max_workers: int = None,
+    pseudocount: float = 1.0,
+) -> np.ndarray:
+    """
+    Distances between the rows of samples x features abundance matrices.
+
+    Args:
+        x (np.ndarray or sparse.csr_matrix): Samples x features, non-negative.
+        y (np.ndarray or sparse.csr_matrix, optional): Samples x features with
+            the features of `x`. Defaults to None, the distances of `x` to itself.
+        metric (str): One of `DISTANCE_METRICS`. Defaults to "braycurtis".
+        tile (int): Samples per side of a tile. Defaults to `DISTANCE_TILE`.
+        max_workers (int, optional): Threads of the pool. Defaults to None, the
+            number of CPUs.
+        pseudocount (float): Added to the abundances before the CLR of
+            'aitchison'. Defaults to 1.0.
+
+    Returns:
+        np.ndarray: The distances of the rows of `x` (rows) and `y` (columns),
+            with a zero diagonal if `y` is None. Bray-Curtis is NaN for pairs of
+            empty samples, the Jaccard metrics are 0.
+
+    Raises:
+        ValueError: If the metric is unknown, the tile is not positive, the
+            abundances are negative or the features of `x` and `y` differ.
+    """
+    from scipy import sparse
+
+    if metric not in DISTANCE_METRICS:
+        raise ValueError(f"Unknown metric: {metric}, use one of {DISTANCE_METRICS}")
+    if tile < 1:
+        raise ValueError("The tile must have at least one sample.")
+
+    symmetric = y is None
+    x = _as_matrix(x, metric)
+    y = x if symmetric else _as_matrix(y, metric)
+    if x.shape[1] != y.shape[1]:
+        raise ValueError(
+            f"x has {x.shape[1]} features and y has {y.shape[1]}, they must be equal."
+        )
+    if sparse.issparse(x) != sparse.issparse(y):
+        x, y = sparse.csr_matrix(x), sparse.csr_matrix(y)
+
+    x, x_stats = _prepare(x, metric, pseudocount)
+    y, y_stats = (x, x_stats) if symmetric else _prepare(y, metric, pseudocount)
+    kernel = _KERNELS[metric]
+
+    x_tiles = _tiles(x.shape[0], tile)
+    y_tiles = x_tiles if symmetric else _tiles(y.shape[0], tile)
+    # sparse rows are sliced once per tile, not once per pair
+    x_blocks = [x[start:stop] for start, stop in x_tiles]
+    y_blocks = x_blocks if symmetric else [y[start:stop] for start, stop in y_tiles]
+    pairs = [
+        (i, j)
+        for i in range(len(x_tiles))
+        for j in range(i if symmetric else 0, len(y_tiles))
+    ]
+
+    result = np.empty((x.shape[0], y.shape[0]))
+
+    def compute(pair: Tuple[int, int]):
+        i, j = pair
+        (x_start, x_stop), (y_start, y_stop) = x_tiles[i], y_tiles[j]
+        block = kernel(
+            x_blocks[i],
+            y_blocks[j],
+            x_stats[x_start:x_stop],
+            y_stats[y_start:y_stop],
+        )
+        result[x_start:x_stop, y_start:y_stop] = block
+        if symmetric:
+            result[y_start:y_stop, x_start:x_stop] = block.T
+
+    if max_workers == 1 or len(pairs) == 1:
+        for pair in pairs:
+            compute(pair)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # list() re-raises the errors of the tiles
+            list(executor.map(compute, pairs))
+
+    if symmetric:
+        np.fill_diagonal(result, 0)
+    logger.debug(f"Computed {len(pairs)} tiles of {metric} distances")
+    return result
+
+
+def distance_matrix(
+    df: pd.DataFrame,
+    metric: str = "braycurtis",
+    tile: int = DISTANCE_TILE,
+    max_workers: int = None,
+    pseudocount: float = 1.0,
+) -> pd.DataFrame:
+    """
+    Distance matrix of the samples of a pivoted table, see `pairwise_distances`.
+
+    Args:
+        df (pd.DataFrame): Features in rows, samples in columns.
+        metric (str): One of `DISTANCE_METRICS`. Defaults to "braycurtis".
+        tile (int): Samples per side of a tile. Defaults to `DISTANCE_TILE`.
+        max_workers (int, optional): Threads of the pool. Defaults to None.
+        pseudocount (float): Pseudocount of 'aitchison'. Defaults to 1.0.
+
+    Returns:
+        pd.DataFrame: The distances, labelled like `momics.taxonomy.compute_bray_curtis`.
+    """
+    ids = df.columns.astype(str).tolist()
+    distances = pairwise_distances(
+        df.to_numpy(dtype=np.float64).T,
+        metric=metric,
+        tile=tile,
+        max_workers=max_workers,
+        pseudocount=pseudocount,
+    )
+    return pd.DataFrame(distances, index=ids, columns=ids)
+
+
+###########
+# Helpers #
+###########
+def _tiles(n: int, tile: int) -> List[Tuple[int, int]]:
+    """Start and stop of the tiles of `n` samples."""
+    return [(start, min(start + tile, n)) for start in range(0, n, tile)]
+
+
+def _as_matrix(x, metric: str):
+    """Float64 csr or dense matrix, sparse if it has few non-zero entries."""
+    from scipy import sparse
+
+    if sparse.issparse(x):
+        x = sparse.csr_matrix(x, dtype=np.float64)
+        values = x.data
+    else:
+        x = np.asarray(x, dtype=np.float64)
+        values = x
+    if values.size and values.min() < 0:
+        raise ValueError("The abundances must be non-negative.")
+
+    if (
+        metric in ("braycurtis", "weighted_jaccard")
+        and not sparse.issparse(x)
+        and x.size
+        and np.count_nonzero(x) < SPARSE_DENSITY * x.size
+    ):
+        x = sparse.csr_matrix(x)
+    return x
+
+
+def _prepare(x, metric: str, pseudocount: float):
+    """The matrix the kernel of the metric uses and its row statistics."""
+    from scipy import sparse
+
+    if metric == "jaccard":
+        if sparse.issparse(x):
+            x = sparse.csr_matrix(
+                ((x.data > 0).astype(np.float64), x.indices, x.indptr), shape=x.shape
+            )
+        else:
+            x = (x > 0).astype(np.float64)
+        return x, np.asarray(x.sum(axis=1)).ravel()
+
+    if metric == "aitchison":
+        if sparse.issparse(x):
+            x = x.toarray()
+        logged = np.log(x + pseudocount)
+        clr = logged - logged.mean(axis=1, keepdims=True)
+        return clr, np.einsum("ij,ij->i", clr, clr)
+
+    return x, np.asarray(x.sum(axis=1)).ravel()
+
+
+def _sum_minima(a, b) -> np.ndarray:
+    """Sums of the pairwise minima of the rows of `a` and `b`."""
+    from scipy import sparse
+
+    minima = np.zeros((a.shape[0], b.shape[0]))
+    if not sparse.issparse(a):
+        for i in range(a.shape[0]):
+            minima[i] = np.minimum(a[i], b).sum(axis=1)
+        return minima
+
+    # the minima are gathered over the non-zero entries of b, one row of a at a
+    # time, and summed per row of b
+    lengths = np.diff(b.indptr)
+    filled = lengths > 0
+    starts = b.indptr[:-1][filled]
+    row = np.zeros(a.shape[1])
+    for i in range(a.shape[0]):
+        start, stop = a.indptr[i], a.indptr[i + 1]
+        if start == stop or not len(starts):
+            continue
+        columns = a.indices[start:stop]
+        row[columns] = a.data[start:stop]
+        minima[i, filled] = np.add.reduceat(np.minimum(row[b.indices], b.data), starts)
+        row[columns] = 0
+    return minima
+
+
+def _braycurtis(a, b, a_sums: np.ndarray, b_sums: np.ndarray) -> np.ndarray:
+    totals = a_sums[:, None] + b_sums[None, :]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 1 - 2 * _sum_minima(a, b) / totals
+
+
+def _weighted_jaccard(a, b, a_sums: np.ndarray, b_sums: np.ndarray) -> np.ndarray:
+    minima = _sum_minima(a, b)
+    # sum(max(u, v)) = sum(u) + sum(v) - sum(min(u, v))
+    maxima = a_sums[:, None] + b_sums[None, :] - minima
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(maxima > 0, 1 - minima / maxima, 0.0)
+
+
+def _jaccard(a, b, a_counts: np.ndarray, b_counts: np.ndarray) -> np.ndarray:
+    from scipy import sparse
+
+    shared = a @ b.T
+    if sparse.issparse(shared):
+        shared = shared.toarray()
+    union = a_counts[:, None] + b_counts[None, :] - shared
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(union > 0, 1 - shared / union, 0.0)
+
+
+def _aitchison(a, b, a_norms: np.ndarray, b_norms: np.ndarray) -> np.ndarray:
+    squared = a_norms[:, None] + b_norms[None, :] - 2 * (a @ b.T)
+    return np.sqrt(np.clip(squared, 0, None))
+
+
+_KERNELS = {
+    "braycurtis": _braycurtis,
+    "jaccard": _jaccard,
+    "weighted_jaccard": _weighted_jaccard,
+    "aitchison": _aitchison,
+}
@@ -3,15 +3,16 @@ import pandas as pd
 import numpy as np
 from typing import Union, List, Dict
 
-import skbio
-from skbio.diversity import beta_diversity
 
-from skbio.stats.distance import permanova
-from sklearn.metrics import pairwise_distances
 from .utils import (
     check_index_names,
 )
 from momics.constants import TAXONOMY_RANKS
+from .cache import memoize
+from .profiling import profiled
+
+# number of axes computed by the truncated (fsvd) PCoA if not specified
+PCOA_FAST_DIMENSIONS = 3
 
 # logger setup
 FORMAT = "%(levelname)s | %(name)s | %(message)s"
@@ -22,6 +23,7 @@ logger = logging.getLogger(__name__)
 #########################
 # Statistical functions #
 #########################
+@profiled
 def run_permanova(
     data: pd.DataFrame,
     metadata: pd.DataFrame,
@@ -44,6 +46,10 @@ def run_permanova(
     Returns:
         Dict[str, pd.DataFrame]: Dictionary containing PERMANOVA results for each factor.
     """
+    import skbio
+    from skbio.stats.distance import permanova
+    from .distances import pairwise_distances
+
     # Filter metadata based on selected groups
     if permanova_factor == "All":
         filtered_metadata = metadata.copy()
@@ -61,7 +67,7 @@ def run_permanova(
 
         # Calculate Bray-Curtis distance matrix
         dissimilarity_matrix = pairwise_distances(
-            combined_abundance, metric="braycurtis"
+            combined_abundance.to_numpy(dtype=np.float64), metric="braycurtis"
         )
         distance_matrix_obj = skbio.DistanceMatrix(
             dissimilarity_matrix, ids=combined_abundance.index
@@ -229,6 +235,7 @@ def calculate_alpha_diversity(df: pd.DataFrame, factors: pd.DataFrame) -> pd.Dat
 
 
 # alpha diversity
+@profiled
 def alpha_diversity_parametrized(
     tables_dict: Dict[str, pd.DataFrame], table_name: str, metadata: pd.DataFrame
 ) -> pd.DataFrame:
@@ -265,6 +272,7 @@ def alpha_diversity_parametrized(
     return alpha
 
 
+@profiled
 def beta_diversity_parametrized(
     df: pd.DataFrame, taxon: str, metric: str = "braycurtis"
 ) -> pd.DataFrame:
@@ -279,11 +287,64 @@ def beta_diversity_parametrized(
     Returns:
         pd.DataFrame: A DataFrame containing the beta diversity distances.
     """
+    from skbio.diversity import beta_diversity
+
     df_beta_input = diversity_input(df, kind="beta", taxon=taxon)
     beta = beta_diversity(metric, df_beta_input)
     return beta
 
 
+@profiled
+def pcoa_parametrized(
+    beta: "skbio.DistanceMatrix",
+    method: str = "eigh",
+    dimensions: int = None,
+    seed: int = 42,
+) -> "skbio.OrdinationResults":
+    """
+    Runs PCoA on a beta diversity distance matrix, optionally truncated to the
+    top `dimensions` axes.
+
+    Methods:
+
+    - **eigh**: exact eigendecomposition. If `dimensions` is None, all axes are computed.
+    - **fsvd**: randomised fast SVD, which only computes the top `dimensions` axes.
+      If `dimensions` is None, `PCOA_FAST_DIMENSIONS` axes are computed.
+
+    When the result is truncated, scikit-bio computes the proportion explained
+    from the trace of the centered matrix, so it stays relative to the full
+    dimensionality and not only to the computed axes. The trace also includes
+    negative eigenvalues (non-euclidean metrics such as Bray-Curtis), therefore
+    the proportions can be slightly higher than for the full solution, which
+    normalizes by the positive eigenvalues only.
+
+    Args:
+        beta (skbio.DistanceMatrix): The beta diversity distance matrix.
+        method (str): Eigensolver, 'eigh' or 'fsvd'. Defaults to 'eigh'.
+        dimensions (int, optional): Number of axes to compute. Defaults to None.
+        seed (int): Random seed for the 'fsvd' method. Defaults to 42.
+
+    Returns:
+        skbio.OrdinationResults: The PCoA results.
+
+    Raises:
+        ValueError: If the method is not supported or dimensions is smaller than 2.
+    """
+    from skbio.stats.ordination import pcoa
+
+    if method not in ["eigh", "fsvd"]:
+        raise ValueError(f"PCoA method '{method}' is not supported.")
+
+    if dimensions is None:
+        dimensions = PCOA_FAST_DIMENSIONS if method == "fsvd" else 0
+    elif dimensions < 2:
+        raise ValueError("At least 2 PCoA dimensions are needed for plotting.")
+
+    # cannot ask for more axes than there are samples
+    dimensions = min(dimensions, beta.shape[0])
+    return pcoa(beta, method=method, number_of_dimensions=dimensions, seed=seed)
+
+
 ####################
 # helper functions #
 ####################
@@ -302,6 +363,7 @@ def update_taxa_count_indicator(indicator, df):
 
 
 # I think this is only useful for beta, not alpha diversity
+@memoize
 def diversity_input(
     df: pd.DataFrame, kind: str = "alpha", taxon: str = "ncbi_tax_id"
 ) -> pd.DataFrame:
@@ -363,6 +425,7 @@ def get_key_column(table_name: str) -> str:
         raise ValueError(f"Unknown table: {table_name}")
 
 
+@memoize
 def alpha_input(tables_dict: Dict[str, pd.DataFrame], table_name: str) -> pd.DataFrame:
     """
     Prepares the input data for alpha diversity calculation.
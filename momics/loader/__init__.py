@@ -1,3 +1,4 @@
+from .matrices import AbundanceMatrix, load_abundance_matrix, save_abundance_matrix
 from .parquets import load_parquets, load_parquets_udal
 from .ro_crates import (
     get_rocrate_metadata_gh,
@@ -5,15 +6,28 @@ from .ro_crates import (
     extract_data_by_name,
     extract_all_datafiles,
 )
+from .streaming import (
+    stream_taxonomy_batches,
+    stream_sample_sums,
+    stream_prevalence_cutoff_taxonomy,
+    stream_pivot_taxonomic_data,
+)
 from .utils import bytes_to_df
 
 
 __all__ = [
+    "AbundanceMatrix",
+    "load_abundance_matrix",
+    "save_abundance_matrix",
     "get_rocrate_metadata_gh",
     "get_rocrate_data",
     "extract_data_by_name",
     "extract_all_datafiles",
     "load_parquets",
     "load_parquets_udal",
+    "stream_taxonomy_batches",
+    "stream_sample_sums",
+    "stream_prevalence_cutoff_taxonomy",
+    "stream_pivot_taxonomic_data",
     "bytes_to_df",
 ]
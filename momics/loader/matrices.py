@@ -0,0 +1,290 @@
+"""
+Memory-mapped on-disk format of pivoted abundance matrices (features in rows,
+samples in columns, e.g. the output of `momics.taxonomy.pivot_taxonomic_data`).
+
+A matrix is stored in a folder of `.npy` files, which are opened with
+`np.load(..., mmap_mode="r")`, so several processes on the same host share
+one page-cached copy and only the touched pages are read:
+
+- `meta.json`: format version, format, shape and the index/column names.
+- `index_<k>.npy`: labels of the index level k, `columns.npy`: the sample labels.
+- dense format: `values.npy`, float32 samples x features, so that every sample
+  (column of the matrix) is contiguous on disk.
+- sparse format: `data.npy`, `indices.npy` and `indptr.npy` of the CSR matrix of
+  samples x features, i.e. the CSC matrix of the pivoted table.
+
+Selecting a contiguous range of samples is zero-copy in both formats.
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+from typing import List, Union
+
+# matrices with at most this many cells and density above
+# SPARSE_MAX_DENSITY are stored dense
+DENSE_MAX_CELLS = 10_000_000
+SPARSE_MAX_DENSITY = 0.3
+
+MATRIX_FORMAT_VERSION = 1
+
+
+class AbundanceMatrix:
+    """
+    Memory-mapped abundance matrix of features x samples.
+
+    Args:
+        index (pd.Index): Feature labels.
+        columns (pd.Index): Sample labels.
+        values (np.ndarray, optional): Dense samples x features values.
+        csr (sparse.csr_matrix, optional): Sparse samples x features values.
+    """
+
+    def __init__(
+        self,
+        index: pd.Index,
+        columns: pd.Index,
+        values: np.ndarray = None,
+        csr: "sparse.csr_matrix" = None,
+    ):
+        if (values is None) == (csr is None):
+            raise ValueError("Exactly one of values and csr must be given.")
+        self.index = index
+        self.columns = columns
+        self.values = values
+        self.csr = csr
+
+    @property
+    def format(self) -> str:
+        """'dense' or 'sparse'."""
+        return "dense" if self.values is not None else "sparse"
+
+    @property
+    def shape(self) -> tuple:
+        """Shape of the features x samples matrix."""
+        return (len(self.index), len(self.columns))
+
+    def select_columns(self, columns: List) -> "AbundanceMatrix":
+        """
+        Select samples by label.
+
+        The result shares the memory map when the selected samples are contiguous
+        and in the stored order, otherwise the selected samples are copied.
+
+        Args:
+            columns (List): Sample labels.
+
+        Returns:
+            AbundanceMatrix: The matrix of the selected samples.
+
+        Raises:
+            KeyError: If a sample is not in the matrix.
+        """
+        positions = self.columns.get_indexer(columns)
+        if (positions < 0).any():
+            missing = [c for c, p in zip(columns, positions) if p < 0]
+            raise KeyError(f"Samples not in the matrix: {missing}")
+
+        contiguous = len(positions) > 0 and (
+            np.array_equal(positions, np.arange(positions[0], positions[0] + len(positions)))
+        )
+        if contiguous:
+            rows = slice(positions[0], positions[0] + len(positions))
+        else:
+            rows = positions
+
+        if self.values is not None:
+            return AbundanceMatrix(self.index, self.columns[rows], values=self.values[rows])
+
+        from scipy import sparse
+
+        if contiguous:
+            # slicing the CSR rows keeps data and indices as views, they are
+            # assigned directly because scipy copies views of much larger arrays
+            start, stop = self.csr.indptr[rows.start], self.csr.indptr[rows.stop]
+            csr = sparse.csr_matrix(
+                (len(positions), self.csr.shape[1]), dtype=self.csr.dtype
+            )
+            csr.data = self.csr.data[start:stop]
+            csr.indices = self.csr.indices[start:stop]
+            csr.indptr = self.csr.indptr[rows.start : rows.stop + 1] - start
+        else:
+            csr = self.csr[rows]
+        return AbundanceMatrix(self.index, self.columns[rows], csr=csr)
+
+    def to_sparse(self) -> "sparse.csc_matrix":
+        """Values as a features x samples CSC matrix."""
+        from scipy import sparse
+
+        if self.csr is not None:
+            return self.csr.T
+        return sparse.csr_matrix(self.values).T
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Dense features x samples DataFrame. For the dense format, the frame is
+        a read-only view of the memory map.
+        """
+        if self.values is not None:
+            values = self.values.T
+        else:
+            values = self.csr.T.toarray()
+        return pd.DataFrame(values, index=self.index, columns=self.columns, copy=False)
+
+
+def save_abundance_matrix(
+    df: Union[pd.DataFrame, AbundanceMatrix], folder: str, matrix_format: str = "auto"
+) -> str:
+    """
+    Save a pivoted abundance table in the memory-mappable format.
+
+    Args:
+        df (pd.DataFrame or AbundanceMatrix): Features in rows, samples in columns
+            and numeric values. A sparse `AbundanceMatrix` is written without
+            being densified, unless the dense format is requested.
+        folder (str): Folder to write the files to, created if missing. A matrix
+            in the folder is overwritten; drop the matrices memory-mapped from it
+            first, which cannot be replaced on Windows.
+        matrix_format (str): 'dense', 'sparse' or 'auto', which stores dense
+            matrices of at most `DENSE_MAX_CELLS` cells or with a density above
+            `SPARSE_MAX_DENSITY`. Defaults to "auto".
+
+    Returns:
+        str: The matrix format written.
+
+    Raises:
+        ValueError: If the format is unknown or the table is not numeric.
+        PermissionError: If a file of the folder cannot be replaced.
+    """
+    from scipy import sparse
+
+    if matrix_format not in ["auto", "dense", "sparse"]:
+        raise ValueError(f"Unknown matrix format: {matrix_format}")
+
+    csr = None
+    if isinstance(df, AbundanceMatrix):
+        if df.csr is not None and matrix_format != "dense":
+            csr = df.csr.astype(np.float32)
+            matrix_format = "sparse"
+            values = None
+        else:
+            values = df.to_frame().to_numpy(dtype=np.float32).T
+    elif not all(pd.api.types.is_numeric_dtype(t) for t in df.dtypes):
+        raise ValueError("The abundance table must contain numeric values only.")
+    else:
+        values = df.to_numpy(dtype=np.float32).T
+
+    if matrix_format == "auto":
+        density = np.count_nonzero(values) / max(values.size, 1)
+        dense = values.size <= DENSE_MAX_CELLS or density > SPARSE_MAX_DENSITY
+        matrix_format = "dense" if dense else "sparse"
+
+    os.makedirs(folder, exist_ok=True)
+    if matrix_format == "dense":
+        _save_npy(folder, "values", np.ascontiguousarray(values))
+    else:
+        if csr is None:
+            csr = sparse.csr_matrix(values)
+        for name in ["data", "indices", "indptr"]:
+            _save_npy(folder, name, getattr(csr, name))
+
+    for k in range(df.index.nlevels):
+        _save_npy(folder, f"index_{k}", _labels_array(df.index.get_level_values(k)))
+    _save_npy(folder, "columns", _labels_array(df.columns))
+
+    meta = {
+        "version": MATRIX_FORMAT_VERSION,
+        "format": matrix_format,
+        "shape": list(df.shape),
+        "index_names": list(df.index.names),
+        "columns_name": df.columns.name,
+    }
+    with open(os.path.join(folder, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return matrix_format
+
+
+def load_abundance_matrix(
+    folder: str, columns: List = None, mmap_mode: str = "r"
+) -> AbundanceMatrix:
+    """
+    Open an abundance matrix saved by `save_abundance_matrix`.
+
+    Args:
+        folder (str): Folder of the matrix files.
+        columns (List, optional): Samples to select, see `AbundanceMatrix.select_columns`.
+        mmap_mode (str): Memory map mode of `np.load`, 'r' for read-only, 'c' for
+            copy-on-write or None to read into memory. Defaults to "r".
+
+    Returns:
+        AbundanceMatrix: The matrix, use `to_frame` for a DataFrame.
+    """
+    from scipy import sparse
+
+    with open(os.path.join(folder, "meta.json")) as f:
+        meta = json.load(f)
+
+    def load(name):
+        return np.load(os.path.join(folder, f"{name}.npy"), mmap_mode=mmap_mode)
+
+    levels = [
+        np.load(os.path.join(folder, f"index_{k}.npy"))
+        for k in range(len(meta["index_names"]))
+    ]
+    if len(levels) > 1:
+        index = pd.MultiIndex.from_arrays(levels, names=meta["index_names"])
+    else:
+        index = pd.Index(levels[0], name=meta["index_names"][0])
+    sample_labels = pd.Index(
+        np.load(os.path.join(folder, "columns.npy")), name=meta["columns_name"]
+    )
+
+    n_features, n_samples = meta["shape"]
+    if meta["format"] == "dense":
+        matrix = AbundanceMatrix(index, sample_labels, values=load("values"))
+    else:
+        csr = sparse.csr_matrix(
+            (load("data"), load("indices"), load("indptr")),
+            shape=(n_samples, n_features),
+            copy=False,
+        )
+        matrix = AbundanceMatrix(index, sample_labels, csr=csr)
+
+    if columns is not None:
+        matrix = matrix.select_columns(columns)
+    return matrix
+
+
+def _save_npy(folder: str, name: str, array: np.ndarray):
+    """
+    Write `<name>.npy` through a temporary file, so readers never see a partial file.
+
+    Callers must drop the matrices memory-mapped from the previous file before
+    overwriting it, e.g. by loading them with `mmap_mode=None`. Only on POSIX do
+    the open maps keep the previous data; on Windows a mapped file cannot be
+    replaced.
+
+    Raises:
+        PermissionError: If the previous file cannot be replaced, e.g. because it
+            is still memory-mapped on Windows.
+    """
+    path = os.path.join(folder, f"{name}.npy")
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, array)
+    try:
+        os.replace(path + ".tmp", path)
+    except PermissionError as e:
+        os.remove(path + ".tmp")
+        raise PermissionError(
+            f"Cannot replace {path}, drop the matrices memory-mapped from it "
+            f"before overwriting, e.g. load them with mmap_mode=None."
+        ) from e
+
+
+def _labels_array(labels: Union[pd.Index, pd.Series]) -> np.ndarray:
+    """Labels as a numpy array loadable without pickle."""
+    values = np.asarray(labels)
+    if values.dtype == object:
+        values = values.astype(str)
+    return values
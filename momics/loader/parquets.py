@@ -1,9 +1,11 @@
 import os
 import pandas as pd
 from typing import Dict
-from mgo.udal import UDAL
 
+from ..profiling import profiled
 
+
+@profiled
 def load_parquets(folder: str) -> Dict[str, pd.DataFrame]:
     """
     Loads all .parquet files in a folder and stores them in a dictionary.
@@ -37,10 +39,13 @@ def load_parquets(folder: str) -> Dict[str, pd.DataFrame]:
     return mgf_parquet_dfs
 
 
+@profiled
 def load_parquets_udal():
     """
     Load parquet files into a dictionary by looping udal calls
     """
+    from mgo.udal import UDAL
+
     udal = UDAL()
 
     parquets = {}
@@ -1,5 +1,4 @@
 import os
-import requests
 from typing import Dict
 
 
@@ -13,6 +12,8 @@ def get_rocrate_metadata_gh(sample_id: str) -> Dict:
     Returns:
         Dict: The metadata in JSON format.
     """
+    import requests
+
     url = f"https://api.github.com/repos/emo-bon/analysis-results-cluster-01-crate/contents/{sample_id}-ro-crate/ro-crate-metadata.json"
     req = requests.get(
         url,
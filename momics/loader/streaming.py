@@ -0,0 +1,260 @@
+"""
+Out-of-core processing of LSU/SSU taxonomy tables larger than memory.
+
+The tables are read from parquet with pyarrow datasets in record batches of at
+most `batch_rows` rows, and the sample filter is pushed down to the parquet
+scan. Every function keeps only one batch of the long table in memory, plus
+the partial aggregates merged across batches:
+
+- `stream_sample_sums`: total abundance per sample.
+- `stream_prevalence_cutoff_taxonomy`: the per-sample cutoff of
+  `momics.taxonomy.prevalence_cutoff_taxonomy`, with the sums of a first pass.
+- `stream_pivot_taxonomic_data`: the sparse equivalent of
+  `momics.taxonomy.pivot_taxonomic_data` followed by `prevalence_cutoff`, which
+  holds only the non-zero abundances.
+
+Requires pyarrow, install it with 'pip install marine-omics[arrow]'.
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+from typing import Iterable, Iterator, List, Union
+
+from ..constants import TAXONOMY_RANKS
+from ..profiling import profiled
+from .matrices import AbundanceMatrix
+
+# logger setup
+FORMAT = "%(levelname)s | %(name)s | %(message)s"
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(__name__)
+
+STREAM_BATCH_ROWS = 500_000
+
+# columns needed to pivot a taxonomy table
+PIVOT_COLUMNS = ["ref_code", "ncbi_tax_id", "abundance"] + TAXONOMY_RANKS
+
+
+def taxonomy_dataset(source: Union[str, List[str], "pyarrow.dataset.Dataset"]):
+    """
+    Open parquet files as a pyarrow dataset without reading them.
+
+    Args:
+        source (str, List[str] or pyarrow.dataset.Dataset): Parquet file, folder
+            of parquet files, list of files or an opened dataset.
+
+    Returns:
+        pyarrow.dataset.Dataset: The dataset.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError(
+            "Out-of-core processing requires pyarrow, install it with "
+            "'pip install marine-omics[arrow]'."
+        ) from e
+
+    if isinstance(source, ds.Dataset):
+        return source
+    return ds.dataset(source, format="parquet")
+
+
+def stream_taxonomy_batches(
+    source: Union[str, List[str], "pyarrow.dataset.Dataset"],
+    samples: Iterable[str] = None,
+    columns: List[str] = None,
+    taxonomy_ranks: List[str] = None,
+    batch_rows: int = STREAM_BATCH_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """
+    Iterate over a taxonomy table in batches of rows.
+
+    Args:
+        source (str, List[str] or pyarrow.dataset.Dataset): See `taxonomy_dataset`.
+        samples (Iterable[str], optional): `ref_code` values to keep, the filter
+            is applied while reading. Defaults to None, which keeps all samples.
+        columns (List[str], optional): Columns to read. Defaults to None, all columns.
+        taxonomy_ranks (List[str], optional): If given, the batches are passed
+            through `fill_taxonomy_placeholders` with these ranks.
+        batch_rows (int): Maximum number of rows of a batch. Defaults to
+            `STREAM_BATCH_ROWS`.
+
+    Yields:
+        pd.DataFrame: The batches with a default index.
+    """
+    import pyarrow.dataset as ds
+
+    from ..taxonomy import fill_taxonomy_placeholders
+
+    dataset = taxonomy_dataset(source)
+    row_filter = None
+    if samples is not None:
+        row_filter = ds.field("ref_code").isin(list(samples))
+
+    for batch in dataset.to_batches(
+        columns=columns, filter=row_filter, batch_size=batch_rows
+    ):
+        if batch.num_rows == 0:
+            continue
+        df = batch.to_pandas()
+        if taxonomy_ranks is not None:
+            df = fill_taxonomy_placeholders(df, taxonomy_ranks)
+        yield df
+
+
+@profiled
+def stream_sample_sums(
+    source: Union[str, List[str], "pyarrow.dataset.Dataset"],
+    samples: Iterable[str] = None,
+    batch_rows: int = STREAM_BATCH_ROWS,
+) -> pd.Series:
+    """
+    Total abundance of each sample, summed over the batches.
+
+    Args:
+        source (str, List[str] or pyarrow.dataset.Dataset): See `taxonomy_dataset`.
+        samples (Iterable[str], optional): `ref_code` values to keep.
+        batch_rows (int): Maximum number of rows of a batch.
+
+    Returns:
+        pd.Series: Abundance sums indexed by `ref_code`.
+    """
+    partial = [
+        batch.groupby("ref_code")["abundance"].sum()
+        for batch in stream_taxonomy_batches(
+            source, samples, ["ref_code", "abundance"], batch_rows=batch_rows
+        )
+    ]
+    if not partial:
+        return pd.Series(dtype=float, name="abundance")
+    # a sample can span several batches
+    return pd.concat(partial).groupby(level=0).sum()
+
+
+def stream_prevalence_cutoff_taxonomy(
+    source: Union[str, List[str], "pyarrow.dataset.Dataset"],
+    percent: float = 10,
+    samples: Iterable[str] = None,
+    taxonomy_ranks: List[str] = None,
+    batch_rows: int = STREAM_BATCH_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """
+    Streaming version of `momics.taxonomy.prevalence_cutoff_taxonomy`, which keeps
+    the taxa with abundance above `percent` % of their sample's total abundance.
+
+    The sample sums are computed in a first pass over the dataset.
+
+    Args:
+        source (str, List[str] or pyarrow.dataset.Dataset): See `taxonomy_dataset`.
+        percent (float): The threshold as a percentage of the sample sum.
+        samples (Iterable[str], optional): `ref_code` values to keep.
+        taxonomy_ranks (List[str], optional): Ranks to fill placeholders of,
+            see `stream_taxonomy_batches`.
+        batch_rows (int): Maximum number of rows of a batch.
+
+    Yields:
+        pd.DataFrame: The filtered batches.
+    """
+    thresholds = stream_sample_sums(source, samples, batch_rows) * (percent / 100)
+    for batch in stream_taxonomy_batches(
+        source, samples, taxonomy_ranks=taxonomy_ranks, batch_rows=batch_rows
+    ):
+        keep = batch["abundance"] > batch["ref_code"].map(thresholds)
+        if keep.any():
+            yield batch[keep.values]
+
+
+@profiled
+def stream_pivot_taxonomic_data(
+    source: Union[str, List[str], "pyarrow.dataset.Dataset"],
+    samples: Iterable[str] = None,
+    taxonomy_ranks: List[str] = None,
+    prevalence_percent: float = None,
+    batch_rows: int = STREAM_BATCH_ROWS,
+) -> AbundanceMatrix:
+    """
+    Pivot a taxonomy table into a sparse abundance matrix batch by batch.
+
+    The result equals `pivot_taxonomic_data` of the whole table, followed by
+    `prevalence_cutoff(..., percent=prevalence_percent, skip_columns=0)` if
+    `prevalence_percent` is given: the features are labelled by
+    (`ncbi_tax_id`, `taxonomic_concat`), sorted like the pivot table, duplicated
+    sample/feature rows are averaged and the values truncated to integers.
+
+    Args:
+        source (str, List[str] or pyarrow.dataset.Dataset): See `taxonomy_dataset`.
+        samples (Iterable[str], optional): `ref_code` values to keep.
+        taxonomy_ranks (List[str], optional): Ranks to fill placeholders of before
+            the labels are built, see `stream_taxonomy_batches`.
+        prevalence_percent (float, optional): Minimum percentage of samples
+            a feature must be present in. Defaults to None, no cutoff.
+        batch_rows (int): Maximum number of rows of a batch.
+
+    Returns:
+        AbundanceMatrix: Sparse features x samples matrix, use `to_frame` for the
+            pivot table or `momics.loader.save_abundance_matrix` to store it.
+    """
+    from scipy import sparse
+
+    from ..taxonomy import taxonomic_concat
+
+    # global codes of the labels, the partial COO entries refer to them
+    feature_codes, sample_codes = {}, {}
+    rows, cols, values = [], [], []
+    for batch in stream_taxonomy_batches(
+        source, samples, PIVOT_COLUMNS, taxonomy_ranks, batch_rows
+    ):
+        batch = batch.dropna(subset=["ncbi_tax_id", "abundance"])
+        features = pd.MultiIndex.from_arrays([batch["ncbi_tax_id"], taxonomic_concat(batch)])
+        rows.append(_global_codes(batch["ref_code"], sample_codes))
+        cols.append(_global_codes(features, feature_codes))
+        values.append(batch["abundance"].to_numpy(dtype=np.float64))
+
+    n_samples, n_features = len(sample_codes), len(feature_codes)
+    shape = (n_samples, n_features)
+    rows = np.concatenate(rows) if rows else np.array([], dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.array([], dtype=np.int64)
+    values = np.concatenate(values) if values else np.array([], dtype=np.float64)
+
+    # CSR conversion sums the duplicates, counting them gives the mean
+    sums = sparse.coo_matrix((values, (rows, cols)), shape=shape).tocsr()
+    counts = sparse.coo_matrix(
+        (np.ones_like(values), (rows, cols)), shape=shape
+    ).tocsr()
+    sums.data = np.trunc(sums.data / counts.data)
+    sums.eliminate_zeros()
+    logger.info(f"Pivoted {len(values)} rows into {n_samples} samples x {n_features} features")
+
+    keep = np.ones(n_features, dtype=bool)
+    if prevalence_percent is not None:
+        prevalence = np.bincount(sums.indices, minlength=n_features)
+        keep = prevalence >= (prevalence_percent / 100) * n_samples
+
+    feature_labels = pd.MultiIndex.from_tuples(
+        list(feature_codes), names=["ncbi_tax_id", "taxonomic_concat"]
+    )
+    sample_labels = pd.Index(list(sample_codes), name="ref_code")
+
+    # same order as the pivot table
+    feature_order = np.flatnonzero(keep)
+    feature_order = feature_order[feature_labels[feature_order].argsort()]
+    sample_order = sample_labels.argsort()
+
+    csr = sums[sample_order][:, feature_order]
+    csr.sort_indices()
+    return AbundanceMatrix(
+        feature_labels[feature_order], sample_labels[sample_order], csr=csr
+    )
+
+
+def _global_codes(labels: Union[pd.Series, pd.Index], codes: dict) -> np.ndarray:
+    """Codes of the labels in `codes`, which is extended with the new labels."""
+    local, uniques = pd.factorize(labels)
+    mapping = np.array(
+        [codes.setdefault(label, len(codes)) for label in uniques], dtype=np.int64
+    )
+    return mapping[local]
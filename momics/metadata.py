@@ -11,7 +11,6 @@ import logging
 import pandas as pd
 from typing import Dict, List
 from datetime import datetime
-from mgo.udal import UDAL
 
 
 # logger setup
@@ -60,6 +59,8 @@ def get_metadata_udal():
     """
     Load metadata from the UDAL API
     """
+    from mgo.udal import UDAL
+
     udal = UDAL()
 
     sample_metadata = udal.execute("urn:embrc.eu:emobon:logsheets").data().reset_index()
@@ -1,7 +1,35 @@
+import os
+import json
+import hashlib
 import itertools
+import logging
+import psutil
+import numpy as np
 import pandas as pd
 import networkx as nx
-from typing import Dict, List, Tuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from scipy import sparse
+from typing import Dict, List, Tuple, Union
+
+from .profiling import profiled
+from .stats import (
+    COMPOSITIONAL_METHODS,
+    compositional_from_taxonomy,
+    permutation_edge_test,
+    spearman_from_taxonomy,
+)
+from .taxonomy import fdr_pvals, split_taxonomic_data_pivoted
+
+# logger setup
+FORMAT = "%(levelname)s | %(name)s | %(message)s"
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(__name__)
+
+# graphs with more nodes use the scalable layouts with method="auto"
+LARGE_NETWORK_NODES = 1000
+# number of layouts kept in memory by graph_layout
+LAYOUT_CACHE_SIZE = 32
+_layout_cache = {}
 
 
 def interaction_to_graph(
@@ -73,15 +101,21 @@ def interaction_to_graph_with_pvals(
     return nodes, edges_pos, edges_neg
 
 
+@profiled
 def pairwise_jaccard_lower_triangle(
     network_results: dict, edge_type: str = "all"
 ) -> pd.DataFrame:
     """
     Calculate pairwise Jaccard similarity for the lower triangle of all group comparisons.
-    Returns a DataFrame with columns: group1, group2, jaccard_similarity.
+    Returns a DataFrame with groups as index and columns, the similarity of groups
+    i > j in the lower triangle and NaN elsewhere.
 
     If `edge_type` is 'all', it calculates Jaccard similarity for all edges in the graphs.
 
+    Edges are treated as undirected. Each group's edges are encoded once as integer
+    edge IDs over a node index shared by all groups, and all pairwise intersections
+    come from a single sparse product of the group-by-edge incidence matrix.
+
     Args:
         network_results (dict): Dictionary containing network results for each group.
             Keys are 'graph', 'nodes', and lists of specific edges from the graph.
@@ -92,27 +126,47 @@ def pairwise_jaccard_lower_triangle(
     """
     # Extract all group names
     groups = list(network_results.keys())
-    results = []
 
-    # define empty DataFrame with groups as index and columns
-    pivoted = pd.DataFrame(index=groups, columns=groups)
-    # Iterate over all unique pairs (lower triangle, i < j)
-    for g1, g2 in itertools.combinations(groups, 2):
+    edge_lists = []
+    for g in groups:
         if edge_type == "all":
-            edges1 = set(network_results[g1]["graph"].edges())
-            edges2 = set(network_results[g2]["graph"].edges())
+            edge_lists.append(list(network_results[g]["graph"].edges()))
         else:
-            edges1 = set(network_results[g1][edge_type])
-            edges2 = set(network_results[g2][edge_type])
-        intersection = edges1 & edges2
-        union = edges1 | edges2
-        jaccard = len(intersection) / len(union) if len(union) > 0 else float("nan")
-        results.append({"group1": g1, "group2": g2, "jaccard_similarity": jaccard})
-        pivoted.loc[g2, g1] = jaccard
+            edge_lists.append(list(network_results[g][edge_type]))
+
+    # shared node index over all groups
+    endpoints = [node for edges in edge_lists for edge in edges for node in edge[:2]]
+    node_codes, node_index = pd.factorize(pd.Series(endpoints, dtype=object))
+    n_nodes = max(len(node_index), 1)
+    codes = node_codes.reshape(-1, 2)
+
+    # undirected integer edge IDs, low node code first
+    edge_ids = np.minimum(codes[:, 0], codes[:, 1]).astype(np.int64) * n_nodes + (
+        np.maximum(codes[:, 0], codes[:, 1])
+    )
+    group_of_edge = np.repeat(np.arange(len(groups)), [len(e) for e in edge_lists])
+    edge_codes, edge_index = pd.factorize(edge_ids)
 
-    return pivoted
+    incidence = sparse.csr_matrix(
+        (np.ones(len(edge_codes)), (group_of_edge, edge_codes)),
+        shape=(len(groups), len(edge_index)),
+    )
+    # duplicated edges within a group count once
+    incidence.sum_duplicates()
+    incidence.data[:] = 1.0
 
+    intersection = (incidence @ incidence.T).toarray()
+    sizes = np.diag(intersection)
+    union = sizes[:, None] + sizes[None, :] - intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        jaccard = np.where(union > 0, intersection / union, np.nan)
 
+    # keep only the lower triangle (i > j)
+    jaccard[np.triu_indices(len(groups))] = np.nan
+    return pd.DataFrame(jaccard, index=groups, columns=groups)
+
+
+@profiled
 def build_interaction_graphs(
     correlation_data: dict,
     pos_cutoff: float = 0.5,
@@ -133,42 +187,640 @@ def build_interaction_graphs(
     """
     network_results = {}
     for factor, dict_df in correlation_data.items():
-        print(f"Factor: {factor}")
-        nodes, edges_pos, edges_neg = interaction_to_graph_with_pvals(
+        network_results[factor] = _interaction_graph_summary(
+            factor,
             dict_df["correlation"],
             dict_df["p_vals_fdr"],
             pos_cutoff=pos_cutoff,
             neg_cutoff=neg_cutoff,
             p_val_cutoff=p_val_cutoff,
         )
-        G = nx.Graph(mode=factor)
 
+    return network_results
+
+
+def _interaction_graph_summary(
+    factor: str,
+    correlation: pd.DataFrame,
+    p_vals_fdr: pd.DataFrame,
+    pos_cutoff: float,
+    neg_cutoff: float,
+    p_val_cutoff: float,
+) -> Dict:
+    """
+    Build the interaction graph of one factor and its summary metrics.
+
+    Args:
+        factor (str): The factor value, stored as the graph 'mode'.
+        correlation (pd.DataFrame): Correlation matrix.
+        p_vals_fdr (pd.DataFrame): FDR corrected p-values matrix.
+        pos_cutoff (float): The positive correlation cutoff.
+        neg_cutoff (float): The negative correlation cutoff.
+        p_val_cutoff (float): The p-value cutoff.
+
+    Returns:
+        Dict: Network results of the factor, see `build_interaction_graphs`.
+    """
+    print(f"Factor: {factor}")
+    nodes, edges_pos, edges_neg = interaction_to_graph_with_pvals(
+        correlation,
+        p_vals_fdr,
+        pos_cutoff=pos_cutoff,
+        neg_cutoff=neg_cutoff,
+        p_val_cutoff=p_val_cutoff,
+    )
+    G = nx.Graph(mode=factor)
+
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges_pos, color="green")
+    G.add_edges_from(edges_neg, color="red")
+
+    result = {
+        "graph": G,
+        "nodes": nodes,
+        "edges_pos": edges_pos,
+        "edges_neg": edges_neg,
+    }
+
+    degree_centrality = nx.degree_centrality(G)
+
+    result["degree_centrality"] = sorted(
+        degree_centrality.items(), key=lambda x: x[1], reverse=True
+    )[:10]
+
+    betweenness = nx.betweenness_centrality(G)
+
+    result["top_betweenness"] = sorted(
+        betweenness.items(), key=lambda x: x[1], reverse=True
+    )[:10]
+    result["bottom_betweenness"] = sorted(betweenness.items(), key=lambda x: x[1])[
+        :10
+    ]
+    result["total_nodes"] = G.number_of_nodes()
+    result["total_edges"] = G.number_of_edges()
+    return result
+
+
+############
+# Pipeline #
+############
+@profiled
+def interaction_network_pipeline(
+    taxonomy: pd.DataFrame,
+    groups: Dict[str, list],
+    pos_cutoff: float = 0.5,
+    neg_cutoff: float = -0.5,
+    p_val_cutoff: float = 0.05,
+    max_workers: int = None,
+    memory_per_worker_gb: float = None,
+    association: str = "spearman",
+    n_bootstraps: int = 100,
+    permutations: int = None,
+    permutation_alpha: float = None,
+    permutation_confidence: float = 0.999,
+) -> Dict:
+    """
+    Run the co-occurrence network pipeline for each factor value end-to-end:
+    split of the pivoted taxonomy, Spearman correlation, FDR correction and graph
+    construction. This is equivalent to chaining `split_taxonomic_data_pivoted`,
+    `spearman_from_taxonomy`, `fdr_pvals` and `build_interaction_graphs`.
+    With a compositional `association`, `momics.stats.compositional_from_taxonomy`
+    replaces `spearman_from_taxonomy`, with its bootstraps in the factor's worker.
+    With `permutations`, the analytic Spearman p-values of the candidate edges are
+    replaced by `momics.stats.permutation_edge_test`.
+
+    Each factor is processed in a separate worker process and only the graph, edge
+    lists and summary metrics are returned, so the dense correlation and p-value
+    matrices of one factor at a time are held per worker. At most `max_workers`
+    factors are submitted at once, which also bounds the column subsets held by
+    the main process.
+
+    Args:
+        taxonomy (pd.DataFrame): Pivoted taxonomy, taxa in rows and samples in columns.
+        groups (Dict[str, list]): Factor values and their sample (column) names,
+            see `momics.taxonomy.split_metadata`.
+        pos_cutoff (float): The positive correlation cutoff.
+        neg_cutoff (float): The negative correlation cutoff.
+        p_val_cutoff (float): The p-value cutoff, used for the FDR correction too.
+        max_workers (int, optional): Maximum number of worker processes. Defaults to
+            None, which uses the number of CPUs. 1 runs in the current process.
+        memory_per_worker_gb (float, optional): Memory budget of one worker in GB. The
+            number of workers is limited to fit the available memory. Defaults to None.
+        association (str): 'spearman', or one of
+            `momics.stats.COMPOSITIONAL_METHODS`. Defaults to "spearman".
+        n_bootstraps (int): Null datasets of the p-values of a compositional
+            association. Defaults to 100.
+        permutations (int, optional): Maximum permutations of the sequential
+            permutation test of the edges, Spearman only. Defaults to None, the
+            analytic p-values.
+        permutation_alpha (float, optional): Significance level of the early stop
+            of the permutation test. Defaults to None, the `p_val_cutoff`.
+        permutation_confidence (float): Confidence of the early stop of the
+            permutation test. Defaults to 0.999.
+
+    Returns:
+        Dict: A dictionary containing network results for each factor, as returned
+            by `build_interaction_graphs`.
+    """
+    if not isinstance(groups, dict):
+        raise ValueError("Groups must be a dictionary.")
+    if association not in ["spearman"] + COMPOSITIONAL_METHODS:
+        raise ValueError(
+            f"Unknown association: {association}, use 'spearman' or one of "
+            f"{COMPOSITIONAL_METHODS}"
+        )
+    if permutations is not None and association != "spearman":
+        raise ValueError("The permutation test is for the Spearman correlations only.")
+
+    n_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+    if memory_per_worker_gb is not None:
+        available_gb = psutil.virtual_memory().available / 1e9
+        n_workers = min(n_workers, max(1, int(available_gb // memory_per_worker_gb)))
+        # upper bound, the factors usually keep fewer taxa after removing zero rows
+        estimate = _estimate_factor_memory_gb(taxonomy.shape[0])
+        if estimate > memory_per_worker_gb:
+            logger.warning(
+                f"A factor may need up to {estimate:.2f} GB, "
+                f"more than the {memory_per_worker_gb} GB per worker."
+            )
+    n_workers = max(1, min(n_workers, len(groups)))
+    logger.info(f"Running network pipeline for {len(groups)} factors on {n_workers} workers.")
+
+    params = dict(
+        pos_cutoff=pos_cutoff,
+        neg_cutoff=neg_cutoff,
+        p_val_cutoff=p_val_cutoff,
+        association=association,
+        n_bootstraps=n_bootstraps,
+        permutations=permutations,
+        permutation_alpha=(
+            p_val_cutoff if permutation_alpha is None else permutation_alpha
+        ),
+        permutation_confidence=permutation_confidence,
+    )
+    network_results = {}
+    if n_workers == 1:
+        for factor, ref_codes in groups.items():
+            result = _factor_interaction_network(factor, taxonomy[ref_codes], **params)
+            if result is not None:
+                network_results[factor] = result
+        return network_results
+
+    pending = iter(groups.items())
+    futures = {}
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        # keep at most n_workers subsets in flight
+        for factor, ref_codes in itertools.islice(pending, n_workers):
+            futures[
+                executor.submit(
+                    _factor_interaction_network, factor, taxonomy[ref_codes], **params
+                )
+            ] = factor
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                factor = futures.pop(future)
+                result = future.result()
+                if result is not None:
+                    network_results[factor] = result
+                for next_factor, ref_codes in itertools.islice(pending, 1):
+                    futures[
+                        executor.submit(
+                            _factor_interaction_network,
+                            next_factor,
+                            taxonomy[ref_codes],
+                            **params,
+                        )
+                    ] = next_factor
+
+    # keep the order of the groups
+    return {f: network_results[f] for f in groups if f in network_results}
+
+
+def _factor_interaction_network(
+    factor: str,
+    df: pd.DataFrame,
+    pos_cutoff: float,
+    neg_cutoff: float,
+    p_val_cutoff: float,
+    association: str = "spearman",
+    n_bootstraps: int = 100,
+    permutations: int = None,
+    permutation_alpha: float = 0.05,
+    permutation_confidence: float = 0.999,
+) -> Dict:
+    """
+    Worker of `interaction_network_pipeline` processing one factor value.
+
+    Args:
+        factor (str): The factor value.
+        df (pd.DataFrame): Pivoted taxonomy subset of the factor samples.
+        pos_cutoff (float): The positive correlation cutoff.
+        neg_cutoff (float): The negative correlation cutoff.
+        p_val_cutoff (float): The p-value cutoff.
+        association (str): 'spearman' or a compositional method.
+        n_bootstraps (int): Null datasets of a compositional method.
+        permutations (int, optional): Maximum permutations of the edge test.
+        permutation_alpha (float): Significance level of its early stop.
+        permutation_confidence (float): Confidence of its early stop.
+
+    Returns:
+        Dict: Network results of the factor, None if there is no data.
+    """
+    # same filtering as split_taxonomic_data_pivoted
+    split = split_taxonomic_data_pivoted(df, {factor: df.columns.tolist()})
+    if factor not in split:
+        return None
+    if association == "spearman":
+        correlation = spearman_from_taxonomy(split)[factor]
+    else:
+        # the factors already run in parallel processes
+        correlation = compositional_from_taxonomy(
+            split, method=association, n_bootstraps=n_bootstraps, workers=1
+        )[factor]
+    if permutations is not None:
+        # a new dictionary, the memoised correlations are not modified
+        correlation = dict(
+            correlation,
+            p_vals=permutation_edge_test(
+                split[factor],
+                correlation["correlation"],
+                pos_cutoff=pos_cutoff,
+                neg_cutoff=neg_cutoff,
+                max_permutations=permutations,
+                alpha=permutation_alpha,
+                confidence=permutation_confidence,
+                workers=1,
+            ),
+        )
+    del split
+    p_vals_fdr = fdr_pvals(correlation["p_vals"], p_val_cutoff)
+    return _interaction_graph_summary(
+        factor,
+        correlation["correlation"],
+        p_vals_fdr,
+        pos_cutoff=pos_cutoff,
+        neg_cutoff=neg_cutoff,
+        p_val_cutoff=p_val_cutoff,
+    )
+
+
+def _estimate_factor_memory_gb(n_taxa: int) -> float:
+    """
+    Rough peak memory of one factor: correlation, p-values, FDR p-values and the
+    upper triangle copies, all dense float64 n_taxa x n_taxa matrices.
+    """
+    return 6 * 8 * n_taxa**2 / 1e9
+
+
+###############
+# Persistence #
+###############
+def network_results_key(
+    data: Union[pd.DataFrame, Dict],
+    pos_cutoff: float = 0.5,
+    neg_cutoff: float = -0.5,
+    p_val_cutoff: float = 0.05,
+) -> str:
+    """
+    Content-addressed key of network results, derived from the input data and
+    the graph parameters.
+
+    Args:
+        data (Union[pd.DataFrame, Dict]): Input of the networks, e.g. the pivoted
+            taxonomy or the correlation data dictionary of `build_interaction_graphs`.
+        pos_cutoff (float): The positive correlation cutoff.
+        neg_cutoff (float): The negative correlation cutoff.
+        p_val_cutoff (float): The p-value cutoff.
+
+    Returns:
+        str: Hex digest identifying the results.
+    """
+    h = hashlib.sha1()
+    _update_hash(h, data)
+    h.update(repr((pos_cutoff, neg_cutoff, p_val_cutoff)).encode())
+    return h.hexdigest()
+
+
+def _update_hash(h, data) -> None:
+    """
+    Update a hashlib object with the content of DataFrames, nested dictionaries of
+    them or other objects with a stable repr.
+    """
+    if isinstance(data, dict):
+        for k in sorted(data, key=str):
+            h.update(repr(k).encode())
+            _update_hash(h, data[k])
+    elif isinstance(data, (pd.DataFrame, pd.Series)):
+        h.update(repr(data.shape).encode())
+        h.update(repr(list(data.index.names)).encode())
+        h.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+        if isinstance(data, pd.DataFrame):
+            h.update(repr(data.columns.tolist()).encode())
+    else:
+        h.update(repr(data).encode())
+
+
+def save_network_results(network_results: Dict, folder: str, key: str) -> str:
+    """
+    Write network results to `folder/key`: per factor a parquet table of nodes
+    (with degree), edges (with sign) and the centrality rankings, plus a JSON
+    index of factors and summary metrics.
+
+    Node names can be strings, numbers or tuples (MultiIndex taxonomy labels).
+
+    Args:
+        network_results (Dict): Network results, see `build_interaction_graphs`.
+        folder (str): Folder of the store.
+        key (str): Key of the results, see `network_results_key`.
+
+    Returns:
+        str: Path of the written results.
+    """
+    path = os.path.join(folder, key)
+    os.makedirs(path, exist_ok=True)
+
+    index = {"factors": []}
+    for i, (factor, result) in enumerate(network_results.items()):
+        G = result["graph"]
+        nodes = list(result["nodes"])
+        node_ids = {node: n for n, node in enumerate(nodes)}
+
+        nodes_df = _labels_to_frame(nodes)
+        nodes_df["degree"] = [G.degree(node) for node in nodes]
+
+        edges_df = pd.DataFrame(
+            [(node_ids[u], node_ids[v], 1) for u, v in result["edges_pos"]]
+            + [(node_ids[u], node_ids[v], -1) for u, v in result["edges_neg"]],
+            columns=["source", "target", "sign"],
+        )
+
+        centralities = [
+            (kind, node_ids[node], value)
+            for kind in ["degree_centrality", "top_betweenness", "bottom_betweenness"]
+            for node, value in result[kind]
+        ]
+        centrality_df = pd.DataFrame(centralities, columns=["kind", "node", "value"])
+
+        nodes_df.to_parquet(os.path.join(path, f"factor_{i}_nodes.parquet"))
+        edges_df.to_parquet(os.path.join(path, f"factor_{i}_edges.parquet"))
+        centrality_df.to_parquet(os.path.join(path, f"factor_{i}_centrality.parquet"))
+        index["factors"].append(
+            {
+                "factor": factor,
+                "node_is_tuple": bool(nodes) and isinstance(nodes[0], tuple),
+                "total_nodes": result["total_nodes"],
+                "total_edges": result["total_edges"],
+            }
+        )
+
+    with open(os.path.join(path, "index.json"), "w") as f:
+        json.dump(index, f, default=str)
+    return path
+
+
+def load_network_results(folder: str, key: str) -> Dict:
+    """
+    Load network results written by `save_network_results`.
+
+    Args:
+        folder (str): Folder of the store.
+        key (str): Key of the results, see `network_results_key`.
+
+    Returns:
+        Dict: Network results as returned by `build_interaction_graphs`, None if
+            the key is not in the store.
+    """
+    path = os.path.join(folder, key)
+    if not os.path.exists(os.path.join(path, "index.json")):
+        return None
+
+    with open(os.path.join(path, "index.json")) as f:
+        index = json.load(f)
+
+    network_results = {}
+    for i, entry in enumerate(index["factors"]):
+        factor = entry["factor"]
+        nodes_df = pd.read_parquet(os.path.join(path, f"factor_{i}_nodes.parquet"))
+        edges_df = pd.read_parquet(os.path.join(path, f"factor_{i}_edges.parquet"))
+        centrality_df = pd.read_parquet(
+            os.path.join(path, f"factor_{i}_centrality.parquet")
+        )
+
+        label_cols = [c for c in nodes_df.columns if c.startswith("node")]
+        if entry["node_is_tuple"]:
+            nodes = list(nodes_df[label_cols].itertuples(index=False, name=None))
+        else:
+            nodes = nodes_df[label_cols[0]].tolist()
+
+        source = [nodes[n] for n in edges_df["source"]]
+        target = [nodes[n] for n in edges_df["target"]]
+        positive = (edges_df["sign"] > 0).tolist()
+        edges_pos = [(u, v) for u, v, p in zip(source, target, positive) if p]
+        edges_neg = [(u, v) for u, v, p in zip(source, target, positive) if not p]
+
+        G = nx.Graph(mode=factor)
         G.add_nodes_from(nodes)
         G.add_edges_from(edges_pos, color="green")
         G.add_edges_from(edges_neg, color="red")
 
-        network_results[factor] = {
+        result = {
             "graph": G,
             "nodes": nodes,
             "edges_pos": edges_pos,
             "edges_neg": edges_neg,
         }
+        for kind, df in centrality_df.groupby("kind", sort=False):
+            result[kind] = [(nodes[n], v) for n, v in zip(df["node"], df["value"])]
+        for kind in ["degree_centrality", "top_betweenness", "bottom_betweenness"]:
+            result.setdefault(kind, [])
+        result["total_nodes"] = entry["total_nodes"]
+        result["total_edges"] = entry["total_edges"]
+        network_results[factor] = result
+
+    return network_results
 
-        degree_centrality = nx.degree_centrality(G)
 
-        network_results[factor]["degree_centrality"] = sorted(
-            degree_centrality.items(), key=lambda x: x[1], reverse=True
-        )[:10]
+def cached_interaction_graphs(
+    correlation_data: dict,
+    folder: str,
+    pos_cutoff: float = 0.5,
+    neg_cutoff: float = -0.5,
+    p_val_cutoff: float = 0.05,
+) -> Dict:
+    """
+    `build_interaction_graphs` backed by a persistent store in `folder`. Results
+    are loaded if the same correlation data and parameters were computed before,
+    otherwise they are built and saved.
 
-        betweenness = nx.betweenness_centrality(G)
+    Args:
+        correlation_data (dict): A dictionary containing correlation data for different factors.
+        folder (str): Folder of the store.
+        pos_cutoff (float): The positive correlation cutoff.
+        neg_cutoff (float): The negative correlation cutoff.
+        p_val_cutoff (float): The p-value cutoff.
 
-        network_results[factor]["top_betweenness"] = sorted(
-            betweenness.items(), key=lambda x: x[1], reverse=True
-        )[:10]
-        network_results[factor]["bottom_betweenness"] = sorted(
-            betweenness.items(), key=lambda x: x[1]
-        )[:10]
-        network_results[factor]["total_nodes"] = G.number_of_nodes()
-        network_results[factor]["total_edges"] = G.number_of_edges()
+    Returns:
+        Dict: A dictionary containing network results for each factor.
+    """
+    key = network_results_key(correlation_data, pos_cutoff, neg_cutoff, p_val_cutoff)
+    network_results = load_network_results(folder, key)
+    if network_results is not None:
+        logger.info(f"Loaded network results {key} from {folder}.")
+        return network_results
 
+    network_results = build_interaction_graphs(
+        correlation_data,
+        pos_cutoff=pos_cutoff,
+        neg_cutoff=neg_cutoff,
+        p_val_cutoff=p_val_cutoff,
+    )
+    save_network_results(network_results, folder, key)
     return network_results
+
+
+def _labels_to_frame(nodes: List) -> pd.DataFrame:
+    """
+    Node labels as a DataFrame, one 'node_<level>' column per tuple level or a
+    single 'node' column.
+    """
+    if nodes and isinstance(nodes[0], tuple):
+        return pd.DataFrame(
+            nodes, columns=[f"node_{k}" for k in range(len(nodes[0]))]
+        )
+    return pd.DataFrame({"node": nodes})
+
+
+##########
+# Layout #
+##########
+def graph_hash(G: nx.Graph) -> str:
+    """
+    Hash of the graph structure (nodes and edges, not attributes), used as a
+    cache key for the layouts. Nodes are hashed with their type, so e.g. the
+    nodes 1 and "1" differ.
+
+    Args:
+        G (nx.Graph): The graph to hash.
+
+    Returns:
+        str: Hex digest of the graph structure.
+    """
+    def token(node) -> str:
+        return repr((type(node).__name__, node))
+
+    nodes = sorted(map(token, G.nodes()))
+    edges = sorted(tuple(sorted(map(token, e))) for e in G.edges())
+    h = hashlib.sha1()
+    h.update(repr(nodes).encode())
+    h.update(repr(edges).encode())
+    return h.hexdigest()
+
+
+@profiled
+def graph_layout(
+    G: nx.Graph, method: str = "auto", seed: int = 42, iterations: int = 50
+) -> Dict:
+    """
+    Compute node positions of a graph, cached per graph structure and parameters,
+    so repeated plotting of the same network does not recompute the layout.
+
+    Methods:
+
+    - **spring**: `networkx` Fruchterman-Reingold, O(n^2) per iteration, small graphs only.
+    - **spectral**: `networkx` spectral layout, sparse eigensolver for large graphs.
+    - **fr_grid**: `igraph` Fruchterman-Reingold with grid approximation of the
+      repulsive forces, which scales to 10k+ nodes (requires `igraph`).
+    - **auto**: 'spring' up to `LARGE_NETWORK_NODES` nodes, otherwise 'fr_grid' if
+      `igraph` is installed, 'spectral' if not.
+
+    Args:
+        G (nx.Graph): The graph to lay out.
+        method (str): Layout method, see above. Defaults to "auto".
+        seed (int): Random seed for the initial positions. Defaults to 42.
+        iterations (int): Number of iterations of the 'spring' layout. Defaults to 50.
+
+    Returns:
+        Dict: Dictionary of node to position array (x, y), a copy of the cached one.
+
+    Raises:
+        ValueError: If the layout method is not supported.
+    """
+    if method == "auto":
+        method = "spring"
+        if G.number_of_nodes() > LARGE_NETWORK_NODES:
+            try:
+                import igraph  # noqa
+
+                method = "fr_grid"
+            except ImportError:
+                method = "spectral"
+        logger.debug(f"Using '{method}' layout for {G.number_of_nodes()} nodes.")
+
+    key = f"{method}:{seed}:{iterations}:{graph_hash(G)}"
+    if key in _layout_cache:
+        return _copy_layout(_layout_cache[key])
+
+    if method == "spring":
+        pos = nx.spring_layout(G, k=0.2, iterations=iterations, seed=seed)
+    elif method == "spectral":
+        pos = nx.spectral_layout(G)
+    elif method == "fr_grid":
+        pos = _igraph_fr_layout(G, seed=seed)
+    else:
+        raise ValueError(f"Layout method '{method}' is not supported.")
+
+    if len(_layout_cache) >= LAYOUT_CACHE_SIZE:
+        # drop the oldest layout
+        _layout_cache.pop(next(iter(_layout_cache)))
+    _layout_cache[key] = pos
+    return _copy_layout(pos)
+
+
+def clear_layout_cache() -> None:
+    """
+    Remove all layouts cached by `graph_layout`.
+    """
+    _layout_cache.clear()
+
+
+def _copy_layout(pos: Dict) -> Dict:
+    """Copy of a layout, so callers cannot move the nodes of the cached one."""
+    return {node: np.array(xy, copy=True) for node, xy in pos.items()}
+
+
+def _igraph_fr_layout(G: nx.Graph, seed: int = 42) -> Dict:
+    """
+    Grid-approximated Fruchterman-Reingold layout computed by igraph.
+
+    Args:
+        G (nx.Graph): The graph to lay out.
+        seed (int): Random seed for the initial positions.
+
+    Returns:
+        Dict: Dictionary of node to position array (x, y), rescaled to [-1, 1].
+    """
+    try:
+        import igraph
+    except ImportError as e:
+        raise ImportError(
+            "The 'fr_grid' layout requires igraph, install it with "
+            "'pip install marine-omics[igraph]'."
+        ) from e
+
+    nodes = list(G.nodes())
+    if not nodes:
+        return {}
+    index = {node: i for i, node in enumerate(nodes)}
+    ig = igraph.Graph(
+        n=len(nodes), edges=[(index[u], index[v]) for u, v in G.edges()]
+    )
+    # igraph takes the initial positions as its 'seed', spread over the same
+    # sqrt(n) extent as its own random start, so that the grid cells are populated evenly
+    half_width = np.sqrt(len(nodes)) / 2
+    init = np.random.default_rng(seed).uniform(
+        -half_width, half_width, size=(len(nodes), 2)
+    )
+    coords = ig.layout_fruchterman_reingold(seed=init.tolist(), grid=True)
+    coords = nx.rescale_layout(np.asarray(coords.coords, dtype=float))
+    return dict(zip(nodes, coords))
@@ -1,7 +1,6 @@
 import os
 import panel as pn
 from typing import List, Tuple
-from pyngrok import ngrok
 import pandas as pd
 from IPython import get_ipython
 
@@ -23,6 +22,8 @@ def serve_app(template, env, name="panel app"):
     )
 
     if "google.colab" in str(get_ipython()) or env == "vscode":
+        from pyngrok import ngrok
+
         # server=pn.serve({"": template}, port=4040, address="127.0.0.1", threaded=True, websocket_origin="*")
         os.system(f"curl http://localhost:{port}")
 
@@ -51,6 +52,8 @@ def serve_app(template, env, name="panel app"):
 def close_server(server, env):
     server.stop()
     if "google.colab" in str(get_ipython()) or env == "vscode":
+        from pyngrok import ngrok
+
         ngrok.disconnect(server)
         ngrok.kill()
 
@@ -0,0 +1,292 @@
+"""
+Headless batch pipeline of the taxonomy analyses, which precomputes the results
+shown in the dashboards from local parquet files.
+
+For each taxonomy table (LSU/SSU) the pipeline runs load -> preprocess -> pivot
+-> normalise -> alpha/beta/PCoA -> correlation network and writes the outputs to
+`<output>/<table>/`:
+
+- `pivot/` and `normalized/`: abundance matrices, see `momics.loader.matrices`.
+- `alpha.parquet`: Shannon index per sample.
+- `beta.parquet`: Bray-Curtis distances between samples.
+- `pcoa.parquet`: PCoA coordinates with the proportion explained in `manifest.json`.
+- `network/`: network results per factor value, see `momics.networks.save_network_results`.
+
+and a `manifest.json` with the configuration, the files and timing of each step.
+Tables are processed in parallel processes. Use `load_pipeline_results` to read
+the outputs back.
+"""
+
+import os
+import json
+import time
+import logging
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from momics.constants import TAXONOMY_RANKS
+
+# logger setup
+FORMAT = "%(levelname)s | %(name)s | %(message)s"
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(__name__)
+
+PIPELINE_STEPS = ["alpha", "beta", "pcoa", "network"]
+
+PIPELINE_DEFAULTS = {
+    "tables": ["ssu", "lsu"],
+    "steps": PIPELINE_STEPS,
+    "high_taxon": "None",
+    "mapping": False,
+    "prevalence_cutoff": 10,
+    "normalize": "tss_sqrt",
+    "backend": "pandas",
+    "pcoa_method": "eigh",
+    "pcoa_dimensions": None,
+    "factor": None,
+    "pos_cutoff": 0.5,
+    "neg_cutoff": -0.5,
+    "p_val_cutoff": 0.05,
+}
+
+
+def pipeline_config(config: Dict = None, path: str = None) -> Dict:
+    """
+    Pipeline configuration from the defaults, a JSON file and a dictionary, in the
+    order of increasing priority.
+
+    Args:
+        config (Dict, optional): Configuration values.
+        path (str, optional): JSON file with configuration values.
+
+    Returns:
+        Dict: The full configuration.
+
+    Raises:
+        ValueError: If a key or step is unknown, or the network step has no factor.
+    """
+    out = dict(PIPELINE_DEFAULTS)
+    if path is not None:
+        with open(path) as f:
+            out.update(json.load(f))
+    if config is not None:
+        out.update({k: v for k, v in config.items() if v is not None})
+
+    unknown = set(out) - set(PIPELINE_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown configuration keys: {sorted(unknown)}")
+    unknown = set(out["steps"]) - set(PIPELINE_STEPS)
+    if unknown:
+        raise ValueError(f"Unknown pipeline steps: {sorted(unknown)}")
+    if "network" in out["steps"] and out["factor"] is None:
+        raise ValueError("The network step needs a metadata factor.")
+    return out
+
+
+def load_metadata_file(path: str) -> pd.DataFrame:
+    """
+    Load a logsheet metadata table from CSV or parquet, indexed by `ref_code`.
+
+    Args:
+        path (str): The metadata file.
+
+    Returns:
+        pd.DataFrame: The metadata.
+    """
+    if path.endswith(".parquet"):
+        metadata = pd.read_parquet(path)
+    else:
+        metadata = pd.read_csv(path)
+    if "ref_code" in metadata.columns:
+        metadata = metadata.set_index("ref_code")
+    return metadata
+
+
+def run_pipeline(
+    input_folder: str,
+    output_folder: str,
+    metadata: pd.DataFrame = None,
+    config: Dict = None,
+    workers: int = None,
+) -> Dict:
+    """
+    Run the pipeline over the taxonomy tables in `input_folder`.
+
+    Args:
+        input_folder (str): Folder of the parquet files, see `momics.loader.load_parquets`.
+        output_folder (str): Folder of the results, created if missing.
+        metadata (pd.DataFrame, optional): Metadata indexed by `ref_code`, needed
+            for the network step.
+        config (Dict, optional): Configuration, see `pipeline_config`.
+        workers (int, optional): Number of processes, one table per process.
+            Defaults to None, which uses one per table. 1 runs in the current process.
+
+    Returns:
+        Dict: The manifests of the processed tables.
+
+    Raises:
+        ValueError: If a configured table is not in the input folder.
+    """
+    from momics.loader import load_parquets
+
+    config = pipeline_config(config)
+    tables = load_parquets(input_folder)
+    missing = set(config["tables"]) - set(tables)
+    if missing:
+        raise ValueError(f"Tables not found in {input_folder}: {sorted(missing)}")
+    os.makedirs(output_folder, exist_ok=True)
+
+    jobs = [
+        (name, tables[name], metadata, config, os.path.join(output_folder, name))
+        for name in config["tables"]
+    ]
+    workers = len(jobs) if workers is None else min(workers, len(jobs))
+    if workers <= 1:
+        manifests = [_run_table(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            manifests = list(executor.map(_run_table, *zip(*jobs)))
+
+    manifest = {name: m for name, m in zip(config["tables"], manifests)}
+    with open(os.path.join(output_folder, "manifest.json"), "w") as f:
+        json.dump({"config": config, "tables": manifest}, f, indent=2)
+    return manifest
+
+
+def _run_table(
+    name: str,
+    df: pd.DataFrame,
+    metadata: pd.DataFrame,
+    config: Dict,
+    folder: str,
+) -> Dict:
+    """Run the pipeline steps for one taxonomy table and save the outputs."""
+    from momics.diversity import calculate_shannon_index, pcoa_parametrized
+    from momics.loader.matrices import save_abundance_matrix
+    from momics.networks import interaction_network_pipeline, save_network_results
+    from momics.taxonomy import compute_bray_curtis, normalize_abundance
+    from momics.utils import taxonomy_common_preprocess01
+
+    os.makedirs(folder, exist_ok=True)
+    manifest = {"files": {}, "timings": {}}
+
+    def timed(step, func, *args, **kwargs):
+        start = time.perf_counter()
+        out = func(*args, **kwargs)
+        manifest["timings"][step] = time.perf_counter() - start
+        logger.info(f"{name}: {step} took {manifest['timings'][step]:.2f} s")
+        return out
+
+    if "ref_code" in df.columns:
+        df = df.set_index("ref_code")
+    pivot = timed(
+        "preprocess",
+        taxonomy_common_preprocess01,
+        df,
+        config["high_taxon"],
+        config["mapping"],
+        config["prevalence_cutoff"],
+        TAXONOMY_RANKS,
+        pivot=True,
+        backend=config["backend"],
+    )
+    save_abundance_matrix(pivot, os.path.join(folder, "pivot"))
+    manifest["files"]["pivot"] = "pivot"
+
+    normalized = timed("normalize", normalize_abundance, pivot, method=config["normalize"])
+    save_abundance_matrix(normalized, os.path.join(folder, "normalized"))
+    manifest["files"]["normalized"] = "normalized"
+
+    steps = config["steps"]
+    if "alpha" in steps:
+        alpha = timed("alpha", calculate_shannon_index, pivot.T).to_frame("Shannon")
+        alpha.to_parquet(os.path.join(folder, "alpha.parquet"))
+        manifest["files"]["alpha"] = "alpha.parquet"
+
+    if "beta" in steps or "pcoa" in steps:
+        beta = timed("beta", compute_bray_curtis, normalized)
+        beta.to_parquet(os.path.join(folder, "beta.parquet"))
+        manifest["files"]["beta"] = "beta.parquet"
+
+    if "pcoa" in steps:
+        import skbio
+
+        result = timed(
+            "pcoa",
+            pcoa_parametrized,
+            skbio.DistanceMatrix(beta.values, ids=beta.index),
+            method=config["pcoa_method"],
+            dimensions=config["pcoa_dimensions"],
+        )
+        result.samples.to_parquet(os.path.join(folder, "pcoa.parquet"))
+        manifest["files"]["pcoa"] = "pcoa.parquet"
+        manifest["proportion_explained"] = result.proportion_explained.tolist()
+
+    if "network" in steps:
+        if metadata is None:
+            raise ValueError("The network step needs the metadata.")
+        groups = _factor_groups(metadata, config["factor"], normalized.columns)
+        # the tables already run in parallel processes
+        network_results = timed(
+            "network",
+            interaction_network_pipeline,
+            normalized,
+            groups,
+            pos_cutoff=config["pos_cutoff"],
+            neg_cutoff=config["neg_cutoff"],
+            p_val_cutoff=config["p_val_cutoff"],
+            max_workers=1,
+        )
+        save_network_results(network_results, folder, "network")
+        manifest["files"]["network"] = "network"
+
+    with open(os.path.join(folder, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _factor_groups(
+    metadata: pd.DataFrame, factor: str, samples: pd.Index
+) -> Dict[str, List[str]]:
+    """Samples of each value of a metadata factor, in the order of `samples`."""
+    if factor not in metadata.columns:
+        raise ValueError(f"Factor '{factor}' not found in the metadata.")
+    values = metadata[factor].reindex(samples)
+    return {
+        str(value): list(group.index)
+        for value, group in values.groupby(values, sort=True)
+    }
+
+
+def load_pipeline_results(folder: str, table: str) -> Dict:
+    """
+    Load the outputs of `run_pipeline` for one table.
+
+    Abundance matrices are memory-mapped, so the loading is instant and several
+    dashboard sessions share one copy.
+
+    Args:
+        folder (str): Output folder of `run_pipeline`.
+        table (str): Name of the taxonomy table, e.g. 'ssu'.
+
+    Returns:
+        Dict: The outputs keyed by step name and the table manifest under 'manifest'.
+    """
+    from momics.loader.matrices import load_abundance_matrix
+    from momics.networks import load_network_results
+
+    table_folder = os.path.join(folder, table)
+    with open(os.path.join(table_folder, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    out = {"manifest": manifest}
+    for step, file_name in manifest["files"].items():
+        path = os.path.join(table_folder, file_name)
+        if step in ["pivot", "normalized"]:
+            out[step] = load_abundance_matrix(path).to_frame()
+        elif step == "network":
+            out[step] = load_network_results(table_folder, file_name)
+        else:
+            out[step] = pd.read_parquet(path)
+    return out
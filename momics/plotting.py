@@ -4,6 +4,14 @@ Constants
 ---------
 - PLOT_FACE_COLOR : str
     The face color for the plot.
+- HEATMAP_MAX_TILES : int
+    Default resolution of the rasterized beta diversity heatmap.
+- PCOA_RASTERIZE_THRESHOLD : int
+    Number of samples above which PCoA plots are rasterized.
+- PCOA_HOVER_SAMPLES : int
+    Number of samples keeping hover in rasterized PCoA plots.
+- NETWORK_RASTERIZE_EDGES : int
+    Number of edges above which network edges are rasterized.
 
 TODO:
 - Returns should be plt.figure and not pn.pane.Matplotlib, as already implemented for beta_plot_pc() function.
@@ -23,21 +31,29 @@ import plotly.graph_objects as go
 import holoviews as hv
 import hvplot.pandas  # noqa
 
+from scipy.cluster.hierarchy import leaves_list, linkage
+from scipy.spatial.distance import squareform
 from skbio.diversity import beta_diversity
 from bokeh.models import CategoricalColorMapper, ContinuousColorMapper, LogColorMapper
 from bokeh.palettes import Category20, viridis
 
-from skbio.stats.ordination import pcoa
 from .diversity import (
     alpha_diversity_parametrized,
     beta_diversity_parametrized,
+    pcoa_parametrized,
 )
+from .networks import graph_layout
+from .profiling import profiled
 from .utils import (
     check_index_names,
 )
 
 PLOT_FACE_COLOR = "#e6e6e6"
 MARKER_SIZE = 16
+HEATMAP_MAX_TILES = 500
+PCOA_RASTERIZE_THRESHOLD = 5000
+PCOA_HOVER_SAMPLES = 1000
+NETWORK_RASTERIZE_EDGES = 20000
 
 # logger setup
 FORMAT = "%(levelname)s | %(name)s | %(message)s"
@@ -48,20 +64,83 @@ logger = logging.getLogger(__name__)
 ##########
 # HVplot #
 ##########
+@profiled
 def hvplot_heatmap(
-    df: pd.DataFrame, taxon: str, norm: bool = False
-) -> hv.element.HeatMap:
+    df: pd.DataFrame,
+    taxon: str,
+    norm: bool = False,
+    cluster: bool = False,
+    max_tiles: int = None,
+    rasterize: bool = False,
+) -> Union[hv.element.HeatMap, hv.DynamicMap]:
     """
     Creates a heatmap plot for beta diversity using hvplot.
 
+    For large sample sets, the full matrix does not need to be sent to the browser:
+
+    - **cluster**: samples are reordered by hierarchical clustering leaf order,
+      so that similar samples form blocks.
+    - **max_tiles**: the matrix is averaged into at most `max_tiles` x `max_tiles`
+      tiles before plotting, see `tile_distance_matrix`.
+    - **rasterize**: the matrix is rendered as a datashader rasterized image
+      (requires `datashader`), which is re-aggregated on zoom, so that zooming
+      into a region shows it at full resolution. `max_tiles` sets the
+      rasterization resolution in this case.
+
     Args:
         df (pd.DataFrame): DataFrame containing beta diversity distances.
         taxon (str): The taxon level for beta diversity calculation.
         norm (bool): Whether to normalize the data.
+        cluster (bool): Whether to order samples by hierarchical clustering.
+        max_tiles (int, optional): Maximum number of tiles per axis. Defaults to None,
+            which plots every sample.
+        rasterize (bool): Whether to rasterize the heatmap with datashader.
 
     Returns:
-        hv.element.HeatMap: A heatmap plot of beta diversity.
+        Union[hv.element.HeatMap, hv.DynamicMap]: A heatmap plot of beta diversity,
+            a DynamicMap if rasterized.
     """
+    if cluster:
+        df = cluster_order_distance_matrix(df)
+
+    clim = (0, 1.0) if norm else (df.min().min(), df.max().max())
+
+    if rasterize:
+        try:
+            from holoviews.operation.datashader import rasterize as hv_rasterize
+        except ImportError as e:
+            raise ImportError(
+                "Rasterized heatmaps require datashader, install it with "
+                "'pip install marine-omics[datashader]'."
+            ) from e
+
+        n = df.shape[0]
+        # samples are on integer coordinates, y axis flipped to keep matrix layout
+        image = hv.Image(
+            df.values[::-1],
+            bounds=(0, 0, n, n),
+            kdims=["Sample", "Sample 2"],
+            vdims=["distance"],
+        )
+        resolution = max_tiles if max_tiles is not None else HEATMAP_MAX_TILES
+        heatmap = hv_rasterize(
+            image, width=resolution, height=resolution, aggregator="mean"
+        ).opts(
+            cmap="viridis",
+            colorbar=True,
+            xlabel="Sample",
+            ylabel="Sample",
+            title=f"Beta Diversity ({taxon})",
+            xaxis=None,
+            yaxis=None,
+            clim=clim,
+            tools=["hover"],
+        )
+        return heatmap
+
+    if max_tiles is not None and df.shape[0] > max_tiles:
+        df = tile_distance_matrix(df, max_tiles)
+
     # Create the heatmap using hvplot
     heatmap = df.hvplot.heatmap(
         cmap="viridis",
@@ -74,12 +153,7 @@ def hvplot_heatmap(
         yticks=0,  # remove yticks labels
         show_legend=False,  # hide legend
     )
-    if norm:
-        heatmap.opts(clim=(0, 1.0))  # Set color limits for normalization
-    else:
-        heatmap.opts(
-            clim=(df.min().min(), df.max().max())
-        )  # Set color limits based on data
+    heatmap.opts(clim=clim)
     return heatmap
 
 
@@ -175,145 +249,135 @@ def hvplot_average_per_factor(alpha: pd.DataFrame, factor: str) -> hv.element.Ba
     return fig
 
 
+@profiled
 def hvplot_plot_pcoa_black(
     pcoa_df: pd.DataFrame,
     color_by: str = None,
     explained_variance: Tuple[float, float] = None,
     **kwargs,
-) -> hv.element.Scatter:
+) -> Union[hv.element.Scatter, hv.DynamicMap]:
     """
     Plots a PCoA plot with optional coloring using hvplot.
 
+    Above `rasterize_threshold` samples, the points are rendered with datashader
+    (requires `datashader`) and the hover is kept only for a random subset of
+    `hover_samples` samples, overlaid on the rasterized image.
+
     Args:
         pcoa_df (pd.DataFrame): A DataFrame containing PCoA results.
         color_by (str, optional): The column name to color the points by. Defaults to None.
+        explained_variance (Tuple[float, float], optional): Explained variance of PC1 and PC2.
+        **kwargs: Optional arguments:
+
+            - log_scale (bool): Logarithmic color scale for numerical `color_by`. Defaults to False.
+            - palette (str): Palette for the logarithmic color scale. Defaults to "Turbo256".
+            - rasterize_threshold (int): Number of samples above which the plot is rasterized.
+              Defaults to `PCOA_RASTERIZE_THRESHOLD`.
+            - hover_samples (int): Number of samples keeping hover in the rasterized plot.
+              Defaults to `PCOA_HOVER_SAMPLES`.
 
     Returns:
-        hv.element.Scatter: The PCoA plot.
+        Union[hv.element.Scatter, hv.DynamicMap]: The PCoA plot, a DynamicMap overlay
+            if rasterized.
     """
     log_scale = kwargs.get('log_scale', False)
     palette = kwargs.get('palette', "Turbo256")
+    rasterize_threshold = kwargs.get("rasterize_threshold", PCOA_RASTERIZE_THRESHOLD)
+    hover_samples = kwargs.get("hover_samples", PCOA_HOVER_SAMPLES)
     index_name = pcoa_df.index.name if pcoa_df.index.name else "sample"
     pcoa_df = pcoa_df.reset_index(names=index_name)  # Ensure index is a column for hvplot
+    hover_cols = [index_name, "PC1", "PC2"]
 
+    color_column = None
+    color_palette = None
+    categories = None
     if color_by is None:
-        # No coloring specified, use black
-        fig = pcoa_df.hvplot.scatter(
-            x="PC1",
-            y="PC2",
-            color="black",
-            hover_cols=[index_name, "PC1", "PC2"],
-        )
-        valid_perc = 100.0
         title = "PCoA (no coloring applied)"
-        color_palette = None
     else:
         valid_perc = pcoa_df[color_by].count() / len(pcoa_df[color_by]) * 100
+        color_column = color_by
+        is_categorical = pcoa_df[color_by].dtype == "object"
         # Handle logarithmic scaling for continuous data
-        if log_scale and pcoa_df[color_by].dtype != "object":
+        if log_scale and not is_categorical:
             # Handle zeros and negative values for log scaling
-            color_data = pcoa_df[color_by].copy()
-            color_data = color_data.where(color_data > 0, 1e-2)
-
-            
-            # Update the DataFrame with processed data
-            pcoa_df[f'{color_by}_log'] = color_data
-            color_column = f'{color_by}_log'
-            
-            # Create logarithmic color mapper
+            color_data = pcoa_df[color_by].where(pcoa_df[color_by] > 0, 1e-2)
             if color_data.min() > 0:
-                color_mapper = LogColorMapper(
+                pcoa_df[f'{color_by}_log'] = color_data
+                color_column = f'{color_by}_log'
+                color_palette = LogColorMapper(
                     palette=palette,
                     low=color_data.min(),
                     high=color_data.max(),
-                )
+                ).palette
             else:
                 # Fallback to linear if log scaling fails
                 log_scale = False
-                color_column = color_by
                 logger.info(f"Warning: Cannot use log scale due to non-positive values. Falling back to linear scale.")
         else:
-            color_column = color_by
-        if not log_scale:  # Original logic for non-log scaling
-            if 2 < len(pcoa_df[color_by].unique()) <= 20:
-                if pcoa_df[color_by].dtype == "object":
-                    pal = Category20[
-                        len(pcoa_df[color_by].unique())
-                    ]  # Use the correct number of colors
-                    color_mapper = CategoricalColorMapper(
-                        factors=pcoa_df[color_by]
-                        .unique()
-                        .tolist(),  # Unique categories in the factor column
-                        palette=pal,
-                    )
+            log_scale = False
+
+        if not log_scale:
+            if is_categorical:
+                # categories and their palette are computed only once
+                categories = pcoa_df[color_by].unique().tolist()
+                if 2 < len(categories) <= 20:
+                    pal = Category20[len(categories)]
                 else:
-                    color_mapper = ContinuousColorMapper(
-                        palette="Turbo256",
-                        low=pcoa_df[color_by].min(),
-                        high=pcoa_df[color_by].max(),
-                    )
+                    pal = viridis(len(categories))
+                color_palette = CategoricalColorMapper(
+                    factors=categories,
+                    palette=pal,
+                ).palette
             else:
-                if pcoa_df[color_by].dtype == "object":
-                    pal = viridis(len(pcoa_df[color_by].unique()))
-                    color_mapper = CategoricalColorMapper(
-                        factors=pcoa_df[color_by]
-                        .unique()
-                        .tolist(),  # Unique categories in the factor column
-                        palette=pal,
-                    )
-                else:
-                    color_mapper = ContinuousColorMapper(
-                        palette="Turbo256",
-                        low=pcoa_df[color_by].min(),
-                        high=pcoa_df[color_by].max(),
-                    )
-
-        if pcoa_df[color_by].count() >= 0:
-            # Create the scatter plot using hvplot
-            hvplot_kwargs = {
-                "x": "PC1",
-                "y": "PC2",
-                "color": color_column if log_scale else color_by,
-                "hover_cols": [index_name, "PC1", "PC2"],
-            }
-            
-            # Add log-specific hvplot options
-            if log_scale and 'color_mapper' in locals():
-                hvplot_kwargs["logz"] = True
-                
-            fig = pcoa_df.hvplot.scatter(**hvplot_kwargs)
-        else:
-            fig = pcoa_df.hvplot.scatter(
-                x="PC1",
-                y="PC2",
-                color="black",  # Use black for coloring
-                hover_cols=[index_name, "PC1", "PC2"],
-            )
-        
+                color_palette = ContinuousColorMapper(
+                    palette="Turbo256",
+                    low=pcoa_df[color_by].min(),
+                    high=pcoa_df[color_by].max(),
+                ).palette
+
         # Update title to indicate log scale
         scale_info = " (log scale)" if log_scale else ""
         title = f"PCoA colored by {color_by}{scale_info}, valid values: ({valid_perc:.2f}%)"
 
-        if 'color_mapper' in locals():
-            color_palette = color_mapper.palette
-        else:
-            color_palette = None
-
     if explained_variance:
         var_perc = explained_variance[0] * 100, explained_variance[1] * 100
-        fig = fig.opts(
-            xlabel=f"PC1 ({var_perc[0]:.2f}%)",
-            ylabel=f"PC2 ({var_perc[1]:.2f}%)",
-        )
+        xlabel, ylabel = f"PC1 ({var_perc[0]:.2f}%)", f"PC2 ({var_perc[1]:.2f}%)"
     else:
-        fig = fig.opts(
-            xlabel="PC1",
-            ylabel="PC2",
-        )
-    
+        xlabel, ylabel = "PC1", "PC2"
+
     assert "PC1" in pcoa_df.columns, f"Missing 'PC1' column in PCoA DataFrame"
     assert "PC2" in pcoa_df.columns, f"Missing 'PC2' column in PCoA DataFrame"
 
+    if len(pcoa_df) > rasterize_threshold:
+        fig = _rasterized_pcoa(
+            pcoa_df,
+            color_column=color_column,
+            categories=categories,
+            color_palette=color_palette,
+            log_scale=log_scale,
+            hover_cols=hover_cols,
+            hover_samples=hover_samples,
+        )
+        return fig.opts(
+            title=title,
+            xlabel=xlabel,
+            ylabel=ylabel,
+            show_legend=False,
+        )
+
+    # Create the scatter plot using hvplot
+    hvplot_kwargs = {
+        "x": "PC1",
+        "y": "PC2",
+        "color": "black" if color_column is None else color_column,
+        "hover_cols": hover_cols,
+    }
+    # Add log-specific hvplot options
+    if log_scale:
+        hvplot_kwargs["logz"] = True
+    fig = pcoa_df.hvplot.scatter(**hvplot_kwargs)
+    fig = fig.opts(xlabel=xlabel, ylabel=ylabel)
+
     opts = {
         "title": title,
         "size": MARKER_SIZE,
@@ -321,18 +385,85 @@ def hvplot_plot_pcoa_black(
         "show_legend": False,
         "backend_opts": {"plot.toolbar.autohide": True},
     }
-    
+
     # Add log-specific options
     if log_scale:
         opts["logz"] = True
-    
+
     if color_palette is not None:
         opts["cmap"] = color_palette
-    
+
     fig = fig.opts(**opts)
     return fig
 
 
+def _rasterized_pcoa(
+    pcoa_df: pd.DataFrame,
+    color_column: str,
+    categories: List,
+    color_palette: List[str],
+    log_scale: bool,
+    hover_cols: List[str],
+    hover_samples: int,
+) -> hv.DynamicMap:
+    """
+    Renders PCoA points with datashader and overlays a sampled subset with hover.
+
+    Args:
+        pcoa_df (pd.DataFrame): PCoA results with the sample index as a column.
+        color_column (str): Column to color by, or None for black points.
+        categories (List): Categories of a categorical `color_column`, None if numerical.
+        color_palette (List[str]): Palette matching the categories or the numerical scale.
+        log_scale (bool): Whether the numerical color scale is logarithmic.
+        hover_cols (List[str]): Columns shown on hover.
+        hover_samples (int): Number of randomly sampled points keeping hover.
+
+    Returns:
+        hv.DynamicMap: Rasterized points overlaid with the hover subset.
+    """
+    try:
+        import datashader as ds
+        from holoviews.operation.datashader import datashade, dynspread, rasterize
+    except ImportError as e:
+        raise ImportError(
+            "Rasterized PCoA plots require datashader, install it with "
+            "'pip install marine-omics[datashader]'."
+        ) from e
+
+    vdims = [] if color_column is None else [color_column]
+    if categories is not None:
+        pcoa_df = pcoa_df.assign(**{color_column: pcoa_df[color_column].astype("category")})
+    points = hv.Points(pcoa_df, kdims=["PC1", "PC2"], vdims=vdims)
+
+    if color_column is None:
+        raster = dynspread(datashade(points, cmap=["black"]))
+    elif categories is not None:
+        color_key = {
+            cat: col for cat, col in zip(categories, color_palette) if not pd.isna(cat)
+        }
+        raster = dynspread(
+            datashade(points, aggregator=ds.count_cat(color_column), color_key=color_key)
+        )
+    else:
+        raster = dynspread(
+            rasterize(points, aggregator=ds.mean(color_column))
+        ).opts(cmap=color_palette, colorbar=True, logz=log_scale)
+
+    subset = pcoa_df.sample(n=min(hover_samples, len(pcoa_df)), random_state=42)
+    hover = subset.hvplot.scatter(
+        x="PC1",
+        y="PC2",
+        hover_cols=hover_cols + vdims,
+    ).opts(
+        color="black",
+        size=MARKER_SIZE // 2,
+        fill_alpha=0.0,
+        line_alpha=0.3,
+        tools=["hover"],
+    )
+    return raster * hover
+
+
 ##############
 # Matplotlib #
 ##############
@@ -704,6 +835,9 @@ def beta_plot(
     norm: bool,
     taxon: str = "ncbi_tax_id",
     backend: str = "hvplot",  # Options: "matplotlib" or "hvplot"
+    cluster: bool = False,
+    max_tiles: int = None,
+    rasterize: bool = False,
 ) -> Union[pn.pane.Matplotlib, pn.pane.HoloViews]:
     """
     Creates a beta diversity heatmap plot.
@@ -714,6 +848,9 @@ def beta_plot(
         taxon (str, optional): The taxon level for beta diversity calculation. Defaults to "ncbi_tax_id".
         norm (bool): Whether to normalize the data.
         backend (str): The plotting backend to use. Can be "matplotlib" or "hvplot".
+        cluster (bool): Whether to order samples by hierarchical clustering.
+        max_tiles (int, optional): Maximum number of heatmap tiles per axis. Defaults to None.
+        rasterize (bool): Whether to rasterize the heatmap, "hvplot" backend only.
 
     Returns:
         Union[pn.pane.Matplotlib, pn.pane.HoloViews]: A pane containing the beta diversity heatmap plot.
@@ -724,13 +861,26 @@ def beta_plot(
 
     if backend == "matplotlib":
         fig = pn.pane.Matplotlib(
-            mpl_plot_heatmap(beta.to_data_frame(), taxon=taxon, norm=norm),
+            mpl_plot_heatmap(
+                beta.to_data_frame(),
+                taxon=taxon,
+                norm=norm,
+                cluster=cluster,
+                max_tiles=max_tiles,
+            ),
             sizing_mode="stretch_both",
             name="Beta div",
         )
     elif backend == "hvplot":
         fig = pn.pane.HoloViews(
-            hvplot_heatmap(beta.to_data_frame(), taxon=taxon, norm=norm),
+            hvplot_heatmap(
+                beta.to_data_frame(),
+                taxon=taxon,
+                norm=norm,
+                cluster=cluster,
+                max_tiles=max_tiles,
+                rasterize=rasterize,
+            ),
             sizing_mode="stretch_both",
             name="Beta div",
         )
@@ -745,6 +895,8 @@ def beta_plot_pc(
     table_name: str,
     factor: str,
     taxon: str = "ncbi_tax_id",
+    method: str = "eigh",
+    dimensions: int = None,
 ) -> Tuple[hv.element.Scatter, Tuple[float, float]]:
     """
     Creates a beta diversity PCoA plot.
@@ -755,6 +907,9 @@ def beta_plot_pc(
         table_name (str): The name of the table to process.
         factor (str): The column name to color the points by.
         taxon (str, optional): The taxon level for beta diversity calculation. Defaults to "ncbi_tax_id".
+        method (str, optional): PCoA eigensolver, 'eigh' or the truncated 'fsvd'. Defaults to "eigh".
+        dimensions (int, optional): Number of PCoA axes to compute, see
+            `momics.diversity.pcoa_parametrized`. Defaults to None.
 
     Returns:
         Tuple[hv.element.Scatter, Tuple[float, float]]: A tuple containing the beta diversity PCoA plot and the explained variance for PC1 and PC2.
@@ -762,7 +917,7 @@ def beta_plot_pc(
     beta = beta_diversity_parametrized(
         tables_dict[table_name], taxon=taxon, metric="braycurtis"
     )
-    pcoa_result = pcoa(beta, method="eigh")
+    pcoa_result = pcoa_parametrized(beta, method=method, dimensions=dimensions)
     explained_variance = (
         pcoa_result.proportion_explained[0],
         pcoa_result.proportion_explained[1],
@@ -789,6 +944,8 @@ def beta_plot_pc_granular(
     filtered_data: pd.DataFrame,
     metadata: pd.DataFrame,
     factor: str,
+    method: str = "eigh",
+    dimensions: int = None,
 ) -> Tuple[hv.element.Scatter, Tuple[float, float]]:
     """
     Creates a beta diversity PCoA plot.
@@ -799,13 +956,16 @@ def beta_plot_pc_granular(
         table_name (str): The name of the table to process.
         factor (str): The column name to color the points by.
         taxon (str, optional): The taxon level for beta diversity calculation. Defaults to "ncbi_tax_id".
+        method (str, optional): PCoA eigensolver, 'eigh' or the truncated 'fsvd'. Defaults to "eigh".
+        dimensions (int, optional): Number of PCoA axes to compute, see
+            `momics.diversity.pcoa_parametrized`. Defaults to None.
 
     Returns:
         Tuple[plt.figure, float]: A tuple containing the beta diversity PCoA plot and the explained variance.
     """
     # beta = beta_diversity("braycurtis", filtered_data.iloc[:, 1:].T)
     beta = beta_diversity("braycurtis", filtered_data.T)
-    pcoa_result = pcoa(beta, method="eigh")  # , number_of_dimensions=3)
+    pcoa_result = pcoa_parametrized(beta, method=method, dimensions=dimensions)
     explained_variance = (
         pcoa_result.proportion_explained[0],
         pcoa_result.proportion_explained[1],
@@ -832,7 +992,13 @@ def beta_plot_pc_granular(
     )
 
 
-def mpl_plot_heatmap(df: pd.DataFrame, taxon: str, norm=False) -> plt.Figure:
+def mpl_plot_heatmap(
+    df: pd.DataFrame,
+    taxon: str,
+    norm=False,
+    cluster: bool = False,
+    max_tiles: int = None,
+) -> plt.Figure:
     """
     Creates a heatmap plot for beta diversity.
 
@@ -840,10 +1006,18 @@ def mpl_plot_heatmap(df: pd.DataFrame, taxon: str, norm=False) -> plt.Figure:
         df (pd.DataFrame): A DataFrame containing beta diversity distances.
         taxon (str): The taxon level for beta diversity calculation.
         norm (bool): Whether to normalize the data.
+        cluster (bool): Whether to order samples by hierarchical clustering.
+        max_tiles (int, optional): Maximum number of tiles per axis, larger matrices
+            are averaged into tiles, see `tile_distance_matrix`. Defaults to None.
 
     Returns:
         plt.Figure: The heatmap plot.
     """
+    if cluster:
+        df = cluster_order_distance_matrix(df)
+    if max_tiles is not None and df.shape[0] > max_tiles:
+        df = tile_distance_matrix(df, max_tiles)
+
     fig = plt.figure(figsize=(10, 6), facecolor=(0, 0, 0, 0))
     fig.patch.set_facecolor(PLOT_FACE_COLOR)
     _ = fig.add_subplot(111)
@@ -860,6 +1034,57 @@ def mpl_plot_heatmap(df: pd.DataFrame, taxon: str, norm=False) -> plt.Figure:
 ####################
 # Helper functions #
 ####################
+def cluster_order_distance_matrix(
+    df: pd.DataFrame, method: str = "average"
+) -> pd.DataFrame:
+    """
+    Reorders a square distance matrix by the leaf order of hierarchical clustering.
+
+    Args:
+        df (pd.DataFrame): Square, symmetric distance matrix with samples as index and columns.
+        method (str): Linkage method passed to `scipy.cluster.hierarchy.linkage`.
+            Defaults to "average" (UPGMA).
+
+    Returns:
+        pd.DataFrame: The reordered distance matrix.
+    """
+    if df.shape[0] < 3:
+        return df
+    condensed = squareform(df.values, checks=False)
+    order = leaves_list(linkage(condensed, method=method))
+    return df.iloc[order, order]
+
+
+def tile_distance_matrix(df: pd.DataFrame, max_tiles: int) -> pd.DataFrame:
+    """
+    Aggregates a square distance matrix into at most `max_tiles` x `max_tiles`
+    tiles of consecutive samples, each tile holding the mean distance.
+
+    Sample order is kept, so the matrix should be ordered first (for instance with
+    `cluster_order_distance_matrix`) for the tiles to be meaningful. Tiles are
+    labeled by their first and last sample.
+
+    Args:
+        df (pd.DataFrame): Square distance matrix with samples as index and columns.
+        max_tiles (int): Maximum number of tiles per axis.
+
+    Returns:
+        pd.DataFrame: The tiled distance matrix.
+    """
+    n = df.shape[0]
+    if n <= max_tiles:
+        return df
+
+    starts = np.linspace(0, n, max_tiles + 1).astype(int)[:-1]
+    sizes = np.diff(np.append(starts, n))
+    sums = np.add.reduceat(np.add.reduceat(df.values, starts, axis=0), starts, axis=1)
+    tiles = sums / np.outer(sizes, sizes)
+
+    names = df.index.astype(str)
+    labels = [f"{names[i]}..{names[i + k - 1]}" for i, k in zip(starts, sizes)]
+    return pd.DataFrame(tiles, index=labels, columns=labels)
+
+
 def fold_legend_labels_from_series(df: pd.Series, max_len: int = 30) -> List[str]:
     """Folds a list of labels to a maximum length from a Series.
 
@@ -913,86 +1138,98 @@ def cut_xaxis_labels(ax: plt.axis, n: int = 15) -> plt.axis:
 ############
 ## Plotly ##
 ############
-def get_sankey(df, cat_cols=[], value_cols="", title="Sankey Diagram"):
-    # Colors
-    colorPalette = [
-        "rgba(31, 119, 180, 0.8)",
-        "rgba(255, 127, 14, 0.8)",
-        "rgba(44, 160, 44, 0.8)",
-        "rgba(214, 39, 40, 0.8)",
-        "rgba(148, 103, 189, 0.8)",
-        "rgba(140, 86, 75, 0.8)",
-        "rgba(227, 119, 194, 0.8)",
-        "rgba(127, 127, 127, 0.8)",
-    ]
-    labelList = []
-    colorNumList = []
-
-    for catCol in cat_cols:
-        labelListTemp = list(set(df[catCol].values))
-        colorNumList.append(len(labelListTemp))
-        labelList = labelList + labelListTemp
-
-    # remove duplicates from labelList
-    labelList = list(dict.fromkeys(labelList))
-
-    # define colors based on number of levels
-    colorList = []
-    for idx, colorNum in enumerate(colorNumList):
-        colorList = colorList + [colorPalette[idx]] * colorNum
-
-    # transform df into a source-target pair
-    for i in range(len(cat_cols) - 1):
-        if i == 0:
-            sourceTargetDf = df[[cat_cols[i], cat_cols[i + 1], value_cols]]
-            sourceTargetDf.columns = ["source", "target", "count"]
-        else:
-            tempDf = df[[cat_cols[i], cat_cols[i + 1], value_cols]]
-            tempDf.columns = ["source", "target", "count"]
-            sourceTargetDf = pd.concat([sourceTargetDf, tempDf])
-        sourceTargetDf = (
-            sourceTargetDf.groupby(["source", "target"])
-            .agg({"count": "sum"})
-            .reset_index()
-        )
+SANKEY_COLOR_PALETTE = [
+    "rgba(31, 119, 180, 0.8)",
+    "rgba(255, 127, 14, 0.8)",
+    "rgba(44, 160, 44, 0.8)",
+    "rgba(214, 39, 40, 0.8)",
+    "rgba(148, 103, 189, 0.8)",
+    "rgba(140, 86, 75, 0.8)",
+    "rgba(227, 119, 194, 0.8)",
+    "rgba(127, 127, 127, 0.8)",
+]
+
+
+def build_sankey_links(
+    df: pd.DataFrame, cat_cols: List[str], value_cols: str
+) -> Dict[str, np.ndarray]:
+    """
+    Builds the nodes and links of a Sankey diagram between consecutive category columns.
 
-    # add index for source-target pair
-    sourceTargetDf["sourceID"] = sourceTargetDf["source"].apply(
-        lambda x: labelList.index(x)
-    )
-    sourceTargetDf["targetID"] = sourceTargetDf["target"].apply(
-        lambda x: labelList.index(x)
-    )
+    All category columns are factorized together once, the source-target pairs of all
+    consecutive column pairs are stacked as integer codes and aggregated in a single
+    pass, so the cost is linear in the number of rows times the number of columns.
 
-    # creating data for the sankey diagram
-    data = dict(
-        type="sankey",
-        node=dict(
-            pad=15,
-            thickness=20,
-            line=dict(color="black", width=0.5),
-            label=labelList,
-            color=colorList,
-        ),
-        link=dict(
-            source=sourceTargetDf["sourceID"],
-            target=sourceTargetDf["targetID"],
-            value=sourceTargetDf["count"],
-        ),
-    )
+    Args:
+        df (pd.DataFrame): DataFrame with the category columns and a value column.
+        cat_cols (List[str]): Category columns ordered from the first to the last Sankey level.
+        value_cols (str): Column with the values summed along the links.
 
-    # override gray link colors with 'source' colors
-    opacity = 0.4
-    # change 'magenta' to its 'rgba' value to add opacity
-    data["node"]["color"] = [
-        "rgba(255,0,255, 0.8)" if color == "magenta" else color
-        for color in data["node"]["color"]
-    ]
-    data["link"]["color"] = [
-        data["node"]["color"][src].replace("0.8", str(opacity))
-        for src in data["link"]["source"]
+    Returns:
+        Dict[str, np.ndarray]: Dictionary with 'label' and 'level' (index of the first
+            column a label appears in) for the nodes and 'source', 'target', 'value'
+            for the links.
+    """
+    # column-major factorization keeps labels in the order of the levels
+    codes, labels = pd.factorize(df[cat_cols].to_numpy().ravel(order="F"))
+    codes = codes.reshape(len(df), len(cat_cols), order="F")
+
+    level = np.full(len(labels), len(cat_cols), dtype=int)
+    for i in range(len(cat_cols) - 1, -1, -1):
+        valid = codes[:, i] >= 0
+        level[codes[valid, i]] = i
+
+    source = codes[:, :-1].ravel(order="F")
+    target = codes[:, 1:].ravel(order="F")
+    weights = np.tile(df[value_cols].to_numpy(dtype=float), len(cat_cols) - 1)
+
+    # drop pairs with missing categories, as groupby would
+    valid = (source >= 0) & (target >= 0)
+    pair = source[valid].astype(np.int64) * len(labels) + target[valid]
+    unique_pairs, inverse = np.unique(pair, return_inverse=True)
+
+    return {
+        "label": np.asarray(labels),
+        "level": level,
+        "source": unique_pairs // len(labels),
+        "target": unique_pairs % len(labels),
+        "value": np.bincount(inverse, weights=weights[valid]),
+    }
+
+
+@profiled
+def get_sankey(
+    df: pd.DataFrame,
+    cat_cols: List[str] = [],
+    value_cols: str = "",
+    title: str = "Sankey Diagram",
+) -> go.Figure:
+    """
+    Creates a Sankey diagram of values flowing between consecutive category columns,
+    for instance taxonomic ranks.
+
+    Args:
+        df (pd.DataFrame): DataFrame with the category columns and a value column.
+        cat_cols (List[str]): Category columns ordered from the first to the last Sankey level.
+        value_cols (str): Column with the values, e.g. abundance.
+        title (str): Title of the figure.
+
+    Returns:
+        go.Figure: The Sankey diagram.
+    """
+    sankey = build_sankey_links(df, cat_cols, value_cols)
+
+    # nodes are colored by the first level they appear in
+    node_colors = np.array(SANKEY_COLOR_PALETTE)[
+        sankey["level"] % len(SANKEY_COLOR_PALETTE)
     ]
 
+    # link colors are the 'source' colors with opacity
+    opacity = 0.4
+    link_colors = np.char.replace(
+        node_colors[sankey["source"]].astype(str), "0.8", str(opacity)
+    )
+
     fig = go.Figure(
         data=[
             go.Sankey(
@@ -1001,15 +1238,15 @@ def get_sankey(df, cat_cols=[], value_cols="", title="Sankey Diagram"):
                     pad=15,
                     thickness=15,
                     line=dict(color="black", width=0.5),
-                    label=data["node"]["label"],
-                    color=data["node"]["color"],
+                    label=sankey["label"],
+                    color=node_colors,
                 ),
                 # Add links
                 link=dict(
-                    source=data["link"]["source"],
-                    target=data["link"]["target"],
-                    value=data["link"]["value"],
-                    color=data["link"]["color"],
+                    source=sankey["source"],
+                    target=sankey["target"],
+                    value=sankey["value"],
+                    color=link_colors,
                 ),
             )
         ]
@@ -1020,13 +1257,23 @@ def get_sankey(df, cat_cols=[], value_cols="", title="Sankey Diagram"):
     return fig
 
 
-def plot_network(network_results, association_data, alpha=0.5):
+def plot_network(network_results, association_data, alpha=0.5, layout="spring"):
+    """
+    Plots the co-occurrence networks of the first three factors side by side.
+
+    Args:
+        network_results (dict): Network results per factor from
+            `momics.networks.build_interaction_graphs`.
+        association_data (dict): Association data per factor, its keys select the factors.
+        alpha (float): Transparency of the nodes, edges are 0.3 more transparent.
+        layout (str): Layout method, see `momics.networks.graph_layout`. Defaults to "spring".
+    """
     _, axes = plt.subplots(1, 3, figsize=(18, 6))
 
     for ax, factor in zip(axes, list(association_data.keys())):
         G = network_results[factor]["graph"]
         colors = nx.get_edge_attributes(G, "color")
-        pos = nx.spring_layout(G, k=0.2, iterations=50, seed=42)
+        pos = graph_layout(G, method=layout)
         nx.draw_networkx_nodes(
             G, pos, ax=ax, alpha=alpha, node_color="grey", node_size=17
         )
@@ -1038,3 +1285,88 @@ def plot_network(network_results, association_data, alpha=0.5):
 
     plt.tight_layout()
     plt.show()
+
+
+@profiled
+def hvplot_network(
+    G: nx.Graph,
+    layout: str = "auto",
+    rasterize: bool = None,
+    title: str = None,
+) -> Union[hv.Overlay, hv.DynamicMap]:
+    """
+    Interactive network plot for large graphs. Nodes and edges are drawn with
+    the WebGL backend and the edges are rasterized with datashader above
+    `NETWORK_RASTERIZE_EDGES` edges. Nodes keep hover with their name and degree.
+
+    Args:
+        G (nx.Graph): The graph, edge colors are taken from the 'color' edge attribute.
+        layout (str): Layout method, see `momics.networks.graph_layout`. Defaults to "auto".
+        rasterize (bool, optional): Whether to rasterize the edges (requires `datashader`).
+            Defaults to None, which rasterizes above `NETWORK_RASTERIZE_EDGES` edges.
+        title (str, optional): Title of the plot. Defaults to the graph 'mode' attribute.
+
+    Returns:
+        Union[hv.Overlay, hv.DynamicMap]: Overlay of the edges and the nodes,
+            a DynamicMap if the edges are rasterized.
+    """
+    pos = graph_layout(G, method=layout)
+    if rasterize is None:
+        rasterize = G.number_of_edges() > NETWORK_RASTERIZE_EDGES
+    if title is None:
+        title = str(G.graph.get("mode", ""))
+    webgl = {"plot.output_backend": "webgl"}
+
+    nodes = list(G.nodes())
+    xy = np.array([pos[n] for n in nodes]).reshape(-1, 2)
+    nodes_df = pd.DataFrame(
+        {
+            "x": xy[:, 0],
+            "y": xy[:, 1],
+            "node": [str(n) for n in nodes],
+            "degree": [d for _, d in G.degree(nodes)],
+        }
+    )
+
+    edge_list = list(G.edges(data="color", default="grey"))
+    index = {n: i for i, n in enumerate(nodes)}
+    src = np.array([index[u] for u, _, _ in edge_list], dtype=int)
+    dst = np.array([index[v] for _, v, _ in edge_list], dtype=int)
+    edges_df = pd.DataFrame(
+        {
+            "x0": xy[src, 0],
+            "y0": xy[src, 1],
+            "x1": xy[dst, 0],
+            "y1": xy[dst, 1],
+            "color": pd.Categorical([c for _, _, c in edge_list]),
+        }
+    )
+    segments = hv.Segments(edges_df, kdims=["x0", "y0", "x1", "y1"], vdims=["color"])
+
+    if rasterize:
+        try:
+            import datashader as ds
+            from holoviews.operation.datashader import datashade
+        except ImportError as e:
+            raise ImportError(
+                "Rasterized networks require datashader, install it with "
+                "'pip install marine-omics[datashader]'."
+            ) from e
+        color_key = {c: c for c in edges_df["color"].cat.categories}
+        edges = datashade(
+            segments, aggregator=ds.count_cat("color"), color_key=color_key
+        )
+    else:
+        edges = segments.opts(
+            color="color", line_alpha=0.3, backend_opts=webgl
+        )
+
+    points = hv.Points(nodes_df, kdims=["x", "y"], vdims=["node", "degree"]).opts(
+        color="grey",
+        size=4,
+        tools=["hover"],
+        backend_opts=webgl,
+    )
+    return (edges * points).opts(
+        title=title, xaxis=None, yaxis=None, show_legend=False
+    )
@@ -0,0 +1,251 @@
+"""
+Timing and memory instrumentation of the momics hot paths.
+
+Profiling is disabled by default, in which case the `profiled` functions are
+called directly after a single flag check. Once enabled with `enable_profiling`,
+every call of a `profiled` function or `profile` block adds a record with the wall
+time, CPU time, RSS and peak RSS deltas and the shapes of the inputs to an
+in-process registry.
+
+Example:
+    >>> from momics.profiling import enable_profiling, profile, profiling_records
+    >>> enable_profiling()
+    >>> pivot = pivot_taxonomic_data(ssu)
+    >>> with profile("my step", ssu):
+    ...     ...
+    >>> profiling_records()  # or profiling_table() in a Panel app
+"""
+
+import sys
+import json
+import time
+import logging
+import functools
+import threading
+import psutil
+import pandas as pd
+from typing import Any, Callable, Dict
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# logger setup
+FORMAT = "%(levelname)s | %(name)s | %(message)s"
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(__name__)
+
+# ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+_MAXRSS_BYTES = 1 if sys.platform == "darwin" else 1024
+
+_state = {"enabled": False}
+_records = []
+_lock = threading.Lock()
+
+
+############
+# Registry #
+############
+def enable_profiling() -> None:
+    """Start recording the profiled calls."""
+    _state["enabled"] = True
+
+
+def disable_profiling() -> None:
+    """Stop recording the profiled calls, recorded calls are kept."""
+    _state["enabled"] = False
+
+
+def profiling_enabled() -> bool:
+    """Whether the profiled calls are recorded."""
+    return _state["enabled"]
+
+
+def reset_profiling() -> None:
+    """Remove all recorded calls."""
+    with _lock:
+        _records.clear()
+
+
+def profiling_records() -> pd.DataFrame:
+    """
+    Recorded calls as a DataFrame.
+
+    Returns:
+        pd.DataFrame: One row per call with columns name, start, wall_s, cpu_s,
+            rss_delta_mb, peak_rss_delta_mb and shapes.
+    """
+    with _lock:
+        records = list(_records)
+    return pd.DataFrame(
+        records,
+        columns=[
+            "name",
+            "start",
+            "wall_s",
+            "cpu_s",
+            "rss_delta_mb",
+            "peak_rss_delta_mb",
+            "shapes",
+        ],
+    )
+
+
+def profiling_summary() -> pd.DataFrame:
+    """
+    Recorded calls aggregated per name.
+
+    Returns:
+        pd.DataFrame: Number of calls, total and mean wall time, total CPU time and
+            maximum peak RSS delta, sorted by total wall time.
+    """
+    records = profiling_records()
+    summary = records.groupby("name").agg(
+        calls=("wall_s", "size"),
+        total_wall_s=("wall_s", "sum"),
+        mean_wall_s=("wall_s", "mean"),
+        total_cpu_s=("cpu_s", "sum"),
+        max_peak_rss_delta_mb=("peak_rss_delta_mb", "max"),
+    )
+    return summary.sort_values("total_wall_s", ascending=False)
+
+
+def dump_profiling(path: str = None) -> str:
+    """
+    Dump the recorded calls to JSON.
+
+    Args:
+        path (str, optional): File to write the JSON to.
+
+    Returns:
+        str: The JSON string.
+    """
+    with _lock:
+        text = json.dumps(_records, indent=2)
+    if path is not None:
+        with open(path, "w") as f:
+            f.write(text)
+    return text
+
+
+def profiling_table(summary: bool = True):
+    """
+    Recorded calls as a Panel table for the dashboards.
+
+    Args:
+        summary (bool): Whether to show the per name summary instead of
+            the individual calls. Defaults to True.
+
+    Returns:
+        pn.widgets.Tabulator: The table widget.
+    """
+    import panel as pn
+
+    df = profiling_summary() if summary else profiling_records()
+    return pn.widgets.Tabulator(df, disabled=True, pagination="local", page_size=20)
+
+
+#############
+# Profiling #
+#############
+def input_shapes(*args, **kwargs) -> Dict[str, Any]:
+    """
+    Shapes of the array-like arguments, dictionaries of them are reported per key.
+
+    Returns:
+        dict: Argument position or name mapped to a shape, or to a dictionary of shapes.
+    """
+    shapes = {}
+    for name, arg in list(enumerate(args)) + list(kwargs.items()):
+        if hasattr(arg, "shape"):
+            shapes[str(name)] = list(arg.shape)
+        elif isinstance(arg, dict):
+            nested = {str(k): list(v.shape) for k, v in arg.items() if hasattr(v, "shape")}
+            if nested:
+                shapes[str(name)] = nested
+    return shapes
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return float("nan")
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_BYTES / 1e6
+
+
+class profile:
+    """
+    Context manager recording a block of code, it is a no-op when profiling
+    is disabled.
+
+    The peak RSS delta is the increase of the process high-water mark, therefore
+    it is zero for blocks that stay below an earlier peak.
+
+    Args:
+        name (str): Name of the record.
+        *args: Inputs of the block, whose shapes are recorded.
+        **kwargs: Named inputs of the block, whose shapes are recorded.
+    """
+
+    def __init__(self, name: str, *args, **kwargs):
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+        self.active = False
+
+    def __enter__(self):
+        self.active = _state["enabled"]
+        if self.active:
+            self._process = psutil.Process()
+            self._rss = self._process.memory_info().rss
+            self._peak = _peak_rss_mb()
+            self._start = time.time()
+            self._wall = time.perf_counter()
+            self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.active:
+            return False
+        record = {
+            "name": self.name,
+            "start": self._start,
+            "wall_s": time.perf_counter() - self._wall,
+            "cpu_s": time.process_time() - self._cpu,
+            "rss_delta_mb": (self._process.memory_info().rss - self._rss) / 1e6,
+            "peak_rss_delta_mb": _peak_rss_mb() - self._peak,
+            "shapes": input_shapes(*self.args, **self.kwargs),
+        }
+        with _lock:
+            _records.append(record)
+        logger.debug(f"{self.name}: {record['wall_s']:.3f} s")
+        return False
+
+
+def profiled(func: Callable = None, name: str = None) -> Callable:
+    """
+    Decorator recording the calls of a function with `profile`.
+
+    Can be used bare (`@profiled`) or with a record name (`@profiled(name="...")`),
+    which defaults to the module and function name.
+
+    Args:
+        func (Callable, optional): The function to profile.
+        name (str, optional): Name of the records.
+
+    Returns:
+        Callable: The profiled function.
+    """
+    if func is None:
+        return functools.partial(profiled, name=name)
+
+    record_name = name or f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _state["enabled"]:
+            return func(*args, **kwargs)
+        with profile(record_name, *args, **kwargs):
+            return func(*args, **kwargs)
+
+    return wrapper
@@ -1,25 +1,72 @@
+import os
+import logging
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from typing import Dict
-from scipy.stats import spearmanr, pearsonr
+from typing import Dict, List, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
 
+from .cache import memoize
+from .profiling import profiled
 
+# logger setup
+FORMAT = "%(levelname)s | %(name)s | %(message)s"
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(__name__)
+
+# associations of compositional data, see compositional_correlation
+COMPOSITIONAL_METHODS = ["sparcc", "rho"]
+
+# floor of the SparCC basis variances
+SPARCC_MIN_VARIANCE = 1e-10
+
+# permutations per round of the sequential edge test
+PERMUTATION_BATCH = 100
+
+# non-negative tables with a smaller fraction of non-zero values are ranked
+# sparsely by spearman_from_taxonomy
+SPARSE_SPEARMAN_DENSITY = 0.5
+
+
+@profiled
+@memoize
 def spearman_from_taxonomy(split_taxonomy: Dict) -> Dict:
     """
     Compute Spearman correlation and p-values for the full taxonomy split by a factor.
     Refer `momics.taxonomy.split_taxonomic_data` for more information.
 
+    Zero-inflated tables, with fewer than `SPARSE_SPEARMAN_DENSITY` non-zero values,
+    are ranked by `spearman_sparse`, where constant taxa have NaN rows and columns.
+    The other tables use `scipy.stats.spearmanr`, whose scalar NaN for a constant
+    first or second taxon is returned as a matrix of NaN.
+
     Args:
         split_taxonomy (dict): A dictionary containing dataframes for each factor.
 
     Returns:
         dict: A dictionary containing Spearman correlation and p-values for each factor.
     """
+    from scipy.stats import spearmanr
+
     spearman_taxa = {}
     # Compute Spearman correlation
     for factor, df in split_taxonomy.items():
-        corr, p_spearman = spearmanr(df.T)
+        values = df.to_numpy(dtype=np.float64)
+        if (
+            values.size
+            and values.min() >= 0
+            and np.count_nonzero(values) < SPARSE_SPEARMAN_DENSITY * values.size
+        ):
+            # zero-inflated, the NaN check is included in min() >= 0
+            corr, p_spearman = spearman_sparse(values)
+        else:
+            corr, p_spearman = spearmanr(df.T)
+            if np.ndim(corr) == 0:
+                # scalars for two taxa or a constant first or second taxon
+                corr = np.full((len(df), len(df)), corr)
+                p_spearman = np.full((len(df), len(df)), p_spearman)
+                if not np.isnan(corr).all():
+                    np.fill_diagonal(corr, 1.0)
+                    np.fill_diagonal(p_spearman, 0.0)
         assert (
             corr.shape == p_spearman.shape
         ), "Spearman correlation and p-values must have the same shape."
@@ -36,6 +83,490 @@ def spearman_from_taxonomy(split_taxonomy: Dict) -> Dict:
     return spearman_taxa
 
 
+def spearman_sparse(
+    x: Union[np.ndarray, "sparse.csr_matrix"],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Spearman correlations and p-values of the rows of a zero-inflated,
+    non-negative matrix, equal to `scipy.stats.spearmanr` of its transpose within
+    1e-8.
+
+    Constant rows have NaN correlations and p-values with all rows. This deviates
+    from `scipy.stats.spearmanr`, which returns a scalar NaN for the whole matrix
+    if its first or second variable is constant.
+
+    The zeros of a row are its smallest values and share one average rank, so
+    only the non-zero values are ranked. The ranks of a row are a constant plus
+    a sparse matrix S with the same non-zero entries as `x`, and the covariances
+    of the ranks are S S^T / n minus the rank-one product of the row means of S.
+
+    Args:
+        x (np.ndarray or sparse.csr_matrix): Variables (e.g. taxa) in rows and
+            observations (samples) in columns, non-negative.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The correlation and p-value matrices, NaN
+            for constant rows.
+
+    Raises:
+        ValueError: If the values are negative.
+    """
+    from scipy import sparse
+    from scipy.special import stdtr
+
+    x = sparse.csr_matrix(x, dtype=np.float64)
+    x.eliminate_zeros()
+    if x.nnz and x.data.min() < 0:
+        raise ValueError("The values must be non-negative.")
+    n_rows, n_obs = x.shape
+
+    lengths = np.diff(x.indptr)
+    rows = np.repeat(np.arange(n_rows), lengths)
+    order = np.lexsort((x.data, rows))
+    values, rows_sorted = x.data[order], rows[order]
+    # 0-based position of the sorted values within their row
+    positions = np.arange(x.nnz) - x.indptr[rows_sorted]
+    # ties share the average rank of their group of equal values
+    starts = np.r_[True, (values[1:] != values[:-1]) | (rows_sorted[1:] != rows_sorted[:-1])]
+    group = np.cumsum(starts) - 1
+    sizes = np.bincount(group)
+    ranks = np.empty(x.nnz)
+    ranks[order] = (positions[starts] + (sizes - 1) / 2)[group] + 1
+
+    # rank of the non-zero values minus the shared rank of the zeros
+    zeros = n_obs - lengths
+    shifted = sparse.csr_matrix(
+        (ranks + (zeros[rows] - 1) / 2, x.indices, x.indptr), shape=x.shape
+    )
+    means = np.asarray(shifted.sum(axis=1)).ravel() / n_obs
+    # in place, the dense n_rows x n_rows matrices are the largest objects
+    correlation = (shifted @ shifted.T).toarray()
+    correlation /= n_obs
+    correlation -= np.outer(means, means)
+    std = np.sqrt(np.clip(np.diag(correlation), 0, None))
+    constant = std <= 1e-12 * (n_obs + 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation /= std[:, None]
+        correlation /= std[None, :]
+    np.clip(correlation, -1, 1, out=correlation)
+    correlation[constant, :] = np.nan
+    correlation[:, constant] = np.nan
+    np.fill_diagonal(correlation, np.where(constant, np.nan, 1.0))
+
+    # t-test of blocks of rows right of the diagonal, mirrored
+    dof = n_obs - 2
+    p_vals = np.empty_like(correlation)
+    for block_start in range(0, n_rows, 256):
+        block_stop = min(block_start + 256, n_rows)
+        r = correlation[block_start:block_stop, block_start:]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = r * np.sqrt((dof / ((r + 1.0) * (1.0 - r))).clip(0))
+        block = 2 * stdtr(dof, -np.abs(t))
+        p_vals[block_start:block_stop, block_start:] = block
+        p_vals[block_start:, block_start:block_stop] = block.T
+    np.fill_diagonal(p_vals, np.where(constant, np.nan, 0.0))
+    return correlation, p_vals
+
+
+@profiled
+@memoize
+def compositional_from_taxonomy(
+    split_taxonomy: Dict,
+    method: str = "sparcc",
+    n_bootstraps: int = 100,
+    workers: int = None,
+    seed: int = 42,
+    iterations: int = 20,
+    exclusion_iterations: int = 10,
+    threshold: float = 0.1,
+) -> Dict:
+    """
+    Compositionally aware correlations and p-values for the full taxonomy split
+    by a factor, a drop-in replacement of `spearman_from_taxonomy`.
+
+    The p-values are computed from `n_bootstraps` null datasets, in which the
+    counts of every taxon are shuffled over the samples independently, like in
+    SparCC. A normal distribution is fitted to the null correlations of every
+    pair and the p-value is two-sided, 2 * sf(|observed - mean| / std). Unlike the
+    pseudo p-values (1 + exceedances) / (1 + n_bootstraps), they are not bounded
+    below by 1 / (1 + n_bootstraps), so strong pairs pass an FDR correction over
+    many pairs. The null datasets are computed in worker processes, each with its
+    own seed spawned from `seed`, so the results do not depend on the number of
+    workers, up to floating point rounding.
+
+    Args:
+        split_taxonomy (dict): A dictionary containing dataframes of counts for
+            each factor, taxa in rows and samples in columns.
+        method (str): 'sparcc' or 'rho', see `compositional_correlation`.
+            Defaults to "sparcc".
+        n_bootstraps (int): Number of null datasets, at least 2. Defaults to 100.
+        workers (int, optional): Number of worker processes. Defaults to None,
+            the number of CPUs. 1 runs in the current process.
+        seed (int): Seed of the Dirichlet draws and the null datasets. Defaults to 42.
+        iterations (int): SparCC Dirichlet draws. Defaults to 20.
+        exclusion_iterations (int): SparCC exclusions of strongly correlated
+            pairs. Defaults to 10.
+        threshold (float): SparCC correlation above which pairs are excluded.
+            Defaults to 0.1.
+
+    Returns:
+        dict: A dictionary containing the correlation and p-values for each factor.
+
+    Raises:
+        ValueError: If the method is unknown or there are fewer than 2 bootstraps.
+    """
+    if method not in COMPOSITIONAL_METHODS:
+        raise ValueError(f"Unknown method: {method}, use one of {COMPOSITIONAL_METHODS}")
+    if n_bootstraps < 2:
+        raise ValueError("At least two bootstraps are needed for the p-values.")
+    options = dict(
+        iterations=iterations,
+        exclusion_iterations=exclusion_iterations,
+        threshold=threshold,
+    )
+    n_workers = workers if workers is not None else (os.cpu_count() or 1)
+    n_workers = max(1, min(n_workers, n_bootstraps))
+
+    compositional_taxa = {}
+    for factor, df in split_taxonomy.items():
+        counts = df.to_numpy(dtype=np.float64).T
+        observed_seed, *null_seeds = np.random.SeedSequence(seed).spawn(n_bootstraps + 1)
+        observed = _compositional_correlation(
+            counts, method, np.random.default_rng(observed_seed), **options
+        )
+
+        if n_workers == 1:
+            total, squares = _null_moments(counts, method, null_seeds, options)
+        else:
+            chunks = [null_seeds[k::n_workers] for k in range(n_workers)]
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                futures = [
+                    executor.submit(_null_moments, counts, method, chunk, options)
+                    for chunk in chunks
+                ]
+                moments = [future.result() for future in futures]
+            total = sum(m[0] for m in moments)
+            squares = sum(m[1] for m in moments)
+
+        p_vals = _normal_null_pvals(observed, total, squares, n_bootstraps)
+        np.fill_diagonal(p_vals, 0)
+        compositional_taxa[factor] = {
+            "correlation": pd.DataFrame(observed, index=df.index, columns=df.index),
+            "p_vals": pd.DataFrame(p_vals, index=df.index, columns=df.index),
+        }
+        logger.info(f"{method} of {df.shape[0]} taxa for factor {factor} done")
+
+    return compositional_taxa
+
+
+def compositional_correlation(
+    df: pd.DataFrame,
+    method: str = "sparcc",
+    seed: int = 42,
+    iterations: int = 20,
+    exclusion_iterations: int = 10,
+    threshold: float = 0.1,
+) -> pd.DataFrame:
+    """
+    Correlations of the taxa of a count table which account for the counts being
+    compositions of the samples.
+
+    - 'sparcc': SparCC (Friedman & Alm, 2012). The basis variances are estimated
+      from the log-ratio variances of Dirichlet draws of the sample fractions,
+      iteratively excluding the most correlated pair above `threshold` from the
+      estimate. The result is the median over `iterations` draws.
+    - 'rho': proportionality rho of the CLR transformed counts,
+      1 - var(clr_i - clr_j) / (var(clr_i) + var(clr_j)), with the zeros
+      multiplicatively replaced, see `momics.taxonomy.transform_abundance`.
+
+    Args:
+        df (pd.DataFrame): Counts, taxa in rows and samples in columns.
+        method (str): 'sparcc' or 'rho'. Defaults to "sparcc".
+        seed (int): Seed of the SparCC Dirichlet draws. Defaults to 42.
+        iterations (int): SparCC Dirichlet draws. Defaults to 20.
+        exclusion_iterations (int): SparCC exclusions of strongly correlated
+            pairs. Defaults to 10.
+        threshold (float): SparCC correlation above which pairs are excluded.
+            Defaults to 0.1.
+
+    Returns:
+        pd.DataFrame: The correlations of the taxa.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    if method not in COMPOSITIONAL_METHODS:
+        raise ValueError(f"Unknown method: {method}, use one of {COMPOSITIONAL_METHODS}")
+    correlation = _compositional_correlation(
+        df.to_numpy(dtype=np.float64).T,
+        method,
+        np.random.default_rng(seed),
+        iterations=iterations,
+        exclusion_iterations=exclusion_iterations,
+        threshold=threshold,
+    )
+    return pd.DataFrame(correlation, index=df.index, columns=df.index)
+
+
+def _compositional_correlation(
+    counts: np.ndarray,
+    method: str,
+    rng: np.random.Generator,
+    iterations: int,
+    exclusion_iterations: int,
+    threshold: float,
+) -> np.ndarray:
+    """Correlations of the features (columns) of samples x features counts."""
+    if method == "rho":
+        from .taxonomy import transform_abundance
+
+        clr = transform_abundance(counts, "clr")
+        covariance = np.cov(clr, rowvar=False)
+        variances = np.diag(covariance)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rho = 2 * covariance / (variances[:, None] + variances[None, :])
+        np.fill_diagonal(rho, 1)
+        return rho
+
+    estimates = np.empty((iterations, counts.shape[1], counts.shape[1]))
+    for k in range(iterations):
+        # Dirichlet draws of the fractions, the log ratios do not depend on
+        # the normalization of the gamma draws
+        logged = np.log(rng.gamma(counts + 1))
+        estimates[k] = _sparcc(logged, exclusion_iterations, threshold)
+    return np.median(estimates, axis=0)
+
+
+def _sparcc(logged: np.ndarray, exclusion_iterations: int, threshold: float) -> np.ndarray:
+    """SparCC correlations of the log fractions of one Dirichlet draw."""
+    n_features = logged.shape[1]
+    covariance = np.cov(logged, rowvar=False)
+    variances = np.diag(covariance)
+    # var(log(x_i / x_j))
+    ratio_variances = variances[:, None] + variances[None, :] - 2 * covariance
+
+    # t_i = sum_j var(log(x_i / x_j)) = (D - 2) * w_i + sum_j w_j of the
+    # basis variances w, excluded pairs are removed from both sides
+    system = np.ones((n_features, n_features)) + (n_features - 2) * np.eye(n_features)
+    totals = ratio_variances.copy()
+    excluded = np.eye(n_features, dtype=bool)
+    for k in range(exclusion_iterations + 1):
+        try:
+            basis = np.linalg.solve(system, totals.sum(axis=1))
+        except np.linalg.LinAlgError:
+            basis = np.linalg.lstsq(system, totals.sum(axis=1), rcond=None)[0]
+        basis = np.maximum(basis, SPARCC_MIN_VARIANCE)
+        correlation = (basis[:, None] + basis[None, :] - ratio_variances) / (
+            2 * np.sqrt(np.outer(basis, basis))
+        )
+        if k == exclusion_iterations:
+            break
+        strength = np.where(excluded, 0, np.abs(correlation))
+        i, j = np.unravel_index(np.argmax(strength), strength.shape)
+        if strength[i, j] <= threshold:
+            break
+        excluded[i, j] = excluded[j, i] = True
+        system[i, j] -= 1
+        system[j, i] -= 1
+        system[i, i] -= 1
+        system[j, j] -= 1
+        totals[i, j] = totals[j, i] = 0
+
+    correlation = np.clip(correlation, -1, 1)
+    np.fill_diagonal(correlation, 1)
+    return correlation
+
+
+def _null_moments(
+    counts: np.ndarray,
+    method: str,
+    seeds: List[np.random.SeedSequence],
+    options: Dict,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Sums and sums of squares of the null correlations per pair."""
+    n_taxa = counts.shape[1]
+    total = np.zeros((n_taxa, n_taxa))
+    squares = np.zeros((n_taxa, n_taxa))
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        # every taxon shuffled over the samples independently
+        null = _compositional_correlation(
+            rng.permuted(counts, axis=0), method, rng, **options
+        )
+        total += null
+        squares += null**2
+    return total, squares
+
+
+def _normal_null_pvals(
+    observed: np.ndarray, total: np.ndarray, squares: np.ndarray, n: int
+) -> np.ndarray:
+    """Two-sided p-values of the observed correlations under fitted normal nulls."""
+    from scipy.stats import norm
+
+    mean = total / n
+    std = np.sqrt(np.clip((squares - n * mean**2) / (n - 1), 0, None))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = np.abs(observed - mean) / std
+    # a constant null only explains its own value, NaN correlations stay NaN
+    constant = (std == 0) & ~np.isnan(observed)
+    z[constant] = np.where(np.isclose(observed, mean), 0.0, np.inf)[constant]
+    return 2 * norm.sf(z)
+
+
+@profiled
+def permutation_edge_test(
+    df: pd.DataFrame,
+    correlation: pd.DataFrame,
+    pos_cutoff: float = 0.5,
+    neg_cutoff: float = -0.5,
+    strata: List = None,
+    max_permutations: int = 999,
+    alpha: float = 0.05,
+    confidence: float = 0.999,
+    batch: int = PERMUTATION_BATCH,
+    workers: int = None,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """
+    Permutation p-values of the Spearman correlations of the candidate edges,
+    the pairs of taxa with a correlation beyond the cutoffs of
+    `momics.networks.build_interaction_graphs`.
+
+    The samples of one taxon of a pair are permuted, within the strata if given.
+    The test is sequential: the permutations run in rounds of `batch`, and an
+    edge stops when the Clopper-Pearson interval of its p-value at `confidence`
+    is entirely above `alpha`, so clearly null edges stop after a few rounds.
+    The other edges, the significant ones included, run `max_permutations`, so
+    their p-values are resolved down to 1 / (1 + max_permutations) for the FDR
+    correction. The cost is proportional to the number of candidate edges. The
+    candidates of a round are split over worker processes, which draw the same
+    permutations from the round's seed, so the results do not depend on the
+    number of workers.
+
+    The other pairs are not tested and their p-values are NaN, which
+    `momics.taxonomy.fdr_pvals` leaves out of the correction, so the FDR is
+    controlled over the candidate edges.
+
+    Args:
+        df (pd.DataFrame): Abundances of one factor, taxa in rows and samples
+            in columns, e.g. a value of `momics.taxonomy.split_taxonomic_data_pivoted`.
+        correlation (pd.DataFrame): Spearman correlations of the taxa of `df`, as
+            returned by `spearman_from_taxonomy`.
+        pos_cutoff (float): The positive correlation cutoff. Defaults to 0.5.
+        neg_cutoff (float): The negative correlation cutoff. Defaults to -0.5.
+        strata (List, optional): Group label of every sample (column), samples are
+            permuted within their group. Defaults to None, one group.
+        max_permutations (int): Maximum permutations of an edge. Defaults to 999.
+        alpha (float): Significance level of the early stopping, edges whose
+            p-value is clearly above it stop. Defaults to 0.05.
+        confidence (float): Confidence of the stopping interval. Defaults to 0.999.
+        batch (int): Permutations per round. Defaults to `PERMUTATION_BATCH`.
+        workers (int, optional): Number of worker processes. Defaults to None,
+            the number of CPUs. 1 runs in the current process.
+        seed (int): Seed of the permutations. Defaults to 42.
+
+    Returns:
+        pd.DataFrame: Two-sided p-values (1 + exceedances) / (1 + permutations)
+            of the candidate edges, NaN for the other pairs and 0 on the diagonal,
+            usable like the "p_vals" of `spearman_from_taxonomy`.
+
+    Raises:
+        ValueError: If the strata do not match the samples.
+    """
+    from scipy.stats import beta, rankdata
+
+    if strata is not None and len(strata) != df.shape[1]:
+        raise ValueError("The strata must have one label per sample.")
+    codes = (
+        np.zeros(df.shape[1], dtype=int)
+        if strata is None
+        else pd.factorize(pd.Series(list(strata)))[0]
+    )
+
+    # z-scores of the ranks, the mean of their products is the Spearman correlation
+    ranks = rankdata(df.to_numpy(dtype=np.float64), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = (ranks - ranks.mean(axis=1, keepdims=True)) / ranks.std(
+            axis=1, keepdims=True
+        )
+
+    values = correlation.reindex(index=df.index, columns=df.index).to_numpy()
+    rows, cols = np.triu_indices(len(df), k=1)
+    candidate = (values[rows, cols] >= pos_cutoff) | (values[rows, cols] <= neg_cutoff)
+    rows, cols = rows[candidate], cols[candidate]
+    observed = np.abs(np.einsum("kn,kn->k", scores[rows], scores[cols]) / df.shape[1])
+
+    exceedances = np.zeros(len(rows), dtype=np.int64)
+    permutations = np.zeros(len(rows), dtype=np.int64)
+    active = np.arange(len(rows))
+    n_workers = workers if workers is not None else (os.cpu_count() or 1)
+    round_seeds = np.random.SeedSequence(seed).spawn(-(-max_permutations // batch))
+
+    executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+    try:
+        for round_seed in round_seeds:
+            if not len(active):
+                break
+            size = min(batch, max_permutations - permutations[active[0]])
+            chunks = np.array_split(active, min(n_workers, len(active)))
+            args = [
+                (scores, rows[c], cols[c], observed[c], codes, round_seed, size)
+                for c in chunks
+            ]
+            if executor is None:
+                counts = [_permutation_exceedances(*a) for a in args]
+            else:
+                futures = [executor.submit(_permutation_exceedances, *a) for a in args]
+                counts = [future.result() for future in futures]
+            exceedances[active] += np.concatenate(counts)
+            permutations[active] += size
+
+            # lower Clopper-Pearson bound of the exceedance probability
+            k, n = exceedances[active], permutations[active]
+            tail = (1 - confidence) / 2
+            lower = np.where(k > 0, beta.ppf(tail, k, n - k + 1), 0.0)
+            # only the clearly null edges stop, significant ones keep resolving
+            active = active[lower <= alpha]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    logger.info(
+        f"Permutation test of {len(rows)} candidate edges: {permutations.sum()} "
+        f"permutations instead of {len(rows) * max_permutations}"
+    )
+    p_vals = np.full(values.shape, np.nan)
+    p_vals[rows, cols] = p_vals[cols, rows] = (1 + exceedances) / (1 + permutations)
+    np.fill_diagonal(p_vals, 0)
+    return pd.DataFrame(p_vals, index=df.index, columns=df.index)
+
+
+def _permutation_exceedances(
+    scores: np.ndarray,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    observed: np.ndarray,
+    codes: np.ndarray,
+    seed: np.random.SeedSequence,
+    size: int,
+) -> np.ndarray:
+    """Number of permutations with |correlation| >= |observed| per edge."""
+    rng = np.random.default_rng(seed)
+    n_samples = scores.shape[1]
+    # positions of the samples grouped by stratum
+    grouped = np.argsort(codes, kind="stable")
+    first, second = scores[rows], scores[cols]
+    exceedances = np.zeros(len(rows), dtype=np.int64)
+    permutation = np.empty(n_samples, dtype=np.int64)
+    for _ in range(size):
+        # shuffle within the strata
+        permutation[grouped] = np.lexsort((rng.random(n_samples), codes))
+        null = np.einsum("kn,kn->k", first, second[:, permutation]) / n_samples
+        exceedances += np.abs(null) >= observed - 1e-12
+    return exceedances
+
+
 ################################
 ## Plotting correlations etc. ##
 ################################
@@ -50,6 +581,8 @@ def plot_association_histogram(assoc_data: Dict, bins: int = 50) -> None:
     Returns:
         None
     """
+    import matplotlib.pyplot as plt
+
     # histogram of the correlation values for setting graph cutoffs
     plt.figure(figsize=(10, 5))
     for factor, df in assoc_data.items():
@@ -81,6 +614,8 @@ def plot_fdr(correlations: Dict, pval_cutoff: float) -> None:
     Returns:
         None
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(10, 5))
     for factor, df in correlations.items():
         raw_pvals = df["p_vals"]
@@ -0,0 +1,291 @@
+"""
+Local store of processed EMO BON samples for incremental ingestion of new
+sampling batches.
+
+Samples are identified by their `ref_code`. Ingesting tables processes only the
+samples not yet in the store and appends the results:
+
+- `tables/<name>/part-<k>.parquet`: the long tables, with `source material ID`
+  merged from the metadata like `momics.metadata.merge_source_mat_id_to_data`.
+- `pivot/<name>/`: pivoted LSU/SSU counts, see `momics.loader.matrices`.
+- `rarefied/<name>/`: pivoted counts rarefied to the store's fixed depth,
+  without the samples below the depth.
+- `alpha/<name>.parquet`: Shannon index per sample.
+- `beta/<name>.parquet`: Bray-Curtis dissimilarities of the counts, extended by
+  the blocks of the new samples only.
+
+Alpha diversity and rarefaction to a fixed depth only depend on the sample
+itself. Bray-Curtis is computed on the raw counts, because the normalizations of
+`momics.taxonomy.normalize_abundance` scale the features across all samples.
+"""
+
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List
+
+from .profiling import profiled
+
+# logger setup
+FORMAT = "%(levelname)s | %(name)s | %(message)s"
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 1
+
+# tables which are pivoted and get diversity metrics
+TAXONOMY_TABLES = ["lsu", "ssu"]
+
+
+class SampleStore:
+    """
+    Folder of processed samples, see the module description.
+
+    Args:
+        folder (str): Folder of the store, created if missing.
+        rarefy_depth (int, optional): Depth of the rarefied pivots. Must be the
+            same for all ingestions, None disables rarefaction. Defaults to None.
+
+    Raises:
+        ValueError: If the store exists with a different `rarefy_depth`.
+    """
+
+    def __init__(self, folder: str, rarefy_depth: int = None):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, "manifest.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                self.manifest = json.load(f)
+            if self.manifest["rarefy_depth"] != rarefy_depth:
+                raise ValueError(
+                    f"The store was created with rarefy_depth="
+                    f"{self.manifest['rarefy_depth']}, not {rarefy_depth}."
+                )
+        else:
+            self.manifest = {
+                "version": STORE_VERSION,
+                "rarefy_depth": rarefy_depth,
+                "ref_codes": [],
+                "tables": {},
+            }
+
+    @property
+    def ref_codes(self) -> List[str]:
+        """`ref_code`s of the ingested samples."""
+        return list(self.manifest["ref_codes"])
+
+    def new_ref_codes(self, ref_codes: Iterable[str]) -> List[str]:
+        """
+        The `ref_code`s which are not in the store yet.
+
+        Args:
+            ref_codes (Iterable[str]): Candidate samples, e.g. the metadata `ref_code`.
+
+        Returns:
+            List[str]: The new samples, sorted.
+        """
+        return sorted(set(ref_codes) - set(self.manifest["ref_codes"]))
+
+    @profiled
+    def ingest(
+        self,
+        tables: Dict[str, pd.DataFrame],
+        metadata: pd.DataFrame = None,
+        ref_codes: Iterable[str] = None,
+    ) -> List[str]:
+        """
+        Process and append the new samples of the tables.
+
+        Args:
+            tables (Dict[str, pd.DataFrame]): Long tables with a `ref_code` column,
+                as returned by `momics.loader.load_parquets_udal`.
+            metadata (pd.DataFrame, optional): Metadata with `ref_code` and
+                `source_mat_id` columns. If given, the samples are labelled by
+                `source material ID`, otherwise by `ref_code`.
+            ref_codes (Iterable[str], optional): Samples to ingest. Defaults to None,
+                all samples of the tables and metadata which are not in the store.
+                Samples already in the store are skipped, and samples without rows
+                in any table are not recorded, so they are ingested with their rows
+                later.
+
+        Returns:
+            List[str]: The ingested `ref_code`s, those with rows in a table.
+        """
+        from .metadata import merge_source_mat_id_to_data
+
+        if ref_codes is None:
+            ref_codes = set()
+            for df in tables.values():
+                if "ref_code" in df.columns:
+                    ref_codes.update(df["ref_code"].unique())
+            if metadata is not None:
+                ref_codes.update(metadata["ref_code"])
+        new = self.new_ref_codes(ref_codes)
+        if not new:
+            logger.info("No new samples to ingest.")
+            return []
+
+        new_tables = {
+            name: df[df["ref_code"].isin(new)]
+            for name, df in tables.items()
+            if "ref_code" in df.columns
+        }
+        with_rows = set()
+        for df in new_tables.values():
+            with_rows.update(df["ref_code"].unique())
+        if len(with_rows) < len(new):
+            logger.info(
+                f"{len(new) - len(with_rows)} of the new samples have no rows and "
+                f"are not recorded"
+            )
+        new = sorted(with_rows)
+        if not new:
+            return []
+        logger.info(f"Ingesting {len(new)} new samples")
+
+        if metadata is not None:
+            new_tables = merge_source_mat_id_to_data(new_tables, metadata)
+        else:
+            # same index as merge_source_mat_id_to_data
+            new_tables = {
+                name: df.set_index(
+                    ["ref_code", "ncbi_tax_id"]
+                    if name.lower() in TAXONOMY_TABLES
+                    else "ref_code"
+                )
+                for name, df in new_tables.items()
+            }
+
+        for name, df in new_tables.items():
+            if len(df) == 0:
+                continue
+            self._append_table(name, df)
+            if name.lower() in TAXONOMY_TABLES:
+                self._append_taxonomy(name, df)
+
+        self.manifest["ref_codes"] = sorted(set(self.manifest["ref_codes"]) | set(new))
+        with open(os.path.join(self.folder, "manifest.json"), "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        return new
+
+    def load_table(self, name: str) -> pd.DataFrame:
+        """
+        Load an ingested long table.
+
+        Args:
+            name (str): Table name, e.g. 'ssu'.
+
+        Returns:
+            pd.DataFrame: The table of all ingested samples.
+
+        Raises:
+            KeyError: If the table is not in the store.
+        """
+        parts = self.manifest["tables"][name]["parts"]
+        return pd.concat(
+            [pd.read_parquet(os.path.join(self.folder, part)) for part in parts]
+        )
+
+    def load_tables(self) -> Dict[str, pd.DataFrame]:
+        """All ingested long tables keyed by name."""
+        return {name: self.load_table(name) for name in self.manifest["tables"]}
+
+    def load_pivot(self, name: str, rarefied: bool = False) -> pd.DataFrame:
+        """
+        Load the pivoted counts of a taxonomy table.
+
+        Args:
+            name (str): 'lsu' or 'ssu'.
+            rarefied (bool): Whether to load the rarefied counts. Defaults to False.
+
+        Returns:
+            pd.DataFrame: Features x samples counts, memory-mapped.
+        """
+        from .loader.matrices import load_abundance_matrix
+
+        kind = "rarefied" if rarefied else "pivot"
+        return load_abundance_matrix(os.path.join(self.folder, kind, name)).to_frame()
+
+    def load_alpha(self, name: str) -> pd.DataFrame:
+        """Shannon index of the samples of a taxonomy table."""
+        return pd.read_parquet(os.path.join(self.folder, "alpha", f"{name}.parquet"))
+
+    def load_beta(self, name: str) -> pd.DataFrame:
+        """Bray-Curtis dissimilarities of the samples of a taxonomy table."""
+        return pd.read_parquet(os.path.join(self.folder, "beta", f"{name}.parquet"))
+
+    def _append_table(self, name: str, df: pd.DataFrame):
+        """Write the rows of the new samples as a new part of the table."""
+        table = self.manifest["tables"].setdefault(name, {"parts": []})
+        os.makedirs(os.path.join(self.folder, "tables", name), exist_ok=True)
+        part = os.path.join("tables", name, f"part-{len(table['parts']):05d}.parquet")
+        df.to_parquet(os.path.join(self.folder, part))
+        table["parts"].append(part)
+
+    def _append_taxonomy(self, name: str, df: pd.DataFrame):
+        """Pivot the new samples and extend the pivots, alpha and beta diversity."""
+        from .diversity import calculate_shannon_index
+        from .loader.matrices import load_abundance_matrix, save_abundance_matrix
+        from .taxonomy import bray_curtis_between, pivot_taxonomic_data, rarefy_table
+
+        pivot = pivot_taxonomic_data(df)
+        pivot_folder = os.path.join(self.folder, "pivot", name)
+        old = None
+        if os.path.exists(pivot_folder):
+            # read into memory, a mapped file cannot be replaced on Windows
+            old = load_abundance_matrix(pivot_folder, mmap_mode=None).to_frame()
+        save_abundance_matrix(_join_pivots(old, pivot), pivot_folder)
+
+        depth = self.manifest["rarefy_depth"]
+        if depth is not None:
+            # samples below the depth are not rarefied
+            rarefied = rarefy_table(pivot, depth=depth).dropna(axis=1, how="all")
+            rarefied.columns.name = pivot.columns.name
+            rarefied_folder = os.path.join(self.folder, "rarefied", name)
+            old_rarefied = None
+            if os.path.exists(rarefied_folder):
+                old_rarefied = load_abundance_matrix(
+                    rarefied_folder, mmap_mode=None
+                ).to_frame()
+            save_abundance_matrix(_join_pivots(old_rarefied, rarefied), rarefied_folder)
+
+        alpha = calculate_shannon_index(pivot.T).to_frame("Shannon")
+        alpha.index = alpha.index.astype(str)
+        _append_rows(alpha, os.path.join(self.folder, "alpha", f"{name}.parquet"))
+
+        # only the blocks of the new samples are computed
+        new_new = bray_curtis_between(pivot, pivot)
+        if old is None:
+            beta = new_new
+        else:
+            old_new = bray_curtis_between(old, pivot)
+            beta = pd.concat(
+                [
+                    pd.concat([self.load_beta(name), old_new], axis=1),
+                    pd.concat([old_new.T, new_new], axis=1),
+                ]
+            )
+        order = sorted(beta.index)
+        beta = beta.loc[order, order]
+        np.fill_diagonal(beta.values, 0)
+        os.makedirs(os.path.join(self.folder, "beta"), exist_ok=True)
+        beta.to_parquet(os.path.join(self.folder, "beta", f"{name}.parquet"))
+
+
+def _join_pivots(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Pivot of the old and new samples, sorted like `pivot_taxonomic_data`."""
+    if old is None:
+        return new
+    joined = pd.concat([old, new], axis=1).fillna(0)
+    return joined.sort_index()[sorted(joined.columns)]
+
+
+def _append_rows(df: pd.DataFrame, path: str):
+    """Append rows to a parquet table, sorted by the index."""
+    if os.path.exists(path):
+        df = pd.concat([pd.read_parquet(path), df]).sort_index()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_parquet(path)
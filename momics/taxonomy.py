@@ -2,11 +2,11 @@ import logging
 import pandas as pd
 import numpy as np
 
-from tqdm import tqdm
-from typing import List, Dict
-from statsmodels.stats.multitest import multipletests
-from skbio.stats import subsample_counts
-from skbio.diversity import beta_diversity
+from collections.abc import Mapping
+from typing import List, Dict, Union
+
+from .cache import memoize
+from .profiling import profiled
 
 
 # logger setup
@@ -14,12 +14,22 @@ FORMAT = "%(levelname)s | %(name)s | %(message)s"
 logging.basicConfig(level=logging.INFO, format=FORMAT)
 logger = logging.getLogger(__name__)
 
+# transforms of the samples as compositions, see transform_abundance
+TRANSFORM_METHODS = ["clr", "rclr", "alr", "mult_replace", "log1p"]
+# transforms which keep the zeros and the sparsity
+SPARSE_TRANSFORM_METHODS = ["rclr", "log1p"]
+
+# rows per block of the group-wise sums of GroupedTaxonomy
+GROUPED_BLOCK_ROWS = 4096
+
 
 """
 Some functions were originally developed by Andrzej Tkacz at CCMAR-Algarve.
 """
 
 
+@profiled
+@memoize
 def pivot_taxonomic_data(df: pd.DataFrame) -> pd.DataFrame:
     """
     Prepares the taxonomic data (LSU and SSU tables) for analysis. Apart from
@@ -57,25 +67,7 @@ def pivot_taxonomic_data(df: pd.DataFrame) -> pd.DataFrame:
         df1 = df.copy()
 
     # Select relevant columns
-    df1["taxonomic_concat"] = (
-        df1["ncbi_tax_id"].astype(str)
-        + ";sk__"
-        + df1["superkingdom"].fillna("")
-        + ";k__"
-        + df1["kingdom"].fillna("")
-        + ";p__"
-        + df1["phylum"].fillna("")
-        + ";c__"
-        + df1["class"].fillna("")
-        + ";o__"
-        + df1["order"].fillna("")
-        + ";f__"
-        + df1["family"].fillna("")
-        + ";g__"
-        + df1["genus"].fillna("")
-        + ";s__"
-        + df1["species"].fillna("")
-    )
+    df1["taxonomic_concat"] = taxonomic_concat(df1)
 
     pivot_table = (
         df1.pivot_table(
@@ -89,18 +81,65 @@ def pivot_taxonomic_data(df: pd.DataFrame) -> pd.DataFrame:
     return pivot_table
 
 
+def taxonomic_concat(df: pd.DataFrame) -> pd.Series:
+    """
+    Concatenate the tax ID and the taxonomy ranks into the feature label of the
+    pivoted tables, e.g. '2;sk__Bacteria;k__;p__...;s__'.
+
+    Args:
+        df (pd.DataFrame): Taxonomy table with `ncbi_tax_id` and the rank columns.
+
+    Returns:
+        pd.Series: The labels.
+    """
+    return (
+        df["ncbi_tax_id"].astype(str)
+        + ";sk__"
+        + df["superkingdom"].fillna("")
+        + ";k__"
+        + df["kingdom"].fillna("")
+        + ";p__"
+        + df["phylum"].fillna("")
+        + ";c__"
+        + df["class"].fillna("")
+        + ";o__"
+        + df["order"].fillna("")
+        + ";f__"
+        + df["family"].fillna("")
+        + ";g__"
+        + df["genus"].fillna("")
+        + ";s__"
+        + df["species"].fillna("")
+    )
+
+
+@profiled
+@memoize
 def normalize_abundance(
-    df: pd.DataFrame, method: str = "tss_sqrt", rarefy_depth: int = None
+    df: pd.DataFrame,
+    method: str = "tss_sqrt",
+    rarefy_depth: int = None,
+    delta: float = None,
+    reference=None,
 ) -> pd.DataFrame:
     """
     Normalize the abundance DataFrame using specified method.
 
+    'tss' and 'tss_sqrt' scale every feature (row) by its total over the samples.
+    The methods of `TRANSFORM_METHODS` transform every sample (column) as a
+    composition, see `transform_abundance`. A DataFrame of sparse columns stays
+    sparse with 'rclr' and 'log1p', which keep the zeros.
+
     Args:
         df (pd.DataFrame): The input DataFrame containing taxonomic information.
-        method (str): Normalization method. Options: 'tss', 'tss_sqrt', 'rarefy'.
-            Defaults to 'tss_sqrt'.
+        method (str): Normalization method. Options: 'tss', 'tss_sqrt', 'rarefy',
+            'clr', 'rclr', 'alr', 'mult_replace', 'log1p'. Defaults to 'tss_sqrt'.
         rarefy_depth (int, optional): Depth for rarefaction. If None, uses min sample sum.
             Defaults to None.
+        delta (float, optional): Replacement value of the zero proportions of
+            'clr', 'alr' and 'mult_replace'. Defaults to None, see `transform_abundance`.
+        reference (optional): Index label or position of the reference feature of
+            'alr', which is dropped from the result. Defaults to None, the last feature.
     
     Returns:
         pd.DataFrame: A DataFrame with normalized abundance values.
@@ -116,7 +155,7 @@ def normalize_abundance(
         )
 
     # check if all columns are numeric
-    if not np.issubdtype(df.dtypes[0], np.number):
+    if not pd.api.types.is_numeric_dtype(df.dtypes.iloc[0]):
         raise TypeError("DataFrame must contain numeric values for normalization.")
 
     if method == 'tss':
@@ -124,15 +163,143 @@ def normalize_abundance(
         out = df.div(df.sum(axis=1), axis=0)
     elif method == "tss_sqrt":
         # Total Sum Scaling and Square Root Transformation
-        out = df.div(df.sum(axis=1), axis=0)
-        out = out.apply(np.sqrt)
+        out = np.sqrt(df.div(df.sum(axis=1), axis=0))
     elif method == "rarefy":
         out = rarefy_table(df, depth=rarefy_depth)
+    elif method in TRANSFORM_METHODS:
+        out = _transform_frame(df, method, delta, reference)
     else:
         raise ValueError(f"Normalization method '{method}' is not supported.")
     return out
 
 
+def _transform_frame(df: pd.DataFrame, method: str, delta: float, reference):
+    """`transform_abundance` of the samples (columns) of a pivoted table."""
+    from scipy import sparse
+
+    index = df.index
+    if reference is None:
+        reference = -1
+    elif not isinstance(reference, (int, np.integer)):
+        reference = index.get_loc(reference)
+    if method == "alr":
+        index = index.delete(reference)
+
+    is_sparse = all(isinstance(dtype, pd.SparseDtype) for dtype in df.dtypes)
+    if is_sparse and method in SPARSE_TRANSFORM_METHODS:
+        values = sparse.csr_matrix(df.sparse.to_coo().T, dtype=np.float64)
+        out = transform_abundance(values, method, delta=delta, reference=reference)
+        return pd.DataFrame.sparse.from_spmatrix(
+            out.T.tocsc(), index=index, columns=df.columns
+        )
+
+    values = df.to_numpy(dtype=np.float64).T
+    out = transform_abundance(values, method, delta=delta, reference=reference)
+    return pd.DataFrame(out.T, index=index, columns=df.columns)
+
+
+def transform_abundance(
+    x: Union[np.ndarray, "sparse.csr_matrix"],
+    method: str,
+    delta: float = None,
+    reference: int = -1,
+) -> Union[np.ndarray, "sparse.csr_matrix"]:
+    """
+    Compositional and log transforms of the samples (rows) of an abundance matrix,
+    vectorised over the whole matrix.
+
+    - 'mult_replace': proportions with the zeros replaced by `delta` and the
+      other proportions scaled by 1 - delta * number of zeros of the sample.
+    - 'clr': log of the 'mult_replace' proportions minus their mean per sample.
+    - 'alr': log of the 'mult_replace' proportions over the proportion of the
+      reference feature, which is dropped.
+    - 'rclr': robust CLR, the log of the non-zero abundances minus their mean
+      per sample, zeros stay zero.
+    - 'log1p': log(1 + x).
+
+    Sparse input stays sparse with 'rclr' and 'log1p', the other methods return
+    dense arrays.
+
+    Args:
+        x (np.ndarray or sparse.csr_matrix): Samples x features, non-negative.
+        method (str): One of `TRANSFORM_METHODS`.
+        delta (float, optional): Replacement value of the zero proportions.
+            Defaults to None, 1 / features ** 2.
+        reference (int): Position of the reference feature of 'alr'. Defaults to
+            -1, the last feature.
+
+    Returns:
+        np.ndarray or sparse.csr_matrix: The transformed matrix, with one
+            feature less for 'alr'.
+
+    Raises:
+        ValueError: If the method is unknown, the abundances are negative, a
+            sample is empty for the log-ratio methods or `delta` is too large
+            for the number of zeros of a sample.
+    """
+    from scipy import sparse
+
+    if method not in TRANSFORM_METHODS:
+        raise ValueError(f"Unknown method: {method}, use one of {TRANSFORM_METHODS}")
+    if sparse.issparse(x):
+        if method in SPARSE_TRANSFORM_METHODS:
+            return _transform_sparse(sparse.csr_matrix(x, dtype=np.float64), method)
+        x = x.toarray()
+    x = np.asarray(x, dtype=np.float64)
+    if x.size and x.min() < 0:
+        raise ValueError("The abundances must be non-negative.")
+
+    if method == "log1p":
+        return np.log1p(x)
+    if method == "rclr":
+        present = x > 0
+        logged = np.log(np.where(present, x, 1))
+        counts = present.sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = logged.sum(axis=1, keepdims=True) / counts
+        return np.where(present, logged - np.nan_to_num(means), 0.0)
+
+    totals = x.sum(axis=1, keepdims=True)
+    if (totals == 0).any():
+        raise ValueError(f"Samples without abundances cannot be transformed by {method}.")
+    if delta is None:
+        delta = 1 / x.shape[1] ** 2
+    zeros = x == 0
+    n_zeros = zeros.sum(axis=1, keepdims=True)
+    if (n_zeros * delta >= 1).any():
+        raise ValueError(f"delta={delta} is too large for the zeros of the samples.")
+    replaced = np.where(zeros, delta, x / totals * (1 - n_zeros * delta))
+
+    if method == "mult_replace":
+        return replaced
+    logged = np.log(replaced)
+    if method == "clr":
+        return logged - logged.mean(axis=1, keepdims=True)
+    # alr
+    reference = reference % x.shape[1]
+    return np.delete(logged, reference, axis=1) - logged[:, [reference]]
+
+
+def _transform_sparse(x: "sparse.csr_matrix", method: str) -> "sparse.csr_matrix":
+    """The zero-preserving transforms of the stored entries of a csr matrix."""
+    x = x.copy()
+    x.eliminate_zeros()
+    if x.nnz and x.data.min() < 0:
+        raise ValueError("The abundances must be non-negative.")
+    if method == "log1p":
+        x.data = np.log1p(x.data)
+        return x
+
+    # rclr
+    logged = np.log(x.data)
+    counts = np.diff(x.indptr)
+    rows = np.repeat(np.arange(x.shape[0]), counts)
+    sums = np.bincount(rows, weights=logged, minlength=x.shape[0])
+    means = sums / np.maximum(counts, 1)
+    x.data = logged - means[rows]
+    return x
+
+
 def separate_taxonomy(
     df: pd.DataFrame, eukaryota_keywords: List[str] = None
 ) -> Dict[str, pd.DataFrame]:
@@ -276,6 +443,8 @@ def remove_high_taxa(
     Returns:
         pd.DataFrame: DataFrame with rows where the specified taxonomic level is not None.
     """
+    from tqdm import tqdm
+
     if tax_level not in df.columns:
         raise ValueError(f"Taxonomic level '{tax_level}' not found in DataFrame.")
 
@@ -397,6 +566,7 @@ def map_taxa_up(
     return df1
 
 
+@profiled
 def prevalence_cutoff(
     df: pd.DataFrame, percent: float = 10, skip_columns: int = 2
 ) -> pd.DataFrame:
@@ -425,6 +595,7 @@ def prevalence_cutoff(
     return filtered
 
 
+@profiled
 def prevalence_cutoff_taxonomy(df: pd.DataFrame, percent: float = 10) -> pd.DataFrame:
     """
     Apply a prevalence cutoff to the taxonomy DataFrame, which is not pivoted, removing
@@ -481,6 +652,8 @@ def rarefy_table(df: pd.DataFrame, depth: int = None, axis: int = 1) -> pd.DataF
     Returns:
         pd.DataFrame: A rarefied DataFrame. Samples are ALWAYS in columns.
     """
+    from skbio.stats import subsample_counts
+
     if axis == 1:
         sample_sums = df.sum(axis=0)
     else:
@@ -503,6 +676,7 @@ def rarefy_table(df: pd.DataFrame, depth: int = None, axis: int = 1) -> pd.DataF
         return pd.DataFrame(rarefied, index=df.columns)
 
 
+@profiled
 def fill_taxonomy_placeholders(df: pd.DataFrame, taxonomy_ranks: list) -> pd.DataFrame:
     """
     Fill higher missing taxonomy levels in a DataFrame with placeholders
@@ -552,16 +726,17 @@ def split_metadata(metadata: pd.DataFrame, factor: str) -> Dict[str, list]:
     if not isinstance(metadata[factor].dtype, pd.CategoricalDtype):
         raise ValueError(f"Column '{factor}' is not categorical (object dtype).")
 
-    # for each unique value in the factor column, create a new table and append to a dictionary
-    grouped_data = {}
-    for value in metadata[factor].unique():
-        # filter the dataframe
-        filtered_df = metadata[metadata[factor] == value]
-        # get the ref codes
-        ref_codes = filtered_df.index.tolist()
-        # add to the dictionary
-        grouped_data[value] = ref_codes
+    # one stable sort of the factor codes, the groups are consecutive runs of
+    # it, in the order of their first row like unique()
+    codes, values = pd.factorize(metadata[factor], use_na_sentinel=False)
+    order = np.argsort(codes, kind="stable")
+    ref_codes = metadata.index.to_numpy()[order]
+    ends = np.cumsum(np.bincount(codes, minlength=len(values)))
 
+    grouped_data = {}
+    for value, start, end in zip(values, np.r_[0, ends[:-1]], ends):
+        # missing values have no matching rows, like the comparison with NaN
+        grouped_data[value] = [] if pd.isna(value) else ref_codes[start:end].tolist()
     return grouped_data
 
 
@@ -571,7 +746,8 @@ def split_taxonomic_data(
     """
     Splits the taxonomic data into dictionary of DataFrames for each group.
     The split is based on the ref_code column, which needs to be present in the
-    dataframes.
+    dataframes. The table is sorted by ref_code once, the groups are sliced by
+    the row ranges of their ref_codes, in the original row order.
 
     Args:
         df (pd.DataFrame): The input DataFrame containing taxonomic information.
@@ -585,17 +761,47 @@ def split_taxonomic_data(
     if not isinstance(groups, dict):
         raise ValueError("Groups must be a dictionary.")
 
-    # for each unique value in the factor column, create a new table and append to a dictionary
-    grouped_data = {}
-    for value, ref_codes in groups.items():
-        # filter the dataframe
-        filtered_df = taxonomy[taxonomy.index.isin(ref_codes)]
-        # add to the dictionary
-        grouped_data[value] = filtered_df
+    positions = _group_positions(taxonomy.index, groups)
+    return {value: taxonomy.iloc[positions[value]] for value in groups}
 
-    return grouped_data
+
+def _group_positions(index: pd.Index, groups: Dict[str, list]) -> Dict[str, np.ndarray]:
+    """
+    Row positions of the `ref_code`s of every group in an index, from one sort.
+
+    The rows of every `ref_code` are a range of the stably sorted index, the
+    positions of a group are its ranges in the original row order. Of a
+    MultiIndex, the `ref_code` level is used, or the first level without one.
+    """
+    if isinstance(index, pd.MultiIndex):
+        level = "ref_code" if "ref_code" in index.names else 0
+        labels = index.get_level_values(level)
+    else:
+        labels = index
+    codes, uniques = pd.factorize(labels)
+    order = np.argsort(codes, kind="stable")
+    ends = np.cumsum(np.bincount(codes[codes >= 0], minlength=len(uniques)))
+    ends += (codes < 0).sum()
+    starts = ends - np.bincount(codes[codes >= 0], minlength=len(uniques))
+
+    positions = {}
+    for value, ref_codes in groups.items():
+        found = pd.Index(uniques).get_indexer(pd.unique(pd.Series(list(ref_codes))))
+        found = np.sort(found[found >= 0])
+        if not len(found):
+            positions[value] = np.array([], dtype=np.int64)
+            continue
+        lengths = ends[found] - starts[found]
+        offsets = np.repeat(starts[found] - np.cumsum(lengths) + lengths, lengths)
+        rows = order[offsets + np.arange(lengths.sum())]
+        if len(rows) > 1 and (np.diff(rows) < 0).any():
+            # the ref_codes are interleaved in the table
+            rows = np.sort(rows)
+        positions[value] = rows
+    return positions
 
 
+@profiled
 def split_taxonomic_data_pivoted(
     taxonomy: pd.DataFrame, groups: Dict[str, list]
 ) -> Dict[str, pd.DataFrame]:
@@ -604,6 +810,7 @@ def split_taxonomic_data_pivoted(
     The split is based on the column names which need to match between the taxonomy DataFrame
     and the groups lists. The DataFrame should have a 'ncbi_tax_id' and 'taxonomic_concat' which
     will serve as index of the resulting DataFrames.
+    See `GroupedTaxonomy` for a view of the groups which does not copy them.
 
     Args:
         taxonomy (pd.DataFrame): The input DataFrame containing taxonomic information.
@@ -617,27 +824,195 @@ def split_taxonomic_data_pivoted(
     if not isinstance(groups, dict):
         raise ValueError("Groups must be a dictionary.")
 
-    # for each unique value in the factor column, create a new table and append to a dictionary
+    # the rows of every group are selected before its columns are copied
+    grouped = GroupedTaxonomy(taxonomy, groups)
     grouped_data = {}
-    for value, ref_codes in groups.items():
-        # filter the dataframe
-        filtered_df = taxonomy[ref_codes]
+    for value in groups:
         # remove rows with all zeros and print how many rows were removed
-        len_before = len(filtered_df)
-        filtered_df = filtered_df[filtered_df[ref_codes].sum(axis=1) != 0]
-        len_after = len(filtered_df)
-        print(f"Removed {len_before - len_after} rows with all zeros for {value}.")
+        nonzero = grouped.nonzero_rows(value)
+        print(f"Removed {len(nonzero) - nonzero.sum()} rows with all zeros for {value}.")
         # check if the dataframe is empty
-        if filtered_df.empty:
+        if not nonzero.any():
             print(f"Warning: No data for {value} in the taxonomic data.")
             continue
 
         # add to the dictionary
-        grouped_data[value] = filtered_df
+        grouped_data[value] = grouped[value]
 
     return grouped_data
 
 
+class GroupedTaxonomy(Mapping):
+    """
+    Grouped view of a pivoted taxonomy, the lazy counterpart of
+    `split_taxonomic_data_pivoted`.
+
+    The view holds the one matrix of the table and the column positions of the
+    samples of every group. The rows with non-zero abundances in a group are
+    computed on first use. Indexing a group returns the same DataFrame as
+    `split_taxonomic_data_pivoted`, built from that group's columns only, so
+    iterating the groups (e.g. `spearman_from_taxonomy(grouped)`) holds one
+    group at a time. The view has no content fingerprint, so calls of memoised
+    functions on it are computed, not cached (see `momics.cache.memoize`).
+    The group-wise sums, prevalence and Shannon index are computed on the whole
+    matrix without copying the groups.
+
+    Args:
+        taxonomy (pd.DataFrame or AbundanceMatrix): Pivoted taxonomy, taxa in rows
+            and samples in columns, or a `momics.loader.AbundanceMatrix`. The values
+            of a sparse AbundanceMatrix are not densified.
+        groups (Dict[str, list]): Factor values and their sample (column) names,
+            see `split_metadata`.
+
+    Raises:
+        ValueError: If `groups` is not a dictionary.
+        KeyError: If a sample is not in the taxonomy.
+
+    Example:
+        >>> grouped = GroupedTaxonomy(pivot, split_metadata(metadata, "season"))
+        >>> grouped.prevalence()
+        >>> correlations = spearman_from_taxonomy(grouped)
+    """
+
+    def __init__(
+        self, taxonomy: Union[pd.DataFrame, "AbundanceMatrix"], groups: Dict[str, list]
+    ):
+        if not isinstance(groups, dict):
+            raise ValueError("Groups must be a dictionary.")
+        if isinstance(taxonomy, pd.DataFrame):
+            self.index = taxonomy.index
+            self.samples = pd.Index(taxonomy.columns)
+            self._values = taxonomy.to_numpy()
+        else:
+            self.index = taxonomy.index
+            self.samples = pd.Index(taxonomy.columns)
+            # csc columns are the samples, sliced without densifying
+            self._values = (
+                taxonomy.csr.T.tocsc() if taxonomy.csr is not None else taxonomy.values.T
+            )
+
+        self._columns = {}
+        for value, samples in groups.items():
+            positions = self.samples.get_indexer(samples)
+            if (positions < 0).any():
+                missing = [s for s, p in zip(samples, positions) if p < 0]
+                raise KeyError(f"Samples of {value} not in the taxonomy: {missing}")
+            self._columns[value] = positions
+        self._nonzero = {}
+
+    def __getitem__(self, group) -> pd.DataFrame:
+        """Abundances of the group's samples without the all-zero rows."""
+        columns = self._columns[group]
+        rows = self.nonzero_rows(group)
+        if isinstance(self._values, np.ndarray):
+            block = self._values[np.ix_(np.flatnonzero(rows), columns)]
+        else:
+            block = self._values[:, columns][rows].toarray()
+        return pd.DataFrame(
+            block, index=self.index[rows], columns=self.samples[columns]
+        )
+
+    def __iter__(self):
+        # groups without any non-zero abundance are skipped, like
+        # split_taxonomic_data_pivoted
+        return (group for group in self._columns if self.nonzero_rows(group).any())
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def columns(self, group) -> np.ndarray:
+        """Positions of the samples of a group in the table columns."""
+        return self._columns[group]
+
+    def nonzero_rows(self, group) -> np.ndarray:
+        """
+        Boolean mask of the rows with a non-zero abundance in the group. Like the
+        `sum(axis=1) != 0` filter of `split_taxonomic_data_pivoted`, NaN values are
+        skipped, so rows of only zeros and NaN are removed.
+        """
+        if group not in self._nonzero:
+            block = self._values[:, self._columns[group]]
+            if isinstance(block, np.ndarray):
+                sums = np.nansum(block, axis=1)
+            else:
+                # the column selection is a copy of the values
+                block.data[np.isnan(block.data)] = 0
+                sums = np.asarray(block.sum(axis=1)).ravel()
+            self._nonzero[group] = sums != 0
+        return self._nonzero[group]
+
+    def sums(self) -> pd.DataFrame:
+        """Total abundance of every taxon (row) in every group (column)."""
+        return self._reduce(lambda block: block)
+
+    def prevalence(self) -> pd.DataFrame:
+        """Percentage of the samples of every group in which a taxon (row) is present."""
+        sizes = np.array([len(c) for c in self._columns.values()])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._reduce(lambda block: block > 0) * 100 / sizes
+
+    def shannon(self) -> pd.Series:
+        """
+        Shannon index of the samples, like `momics.diversity.calculate_shannon_index`.
+
+        Returns:
+            pd.Series: The index of every sample, indexed by group and sample.
+        """
+        from scipy import sparse
+
+        values = self._values
+        totals = np.asarray(values.sum(axis=0), dtype=np.float64).ravel()
+        if sparse.issparse(values):
+            counts = sparse.csc_matrix(values, dtype=np.float64)
+            fractions = counts.data / np.repeat(totals, np.diff(counts.indptr))
+            entropy = sparse.csc_matrix(
+                (-fractions * np.log(fractions), counts.indices, counts.indptr),
+                shape=counts.shape,
+            )
+            shannon = np.asarray(entropy.sum(axis=0)).ravel()
+        else:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                fractions = values / totals
+                logs = np.where(fractions > 0, np.log(fractions), 0)
+                shannon = -(fractions * logs).sum(axis=0)
+        shannon[totals == 0] = np.nan
+
+        return pd.concat(
+            {
+                group: pd.Series(shannon[columns], index=self.samples[columns])
+                for group, columns in self._columns.items()
+            }
+        )
+
+    def _reduce(self, transform) -> pd.DataFrame:
+        """Sums of the transformed values over the samples of every group."""
+        from scipy import sparse
+
+        # samples x groups indicator, a sample may be in several groups
+        positions = np.concatenate(list(self._columns.values()))
+        group_codes = np.repeat(
+            np.arange(len(self._columns)), [len(c) for c in self._columns.values()]
+        )
+        indicator = sparse.csr_matrix(
+            (np.ones(len(positions)), (positions, group_codes)),
+            shape=(len(self.samples), len(self._columns)),
+        )
+        result = np.empty((len(self.index), len(self._columns)))
+        # blocks of rows bound the transformed copy
+        for start in range(0, len(self.index), GROUPED_BLOCK_ROWS):
+            stop = start + GROUPED_BLOCK_ROWS
+            block = transform(self._values[start:stop])
+            product = indicator.T @ (
+                block.T.astype(np.float64) if not sparse.issparse(block) else block.T
+            )
+            result[start:stop] = (
+                product.toarray() if sparse.issparse(product) else product
+            ).T
+        return pd.DataFrame(result, index=self.index, columns=list(self._columns))
+
+
+@profiled
+@memoize
 def compute_bray_curtis(
     df: pd.DataFrame, skip_cols: int = 0, direction: str = "samples"
 ) -> pd.DataFrame:
@@ -653,16 +1028,18 @@ def compute_bray_curtis(
     Returns:
         pd.DataFrame: A DataFrame containing the Bray-Curtis dissimilarity matrix.
     """
+    from .distances import distance_matrix
+
     if direction not in ["samples", "taxa"]:
         raise ValueError("Direction must be either 'samples' or 'taxa'.")
 
     if direction == "samples":
-        # Use the sample IDs as the index
-        ids = df.columns[skip_cols:].astype(str).tolist()
-        result = beta_diversity(
-            metric="braycurtis", counts=df.iloc[:, skip_cols:].T, ids=ids
-        )
+        # blocked kernel, equal to skbio within floating point tolerance
+        return distance_matrix(df.iloc[:, skip_cols:], metric="braycurtis")
     elif direction == "taxa":
+        # skbio is slow to import, only the taxa direction needs it
+        from skbio.diversity import beta_diversity
+
         ids = df.index.get_level_values("ncbi_tax_id")
         result = beta_diversity(
             metric="braycurtis", counts=df.iloc[:, skip_cols:], ids=ids
@@ -672,10 +1049,148 @@ def compute_bray_curtis(
     return bray_curtis_df
 
 
+@profiled
+def bray_curtis_between(df_a: pd.DataFrame, df_b: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bray-Curtis dissimilarity between the samples of two pivoted tables, i.e. the
+    off-diagonal block of `compute_bray_curtis` of the two tables joined.
+
+    The tables are aligned on the union of their features, missing features are
+    zero abundance.
+
+    Args:
+        df_a (pd.DataFrame): Features in rows, samples in columns.
+        df_b (pd.DataFrame): Features in rows, samples in columns.
+
+    Returns:
+        pd.DataFrame: Dissimilarities of the samples of `df_a` (rows) and
+            `df_b` (columns).
+    """
+    features = df_a.index.union(df_b.index)
+    a = df_a.reindex(features, fill_value=0).to_numpy(dtype=np.float64).T
+    b = df_b.reindex(features, fill_value=0).to_numpy(dtype=np.float64).T
+    return pd.DataFrame(
+        bray_curtis_block(a, b),
+        index=df_a.columns.astype(str),
+        columns=df_b.columns.astype(str),
+    )
+
+
+def bray_curtis_block(
+    x: Union[np.ndarray, "sparse.csr_matrix"], y: Union[np.ndarray, "sparse.csr_matrix"]
+) -> np.ndarray:
+    """
+    Bray-Curtis dissimilarities between the rows of two samples x features
+    matrices of non-negative abundances.
+
+    Computed by the blocked kernel of `momics.distances.pairwise_distances`,
+    sparse input is not densified.
+
+    Args:
+        x (np.ndarray or sparse.csr_matrix): Samples x features.
+        y (np.ndarray or sparse.csr_matrix): Samples x features, same features as `x`.
+
+    Returns:
+        np.ndarray: The dissimilarities of the rows of `x` (rows) and `y` (columns),
+            NaN for pairs of empty samples.
+    """
+    from .distances import pairwise_distances
+
+    return pairwise_distances(x, y, metric="braycurtis")
+
+
+class BrayCurtisMatrix:
+    """
+    Bray-Curtis distance matrix of a changing selection of samples, which keeps
+    the computed pairs.
+
+    When the selection grows, only the blocks of the samples not computed yet are
+    computed with `bray_curtis_block`. Smaller selections are sliced from the
+    computed pairs.
+
+    Args:
+        data (pd.DataFrame or AbundanceMatrix): Abundances of all the samples which
+            can be selected, features in rows and samples in columns. The values
+            of a sparse `momics.loader.AbundanceMatrix` are not densified.
+
+    Example:
+        >>> distances = BrayCurtisMatrix(pivot)
+        >>> beta = distances.select(samples_of_observatory_a)
+        >>> beta = distances.select(samples_of_observatories_a_and_b)  # only b computed
+    """
+
+    def __init__(self, data: Union[pd.DataFrame, "AbundanceMatrix"]):
+        if isinstance(data, pd.DataFrame):
+            self.samples = pd.Index(data.columns)
+            self._values = data.to_numpy(dtype=np.float64).T
+        elif data.csr is not None:
+            self.samples = pd.Index(data.columns)
+            self._values = data.csr
+        else:
+            self.samples = pd.Index(data.columns)
+            self._values = np.asarray(data.values, dtype=np.float64)
+        # positions in `samples` of the computed rows/columns of `_distances`
+        self._positions = []
+        self._distances = np.zeros((0, 0))
+
+    @property
+    def computed(self) -> pd.Index:
+        """Samples with computed distances to each other."""
+        return self.samples[self._positions]
+
+    def select(self, samples: List) -> pd.DataFrame:
+        """
+        Distance matrix of the selected samples.
+
+        Args:
+            samples (List): Sample labels, in the order of the result.
+
+        Returns:
+            pd.DataFrame: The distances, labelled like `compute_bray_curtis`.
+
+        Raises:
+            KeyError: If a sample is not in the data.
+        """
+        positions = self.samples.get_indexer(samples)
+        if (positions < 0).any():
+            missing = [s for s, p in zip(samples, positions) if p < 0]
+            raise KeyError(f"Samples not in the data: {missing}")
+
+        known = set(self._positions)
+        new = [p for p in dict.fromkeys(positions.tolist()) if p not in known]
+        if new:
+            self._extend(new)
+
+        lookup = {p: k for k, p in enumerate(self._positions)}
+        rows = [lookup[p] for p in positions]
+        ids = self.samples[positions].astype(str).tolist()
+        return pd.DataFrame(
+            self._distances[np.ix_(rows, rows)], index=ids, columns=ids
+        )
+
+    def _extend(self, new: List[int]):
+        """Compute the blocks of the new samples and append them."""
+        new_rows = self._values[new]
+        new_new = bray_curtis_block(new_rows, new_rows)
+        np.fill_diagonal(new_new, 0)
+        if self._positions:
+            cross = bray_curtis_block(new_rows, self._values[self._positions])
+            self._distances = np.block(
+                [[self._distances, cross.T], [cross, new_new]]
+            )
+        else:
+            self._distances = new_new
+        self._positions = self._positions + new
+        logger.debug(f"Computed the distances of {len(new)} new samples")
+
+
+@profiled
 def fdr_pvals(p_spearman_df: pd.DataFrame, pval_cutoff: float) -> pd.DataFrame:
     """
     Apply FDR correction to the p-values DataFrame using Benjamini/Hochberg (non-negative)
     method. This function extracts the upper triangle of the p-values DataFrame.
+    NaN p-values, e.g. the untested pairs of `momics.stats.permutation_edge_test`,
+    are left out of the correction and stay NaN.
 
     Args:
         p_spearman_df (pd.DataFrame): DataFrame containing p-values.
@@ -684,24 +1199,18 @@ def fdr_pvals(p_spearman_df: pd.DataFrame, pval_cutoff: float) -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame with FDR corrected p-values.
     """
-    # Extract upper triangle p-values
-    # Handle MultiIndex for rows/columns if present
-    if isinstance(p_spearman_df.index, pd.MultiIndex) or isinstance(
-        p_spearman_df.columns, pd.MultiIndex
-    ):
-        # Use get_level_values(0) to ensure correct shape for np.triu_indices_from
-        mask = np.triu(np.ones(p_spearman_df.shape), k=1).astype(bool)
-        pval_array = p_spearman_df.values[mask]
-    else:
-        pval_array = (
-            p_spearman_df.where(np.triu(np.ones(p_spearman_df.shape), k=1).astype(bool))
-            .stack()
-            .values
+    from statsmodels.stats.multitest import multipletests
+
+    # Extract upper triangle p-values, positionally for MultiIndex rows/columns too
+    # and with their NaN, in the order of np.triu_indices_from
+    pval_array = p_spearman_df.values[np.triu_indices_from(p_spearman_df, k=1)]
+    # Apply FDR correction to the tested pairs
+    tested = ~np.isnan(pval_array)
+    pvals_corrected = np.full(pval_array.shape, np.nan)
+    if tested.any():
+        _rejected, pvals_corrected[tested], _, _ = multipletests(
+            pval_array[tested], alpha=pval_cutoff, method="fdr_bh"
         )
-    # Apply FDR correction
-    _rejected, pvals_corrected, _, _ = multipletests(
-        pval_array, alpha=pval_cutoff, method="fdr_bh"
-    )
 
     # Map corrected p-values back to a DataFrame
     pvals_fdr = p_spearman_df.copy()
@@ -0,0 +1,280 @@
+"""
+Polars backend of the taxonomy preprocessing chain of
+`momics.utils.taxonomy_common_preprocess01`.
+
+The placeholder fill, high taxa removal, prevalence cutoff and pivot are
+expressed as lazy Polars queries over Arrow string columns, which Polars
+optimises and runs multithreaded. pandas objects are converted only at the
+boundary, the results equal those of the pandas functions in `momics.taxonomy`.
+
+Requires polars, install it with 'pip install marine-omics[polars]'.
+"""
+
+import logging
+import pandas as pd
+from typing import Dict, List
+
+from .profiling import profiled
+
+# logger setup
+FORMAT = "%(levelname)s | %(name)s | %(message)s"
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(__name__)
+
+# ranks of the feature labels of the pivoted tables, see `momics.taxonomy.taxonomic_concat`
+CONCAT_PREFIXES = {
+    "superkingdom": "sk__",
+    "kingdom": "k__",
+    "phylum": "p__",
+    "class": "c__",
+    "order": "o__",
+    "family": "f__",
+    "genus": "g__",
+    "species": "s__",
+}
+
+
+def _import_polars():
+    try:
+        import polars as pl
+    except ImportError as e:
+        raise ImportError(
+            "The polars backend requires polars, install it with "
+            "'pip install marine-omics[polars]'."
+        ) from e
+    return pl
+
+
+def fill_taxonomy_placeholders_lazy(
+    lf: "pl.LazyFrame", taxonomy_ranks: List[str], null_labels: Dict[str, str] = None
+) -> "pl.LazyFrame":
+    """
+    Lazy version of `momics.taxonomy.fill_taxonomy_placeholders`, which replaces
+    empty ranks by 'unclassified_<lower rank value>'.
+
+    Args:
+        lf (pl.LazyFrame): Taxonomy table.
+        taxonomy_ranks (List[str]): Ordered ranks from higher to lower.
+        null_labels (Dict[str, str], optional): Text of a missing lower rank in the
+            placeholder per rank, 'None' or 'nan' in the pandas version depending
+            on the missing value. Defaults to None, 'None' for all ranks.
+
+    Returns:
+        pl.LazyFrame: The query with the placeholders filled.
+    """
+    pl = _import_polars()
+
+    null_labels = null_labels or {}
+    for i in range(2, len(taxonomy_ranks)):
+        lower = taxonomy_ranks[-i + 1]
+        current = taxonomy_ranks[-i]
+        # one rank at a time, so that the placeholders propagate upwards
+        lf = lf.with_columns(
+            pl.when(pl.col(current) == "")
+            .then(
+                pl.lit("unclassified_")
+                + pl.col(lower).fill_null(null_labels.get(lower, "None"))
+            )
+            .otherwise(pl.col(current))
+            .alias(current)
+        )
+    return lf
+
+
+def remove_high_taxa_lazy(
+    lf: "pl.LazyFrame",
+    taxonomy_ranks: List[str],
+    tax_level: str,
+    sample_column: str,
+    strict: bool = True,
+) -> "pl.LazyFrame":
+    """
+    Lazy version of `momics.taxonomy.remove_high_taxa`.
+
+    With `strict`, the rows of each taxon at `tax_level` are merged into the
+    first row of the taxon which is not classified at the rank below (the anchor):
+    the anchor's abundance becomes the taxon's total per sample and the other
+    rows of the taxon are removed. Taxa without an anchor are kept as they are.
+
+    Args:
+        lf (pl.LazyFrame): Taxonomy table with `ncbi_tax_id` and `abundance` columns.
+        taxonomy_ranks (List[str]): Ordered ranks from higher to lower.
+        tax_level (str): The rank to filter by.
+        sample_column (str): Column of the sample labels.
+        strict (bool): Whether to map the lower taxa up to `tax_level`.
+
+    Returns:
+        pl.LazyFrame: The query with the high taxa removed.
+
+    Raises:
+        ValueError: If `tax_level` is not a column.
+    """
+    pl = _import_polars()
+
+    if tax_level not in lf.collect_schema().names():
+        raise ValueError(f"Taxonomic level '{tax_level}' not found in DataFrame.")
+
+    lf = lf.filter(pl.col(tax_level).is_not_null())
+    level = taxonomy_ranks.index(tax_level)
+    if not strict or level + 1 == len(taxonomy_ranks):
+        return lf
+
+    lower = taxonomy_ranks[level + 1]
+    anchors = (
+        lf.filter(pl.col(lower).is_null())
+        .group_by(tax_level, maintain_order=True)
+        .agg(pl.col("ncbi_tax_id").first().alias("_anchor"))
+    )
+    totals = lf.group_by([sample_column, tax_level]).agg(
+        pl.col("abundance").sum().alias("_total")
+    )
+    is_anchor = pl.col("ncbi_tax_id") == pl.col("_anchor")
+    return (
+        lf.join(anchors, on=tax_level, how="left", maintain_order="left")
+        .join(totals, on=[sample_column, tax_level], how="left", maintain_order="left")
+        .filter(pl.col("_anchor").is_null() | is_anchor)
+        .with_columns(
+            pl.when(is_anchor)
+            .then(pl.col("_total").cast(lf.collect_schema()["abundance"]))
+            .otherwise(pl.col("abundance"))
+            .alias("abundance")
+        )
+        .drop(["_anchor", "_total"])
+    )
+
+
+def prevalence_cutoff_taxonomy_lazy(
+    lf: "pl.LazyFrame", sample_column: str, percent: float = 10
+) -> "pl.LazyFrame":
+    """
+    Lazy version of `momics.taxonomy.prevalence_cutoff_taxonomy`, which keeps the
+    taxa with abundance above `percent` % of their sample's total, grouped by
+    sample in the order of first appearance.
+
+    Args:
+        lf (pl.LazyFrame): Taxonomy table.
+        sample_column (str): Column of the sample labels.
+        percent (float): The threshold as a percentage of the sample sum.
+
+    Returns:
+        pl.LazyFrame: The filtered query.
+    """
+    pl = _import_polars()
+
+    return (
+        lf.with_row_index("_row")
+        .filter(
+            pl.col("abundance")
+            > pl.col("abundance").sum().over(sample_column) * (percent / 100)
+        )
+        .sort(pl.col("_row").min().over(sample_column), "_row")
+        .drop("_row")
+    )
+
+
+def pivot_taxonomic_data_lazy(
+    lf: "pl.LazyFrame", sample_column: str, percent: float = None
+) -> pd.DataFrame:
+    """
+    Version of `momics.taxonomy.pivot_taxonomic_data` followed by
+    `prevalence_cutoff(..., skip_columns=0)`, which aggregates the long table
+    lazily and filters it before pivoting.
+
+    Args:
+        lf (pl.LazyFrame): Taxonomy table.
+        sample_column (str): Column of the sample labels.
+        percent (float, optional): Prevalence threshold as a percentage of
+            samples. Defaults to None, no cutoff.
+
+    Returns:
+        pd.DataFrame: The pivot table of features x samples.
+    """
+    pl = _import_polars()
+
+    label = pl.col("ncbi_tax_id").cast(pl.Utf8)
+    for rank, prefix in CONCAT_PREFIXES.items():
+        label = label + pl.lit(f";{prefix}") + pl.col(rank).fill_null("")
+
+    long = (
+        lf.filter(pl.col("abundance").is_not_null())
+        .with_columns(label.alias("taxonomic_concat"))
+        .group_by(["ncbi_tax_id", "taxonomic_concat", sample_column])
+        # pivot_table averages duplicates and the pivot is cast to int
+        .agg(pl.col("abundance").mean().cast(pl.Int64))
+        .collect()
+    )
+    # samples without any feature left after the cutoff stay in the pivot
+    samples = sorted(long[sample_column].unique().to_list())
+    if percent is not None:
+        prevalence = (pl.col("abundance") > 0).sum().over(
+            ["ncbi_tax_id", "taxonomic_concat"]
+        )
+        long = long.filter(prevalence >= len(samples) * (percent / 100))
+
+    wide = (
+        long.pivot(
+            on=sample_column,
+            index=["ncbi_tax_id", "taxonomic_concat"],
+            values="abundance",
+        )
+        .to_pandas()
+        .set_index(["ncbi_tax_id", "taxonomic_concat"])
+        .sort_index()
+    )
+    return wide.reindex(columns=samples).fillna(0).astype(int)
+
+
+@profiled
+def taxonomy_common_preprocess_polars(
+    df: pd.DataFrame,
+    high_taxon: str,
+    mapping: bool,
+    prevalence_cutoff_value: float,
+    taxonomy_ranks: List[str],
+    pivot: bool = False,
+) -> pd.DataFrame:
+    """
+    Polars backend of `momics.utils.taxonomy_common_preprocess01`.
+
+    Args:
+        df (pd.DataFrame): Taxonomy table indexed by the sample labels, or by
+            samples and `ncbi_tax_id`.
+        high_taxon (str): Rank to remove the higher taxa of, or "None".
+        mapping (bool): Whether to map the lower taxa up to `high_taxon`.
+        prevalence_cutoff_value (float): Prevalence threshold in percent.
+        taxonomy_ranks (List[str]): Ordered ranks from higher to lower.
+        pivot (bool): Whether to return the pivot table. Defaults to False.
+
+    Returns:
+        pd.DataFrame: The pivot table, or the filtered long table with the index
+            of `df`.
+    """
+    pl = _import_polars()
+
+    index_names = list(df.index.names)
+    flat = df.reset_index()
+    sample_column = flat.columns[0]
+
+    # missing ranks are None or NaN in pandas, which give different placeholders
+    null_labels = {
+        rank: "nan" if (values != values).any() else "None"
+        for rank, values in ((r, flat[r].to_numpy()) for r in taxonomy_ranks)
+    }
+    lf = pl.from_pandas(flat).lazy()
+    lf = fill_taxonomy_placeholders_lazy(lf, taxonomy_ranks, null_labels)
+
+    logger.info("Preprocessing taxonomy...")
+    if high_taxon != "None":
+        lf = remove_high_taxa_lazy(
+            lf, taxonomy_ranks, high_taxon, sample_column, strict=mapping
+        )
+
+    if pivot:
+        out = pivot_taxonomic_data_lazy(lf, sample_column, prevalence_cutoff_value)
+        out.columns.name = index_names[0]
+        return out
+
+    out = prevalence_cutoff_taxonomy_lazy(
+        lf, sample_column, prevalence_cutoff_value
+    ).collect()
+    return out.to_pandas().set_index(list(flat.columns[: len(index_names)]))
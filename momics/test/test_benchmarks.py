@@ -0,0 +1,104 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from momics.constants import TAXONOMY_RANKS
+from momics.benchmarks import (
+    synthetic_emobon,
+    synthetic_functional,
+    synthetic_taxonomy,
+    taxonomy_hierarchy,
+    run_benchmarks,
+    compare_to_baseline,
+)
+
+TINY_SCALE = {
+    "n_samples": 12,
+    "n_taxa": 200,
+    "taxa_per_sample": 50,
+    "n_terms": 100,
+    "terms_per_sample": 30,
+    "network_taxa": 20,
+}
+
+
+def test_synthetic_taxonomy():
+    """Tests the layout and determinism of the synthetic taxonomy table."""
+    df = synthetic_taxonomy(n_samples=20, n_taxa=300, taxa_per_sample=40, seed=1)
+
+    assert df.columns.tolist() == ["ref_code", "ncbi_tax_id", "abundance"] + TAXONOMY_RANKS
+    assert df["ref_code"].nunique() == 20
+    assert (df.groupby("ref_code").size() <= 40).all()
+    assert not df.duplicated(["ref_code", "ncbi_tax_id"]).any()
+    assert (df["abundance"] > 0).all()
+    pd.testing.assert_frame_equal(
+        df, synthetic_taxonomy(n_samples=20, n_taxa=300, taxa_per_sample=40, seed=1)
+    )
+
+
+def test_taxonomy_hierarchy():
+    """Tests that every name has a single parent at the rank above."""
+    hierarchy = taxonomy_hierarchy(2000, seed=0)
+
+    assert hierarchy["ncbi_tax_id"].is_unique
+    assert hierarchy["superkingdom"].notna().all()
+    for child, parent in [("genus", "family"), ("class", "phylum"), ("species", "genus")]:
+        parents = hierarchy.dropna(subset=[child, parent]).groupby(child)[parent]
+        assert (parents.nunique() == 1).all()
+    # only eukaryotes have a kingdom
+    assert (
+        hierarchy.loc[hierarchy["kingdom"].notna(), "superkingdom"] == "Eukaryota"
+    ).all()
+
+
+@pytest.mark.parametrize(
+    "table_name, key_column",
+    [("go", "id"), ("go_slim", "id"), ("ips", "accession"), ("ko", "entry"), ("pfam", "entry")],
+)
+def test_synthetic_functional(table_name, key_column):
+    """Tests the key columns of the synthetic functional tables."""
+    df = synthetic_functional(table_name, n_samples=5, n_terms=50, terms_per_sample=10)
+    assert key_column in df.columns
+    assert df.groupby("ref_code")[key_column].nunique().max() <= 10
+
+    with pytest.raises(ValueError):
+        synthetic_functional("unknown")
+
+
+def test_synthetic_emobon():
+    """Tests that metadata and tables share the samples."""
+    params = {k: v for k, v in TINY_SCALE.items() if k != "network_taxa"}
+    metadata, tables = synthetic_emobon(**params)
+
+    assert set(tables) == {"ssu", "lsu", "go", "go_slim", "ips", "ko", "pfam"}
+    assert metadata["ref_code"].is_unique
+    assert metadata["source_mat_id"].is_unique
+    for df in tables.values():
+        assert set(df["ref_code"]) <= set(metadata["ref_code"])
+
+
+def test_run_benchmarks():
+    """Tests a benchmark run and its comparison to a baseline."""
+    results = run_benchmarks(
+        [TINY_SCALE], names=["pivot_taxonomic_data", "bray_curtis"], repeat=1
+    )
+    assert results["status"].tolist() == ["ok", "ok"]
+    assert (results["time_s"] > 0).all()
+    assert (results["peak_mb"] > 0).all()
+
+    baseline = results.copy()
+    baseline["time_s"] = results["time_s"] * np.array([1.0, 0.5])
+    comparison = compare_to_baseline(results, baseline, tolerance=0.25)
+    assert comparison["regression"].tolist() == [False, True]
+
+    with pytest.raises(ValueError):
+        run_benchmarks([TINY_SCALE], names=["unknown"])
+
+
+def test_import_times():
+    """Tests that the taxonomy math imports without the heavy dependencies."""
+    from momics.benchmarks import import_times
+
+    result = import_times(["momics.taxonomy", "momics.stats"], repeat=1)
+    assert result["status"].tolist() == ["ok", "ok"]
+    assert result["heavy_dependencies"].tolist() == ["", ""]
@@ -0,0 +1,184 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from momics.cache import (
+    fingerprint,
+    memoize,
+    enable_cache,
+    disable_cache,
+    clear_cache,
+    cache_stats,
+    MemoryCache,
+    FINGERPRINT_BLOCKS,
+    FINGERPRINT_BLOCK_ROWS,
+)
+from momics.taxonomy import pivot_taxonomic_data
+
+
+@pytest.fixture
+def memory_cache():
+    enable_cache("memory", maxsize=8)
+    clear_cache()
+    yield
+    clear_cache()
+    disable_cache()
+
+
+def _taxonomy():
+    return pd.DataFrame(
+        {
+            "ref_code": ["s1", "s1", "s2", "s3"],
+            "ncbi_tax_id": [1, 2, 1, 3],
+            "abundance": [10, 5, 3, 7],
+            "superkingdom": ["Bacteria"] * 4,
+            "kingdom": [None] * 4,
+            "phylum": ["P1", "P2", "P1", "P3"],
+            "class": [None] * 4,
+            "order": [None] * 4,
+            "family": [None] * 4,
+            "genus": [None] * 4,
+            "species": [None] * 4,
+        }
+    )
+
+
+def test_fingerprint():
+    """Tests that fingerprints follow the content, not the object identity."""
+    df = pd.DataFrame({"a": np.arange(10), "b": np.arange(10.0)})
+    assert fingerprint(df) == fingerprint(df.copy())
+
+    changed = df.copy()
+    changed.loc[3, "b"] = -1.0
+    assert fingerprint(df) != fingerprint(changed)
+    assert fingerprint(df) != fingerprint(df.astype({"a": float}))
+    assert fingerprint(df) != fingerprint(df.rename(columns={"a": "c"}))
+    assert fingerprint({"x": df, "k": 1}) == fingerprint({"k": 1, "x": df.copy()})
+    assert fingerprint((df, "eigh")) != fingerprint((df, "fsvd"))
+
+
+def test_fingerprint_sampled():
+    """Tests that large frames are sampled unless a full hash is requested."""
+    n = FINGERPRINT_BLOCKS * FINGERPRINT_BLOCK_ROWS * 10
+    df = pd.DataFrame({"a": np.zeros(n)})
+    changed = df.copy()
+    # between the first and the second sampled block
+    changed.iloc[FINGERPRINT_BLOCK_ROWS + 1, 0] = 1.0
+
+    assert fingerprint(df) == fingerprint(changed)
+    assert fingerprint(df, full=True) != fingerprint(changed, full=True)
+
+
+def test_memory_cache_lru():
+    """Tests the eviction order of the memory backend."""
+    store = MemoryCache(maxsize=2)
+    store.set("a", 1)
+    store.set("b", 2)
+    store.get("a")
+    store.set("c", 3)
+    assert len(store) == 2
+    assert store.get("a") == 1
+    with pytest.raises(KeyError):
+        store.get("b")
+
+
+def test_memoize(memory_cache):
+    """Tests hits, misses and argument binding of a memoised function."""
+    calls = []
+
+    @memoize
+    def scale(df, factor=2):
+        calls.append(factor)
+        return df * factor
+
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    first = scale(df)
+    second = scale(df.copy(), factor=2)
+    pd.testing.assert_frame_equal(first, second)
+    assert calls == [2]
+
+    # the returned frame is a copy of the stored one
+    second.loc[0, "a"] = 100
+    assert scale(df).loc[0, "a"] == 2
+
+    scale(df, 3)
+    assert calls == [2, 3]
+
+    stats = cache_stats()
+    name = f"{scale.__module__}.{scale.__qualname__}"
+    assert stats.loc[name, "hits"] == 2
+    assert stats.loc[name, "misses"] == 2
+
+
+def test_memoize_objects(memory_cache):
+    """Tests that objects without a content fingerprint are not cached."""
+    calls = []
+
+    class Table:
+        def __init__(self, value):
+            self.value = value
+
+    @memoize
+    def value_of(table):
+        calls.append(1)
+        return table.value
+
+    assert value_of(Table(1)) == 1
+    assert value_of(Table(2)) == 2
+    assert len(calls) == 2
+    with pytest.raises(TypeError):
+        fingerprint(Table(1))
+
+
+def test_memoize_container_copy(memory_cache):
+    """Tests that dictionary results are deep copies of the stored one."""
+
+    @memoize
+    def split(df):
+        return {"a": {"correlation": df.copy()}}
+
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    result = split(df)
+    result["a"]["p_vals_fdr"] = df
+    result["a"]["correlation"].loc[0, "a"] = 100
+    assert list(split(df)["a"]) == ["correlation"]
+    assert split(df)["a"]["correlation"].loc[0, "a"] == 1
+
+
+def test_memoize_disabled():
+    """Tests that functions are always evaluated with the cache disabled."""
+    disable_cache()
+    calls = []
+
+    @memoize
+    def total(df):
+        calls.append(1)
+        return df.sum()
+
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    total(df)
+    total(df)
+    assert len(calls) == 2
+
+
+def test_memoize_disk(tmp_path):
+    """Tests the disk backend on a decorated momics function."""
+    enable_cache("disk", folder=str(tmp_path))
+    clear_cache()
+    try:
+        expected = pivot_taxonomic_data(_taxonomy())
+        result = pivot_taxonomic_data(_taxonomy())
+        pd.testing.assert_frame_equal(result, expected)
+        assert len(list(tmp_path.glob("*.pkl"))) == 1
+        assert cache_stats()["hits"].sum() == 1
+    finally:
+        clear_cache()
+        disable_cache()
+
+
+def test_enable_cache_invalid():
+    """Tests the backend validation."""
+    with pytest.raises(ValueError):
+        enable_cache("redis")
+    with pytest.raises(ValueError):
+        enable_cache("disk")
@@ -0,0 +1,75 @@
+import pytest
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.spatial.distance import cdist
+
+from momics.distances import distance_matrix, pairwise_distances
+from momics.taxonomy import compute_bray_curtis, pivot_taxonomic_data
+from momics.benchmarks import synthetic_taxonomy
+
+
+@pytest.fixture(scope="module")
+def counts():
+    """Sparse counts of 90 samples, two of them empty."""
+    rng = np.random.default_rng(0)
+    x = rng.poisson(3, (90, 400)) * (rng.random((90, 400)) < 0.1)
+    x[[5, 7]] = 0
+    return x.astype(np.float64)
+
+
+@pytest.mark.parametrize("metric", ["braycurtis", "jaccard"])
+@pytest.mark.parametrize("as_sparse", [False, True])
+def test_pairwise_distances_skbio(counts, metric, as_sparse):
+    """Tests the tiled distances against skbio."""
+    from skbio.diversity import beta_diversity
+
+    x = sparse.csr_matrix(counts) if as_sparse else counts
+    result = pairwise_distances(x, metric=metric, tile=16, max_workers=3)
+    expected = beta_diversity(metric, counts).data
+    np.testing.assert_allclose(result, expected, equal_nan=True)
+
+
+def test_pairwise_distances_other_metrics(counts):
+    """Tests the Aitchison and weighted Jaccard distances and the cross blocks."""
+    from skbio.stats.composition import clr
+
+    transformed = clr(counts + 1)
+    np.testing.assert_allclose(
+        pairwise_distances(counts, metric="aitchison", tile=32),
+        cdist(transformed, transformed),
+        atol=1e-10,
+    )
+
+    minima = np.minimum(counts[:, None], counts[None]).sum(axis=-1)
+    maxima = np.maximum(counts[:, None], counts[None]).sum(axis=-1)
+    with np.errstate(invalid="ignore"):
+        expected = np.where(maxima > 0, 1 - minima / maxima, 0)
+    np.testing.assert_allclose(
+        pairwise_distances(counts, metric="weighted_jaccard", tile=20), expected
+    )
+
+    np.testing.assert_allclose(
+        pairwise_distances(counts[:30], sparse.csr_matrix(counts[30:]), tile=8),
+        cdist(counts[:30], counts[30:], "braycurtis"),
+        equal_nan=True,
+    )
+
+    with pytest.raises(ValueError):
+        pairwise_distances(counts, metric="cosine")
+    with pytest.raises(ValueError):
+        pairwise_distances(-counts)
+
+
+def test_distance_matrix_labels():
+    """Tests that the distance matrix is labelled like compute_bray_curtis."""
+    from skbio.diversity import beta_diversity
+
+    ssu = synthetic_taxonomy(n_samples=15, n_taxa=100, taxa_per_sample=30, seed=1)
+    pivot = pivot_taxonomic_data(ssu.set_index(["ref_code", "ncbi_tax_id"]))
+    result = distance_matrix(pivot, tile=4)
+    assert result.index.tolist() == pivot.columns.astype(str).tolist()
+    pd.testing.assert_index_equal(result.columns, compute_bray_curtis(pivot).columns)
+    np.testing.assert_allclose(
+        result.values, beta_diversity("braycurtis", pivot.T.values).data
+    )
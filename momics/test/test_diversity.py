@@ -259,3 +259,36 @@ def test_alpha_input():
         assert all(
             result[ref_code] == values
         ), f"Expected values {values} for {ref_code}, but got {result[ref_code].tolist()}"
+
+
+@pytest.mark.parametrize("method", ["eigh", "fsvd"])
+def test_pcoa_parametrized_truncated(method):
+    """
+    Tests that the truncated PCoA returns only the requested axes with the
+    same leading eigenvalues as the full solution.
+    """
+    rng = np.random.default_rng(0)
+    # three distinct communities, so the leading axes are well separated
+    groups = np.repeat(np.arange(3), 10)
+    profiles = rng.gamma(0.5, 10, size=(3, 12))
+    counts = rng.poisson(profiles[groups])
+    beta = beta_diversity("braycurtis", counts)
+
+    full = pcoa_parametrized(beta)
+    result = pcoa_parametrized(beta, method=method, dimensions=3)
+
+    assert result.samples.shape == (30, 3), "Only 3 axes should be computed"
+    np.testing.assert_allclose(
+        result.eigvals.values, full.eigvals.values[:3], rtol=1e-4
+    )
+    # proportion explained is relative to the full matrix, not the 3 axes
+    assert result.proportion_explained.sum() < 1.0
+
+
+def test_pcoa_parametrized_invalid():
+    """Tests the pcoa_parametrized input validation."""
+    beta = beta_diversity("braycurtis", np.ones((5, 3)) + np.eye(5, 3))
+    with pytest.raises(ValueError):
+        pcoa_parametrized(beta, method="svd")
+    with pytest.raises(ValueError):
+        pcoa_parametrized(beta, dimensions=1)
@@ -1,9 +1,11 @@
 import pytest
+import numpy as np
 import pandas as pd
 
 # import fastparquet
 
 from momics.loader.parquets import load_parquets
+from momics.loader.matrices import load_abundance_matrix, save_abundance_matrix
 
 
 @pytest.fixture
@@ -25,3 +27,147 @@ def test_load_parquets(folder):
     assert isinstance(data["test"], pd.DataFrame)
     assert isinstance(data, dict)
     assert data["test"].equals(pd.DataFrame({"A": [1, 2, 3], "B": [4, 5, 6]}))
+
+
+@pytest.fixture
+def abundance_table():
+    index = pd.MultiIndex.from_tuples(
+        [(1, "1;sk__Bacteria"), (2, "2;sk__Archaea"), (3, "3;sk__Eukaryota")],
+        names=["ncbi_tax_id", "taxonomic_concat"],
+    )
+    columns = pd.Index(
+        ["EMOBON00001", "EMOBON00002", "EMOBON00003", "EMOBON00004"], name="ref_code"
+    )
+    values = np.array([[5, 0, 1, 0], [0, 0, 2, 7], [3, 1, 0, 0]])
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+@pytest.mark.parametrize("matrix_format", ["dense", "sparse"])
+def test_save_load_abundance_matrix(abundance_table, matrix_format, tmp_path):
+    """Tests the round trip and column selection of the memory-mapped matrices."""
+    folder = tmp_path / "matrix"
+    assert save_abundance_matrix(abundance_table, folder, matrix_format) == matrix_format
+
+    matrix = load_abundance_matrix(folder)
+    assert matrix.format == matrix_format
+    assert matrix.shape == abundance_table.shape
+    pd.testing.assert_frame_equal(matrix.to_frame(), abundance_table.astype(np.float32))
+
+    # contiguous samples share the memory map
+    columns = ["EMOBON00002", "EMOBON00003"]
+    subset = matrix.select_columns(columns)
+    pd.testing.assert_frame_equal(
+        subset.to_frame(), abundance_table[columns].astype(np.float32)
+    )
+    if matrix_format == "dense":
+        assert np.shares_memory(subset.values, matrix.values)
+    else:
+        assert np.shares_memory(subset.csr.data, matrix.csr.data)
+    pd.testing.assert_frame_equal(
+        load_abundance_matrix(folder, columns=columns).to_frame(),
+        subset.to_frame(),
+    )
+
+    # any other selection is copied
+    columns = ["EMOBON00004", "EMOBON00001"]
+    pd.testing.assert_frame_equal(
+        matrix.select_columns(columns).to_frame(),
+        abundance_table[columns].astype(np.float32),
+    )
+    with pytest.raises(KeyError):
+        matrix.select_columns(["EMOBON00009"])
+
+
+def test_save_abundance_matrix_invalid(abundance_table, tmp_path):
+    """Tests the input validation of save_abundance_matrix."""
+    with pytest.raises(ValueError):
+        save_abundance_matrix(abundance_table, tmp_path, "csv")
+    with pytest.raises(ValueError):
+        save_abundance_matrix(abundance_table.astype(str), tmp_path)
+
+
+def test_save_abundance_matrix_mapped(abundance_table, tmp_path, monkeypatch):
+    """Tests the error of overwriting a mapped matrix, as raised on Windows."""
+    from momics.loader import matrices
+
+    folder = tmp_path / "matrix"
+    save_abundance_matrix(abundance_table, folder, "dense")
+
+    def locked_replace(src, dst):
+        raise PermissionError(13, "The process cannot access the file", dst)
+
+    monkeypatch.setattr(matrices.os, "replace", locked_replace)
+    with pytest.raises(PermissionError, match="mmap_mode=None"):
+        save_abundance_matrix(abundance_table, folder, "dense")
+    assert not list(folder.glob("*.tmp"))
+
+
+@pytest.fixture
+def taxonomy_parquets(tmp_path):
+    """Synthetic SSU table split over two parquet files."""
+    from momics.benchmarks import synthetic_taxonomy
+
+    df = synthetic_taxonomy(n_samples=12, n_taxa=200, taxa_per_sample=60, seed=3)
+    folder = tmp_path / "ssu"
+    folder.mkdir()
+    half = len(df) // 2
+    df.iloc[:half].to_parquet(folder / "part0.parquet", index=False)
+    df.iloc[half:].to_parquet(folder / "part1.parquet", index=False)
+    return df, folder
+
+
+@pytest.mark.parametrize("prevalence_percent", [None, 25])
+def test_stream_pivot_taxonomic_data(taxonomy_parquets, prevalence_percent, tmp_path):
+    """Tests the streamed sparse pivot against the in-memory pivot."""
+    from momics.constants import TAXONOMY_RANKS
+    from momics.loader.streaming import stream_pivot_taxonomic_data
+    from momics.taxonomy import (
+        fill_taxonomy_placeholders,
+        pivot_taxonomic_data,
+        prevalence_cutoff,
+    )
+
+    df, folder = taxonomy_parquets
+    samples = sorted(df["ref_code"].unique())[2:9]
+
+    expected = fill_taxonomy_placeholders(df[df["ref_code"].isin(samples)], TAXONOMY_RANKS)
+    expected = pivot_taxonomic_data(expected.set_index("ref_code"))
+    if prevalence_percent is not None:
+        expected = prevalence_cutoff(expected, percent=prevalence_percent, skip_columns=0)
+
+    matrix = stream_pivot_taxonomic_data(
+        folder,
+        samples=samples,
+        taxonomy_ranks=TAXONOMY_RANKS,
+        prevalence_percent=prevalence_percent,
+        batch_rows=50,
+    )
+    assert matrix.format == "sparse"
+    pd.testing.assert_frame_equal(matrix.to_frame(), expected, check_dtype=False)
+
+    # written without densifying
+    save_abundance_matrix(matrix, tmp_path / "matrix")
+    loaded = load_abundance_matrix(tmp_path / "matrix")
+    assert loaded.format == "sparse"
+    pd.testing.assert_frame_equal(loaded.to_frame(), expected, check_dtype=False)
+
+
+def test_stream_prevalence_cutoff_taxonomy(taxonomy_parquets):
+    """Tests the streamed per-sample cutoff against the in-memory cutoff."""
+    from momics.loader.streaming import (
+        stream_prevalence_cutoff_taxonomy,
+        stream_sample_sums,
+    )
+    from momics.taxonomy import prevalence_cutoff_taxonomy
+
+    df, folder = taxonomy_parquets
+    sums = stream_sample_sums(folder, batch_rows=50)
+    pd.testing.assert_series_equal(
+        sums, df.groupby("ref_code")["abundance"].sum(), check_names=False
+    )
+
+    streamed = pd.concat(stream_prevalence_cutoff_taxonomy(folder, 1, batch_rows=50))
+    expected = prevalence_cutoff_taxonomy(df.set_index(["ref_code", "ncbi_tax_id"]), 1)
+    assert sorted(zip(streamed["ref_code"], streamed["ncbi_tax_id"])) == sorted(
+        expected.index
+    )
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 import pandas as pd
 import networkx as nx
 import os
@@ -12,7 +13,19 @@ from momics.networks import (
     interaction_to_graph,
     interaction_to_graph_with_pvals,
     pairwise_jaccard_lower_triangle,
+    graph_hash,
+    graph_layout,
+    clear_layout_cache,
+    _layout_cache,
+    build_interaction_graphs,
+    interaction_network_pipeline,
+    network_results_key,
+    save_network_results,
+    load_network_results,
+    cached_interaction_graphs,
 )
+from momics.stats import spearman_from_taxonomy
+from momics.taxonomy import fdr_pvals, split_taxonomic_data_pivoted
 from momics.constants import COL_NAMES_HASH_EMO_BON_VRE as COL_NAMES_HASH
 from momics.constants import TAXONOMY_RANKS
 
@@ -120,3 +133,213 @@ def test_pairwise_jaccard_lower_triangle():
     # Upper triangle and diagonal should be None/NaN
     assert pd.isna(df.loc["group1", "group2"])
     assert pd.isna(df.loc["group1", "group1"])
+
+
+def test_pairwise_jaccard_lower_triangle_edge_lists():
+    # edge lists given in different directions and with duplicates
+    network_results = {
+        "group1": {"edges_pos": [("A", "B"), ("B", "C"), ("A", "B")]},
+        "group2": {"edges_pos": [("B", "A"), ("C", "D")]},
+        "group3": {"edges_pos": []},
+    }
+
+    df = pairwise_jaccard_lower_triangle(network_results, edge_type="edges_pos")
+
+    assert (df.dtypes == float).all(), "Result should be a float matrix"
+    assert df.loc["group2", "group1"] == pytest.approx(1 / 3)
+    assert df.loc["group3", "group1"] == 0.0
+    assert pd.isna(df.loc["group2", "group2"])
+
+
+def test_graph_hash():
+    g1 = nx.Graph()
+    g1.add_edges_from([("A", "B"), ("B", "C")])
+    g2 = nx.Graph()
+    g2.add_edges_from([("C", "B"), ("B", "A")])
+    g3 = nx.Graph()
+    g3.add_edges_from([("A", "B"), ("A", "C")])
+
+    # same structure regardless of insertion order, different structure differs
+    assert graph_hash(g1) == graph_hash(g2)
+    assert graph_hash(g1) != graph_hash(g3)
+
+    # nodes of different types with the same string do not collide
+    assert graph_hash(nx.path_graph(3)) != graph_hash(nx.path_graph(["0", "1", "2"]))
+
+
+@pytest.mark.parametrize("method", ["spring", "spectral", "fr_grid"])
+def test_graph_layout(method):
+    if method == "fr_grid":
+        pytest.importorskip("igraph")
+    clear_layout_cache()
+    G = nx.karate_club_graph()
+
+    pos = graph_layout(G, method=method)
+    assert set(pos.keys()) == set(G.nodes())
+    assert all(len(xy) == 2 for xy in pos.values())
+
+    # the second call is served from the cache, as a copy
+    pos[0][:] = 100.0
+    cached = graph_layout(G, method=method)
+    assert len(_layout_cache) == 1
+    assert cached[0] == pytest.approx(graph_layout(G, method=method)[0])
+    assert not np.allclose(cached[0], 100.0)
+    # a different seed is a different cache entry
+    if method != "spectral":
+        graph_layout(G, method=method, seed=0)
+        assert len(_layout_cache) == 2
+
+
+def test_graph_layout_spring_matches_networkx():
+    clear_layout_cache()
+    G = nx.karate_club_graph()
+    expected = nx.spring_layout(G, k=0.2, iterations=50, seed=42)
+    pos = graph_layout(G, method="spring")
+    for node in G.nodes():
+        assert pos[node] == pytest.approx(expected[node])
+
+
+def test_graph_layout_invalid():
+    with pytest.raises(ValueError):
+        graph_layout(nx.path_graph(3), method="circular")
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_interaction_network_pipeline(max_workers):
+    rng = np.random.default_rng(0)
+    samples = [f"s{i}" for i in range(20)]
+    taxonomy = pd.DataFrame(
+        rng.poisson(3, size=(15, 20)),
+        index=[f"taxon{i}" for i in range(15)],
+        columns=samples,
+    )
+    # correlated taxa, so there are some edges
+    taxonomy.loc["taxon1"] = taxonomy.loc["taxon0"] * 2 + 1
+    groups = {"A": samples[:10], "B": samples[10:]}
+
+    # the manual chain
+    split = split_taxonomic_data_pivoted(taxonomy, groups)
+    correlations = spearman_from_taxonomy(split)
+    for factor in correlations:
+        correlations[factor]["p_vals_fdr"] = fdr_pvals(
+            correlations[factor]["p_vals"], 0.05
+        )
+    expected = build_interaction_graphs(correlations)
+
+    result = interaction_network_pipeline(
+        taxonomy, groups, max_workers=max_workers, memory_per_worker_gb=0.5
+    )
+
+    assert list(result.keys()) == ["A", "B"]
+    for factor in groups:
+        assert result[factor]["edges_pos"] == expected[factor]["edges_pos"]
+        assert result[factor]["edges_neg"] == expected[factor]["edges_neg"]
+        assert result[factor]["total_edges"] == expected[factor]["total_edges"]
+        assert "correlation" not in result[factor]
+
+
+def test_interaction_network_pipeline_compositional():
+    rng = np.random.default_rng(0)
+    samples = [f"s{i}" for i in range(20)]
+    taxonomy = pd.DataFrame(
+        rng.poisson(5, size=(10, 20)),
+        index=[f"taxon{i}" for i in range(10)],
+        columns=samples,
+    )
+    groups = {"A": samples}
+
+    result = interaction_network_pipeline(
+        taxonomy, groups, max_workers=1, association="rho"
+    )
+    assert list(result.keys()) == ["A"]
+
+    # 10 proportional pairs among 60 taxa pass the FDR over 1770 pairs
+    samples = [f"s{i}" for i in range(40)]
+    basis = rng.lognormal(2, 1, size=(60, 40))
+    for i in range(0, 20, 2):
+        basis[i + 1] = basis[i] * rng.lognormal(0, 0.1, 40)
+    taxonomy = pd.DataFrame(
+        np.array([rng.multinomial(5000, b / b.sum()) for b in basis.T]).T,
+        index=[f"taxon{i}" for i in range(60)],
+        columns=samples,
+    )
+    result = interaction_network_pipeline(
+        taxonomy, {"A": samples}, max_workers=1, association="rho", n_bootstraps=50
+    )
+    planted = {frozenset((f"taxon{i}", f"taxon{i + 1}")) for i in range(0, 20, 2)}
+    assert planted <= {frozenset(edge) for edge in result["A"]["graph"].edges}
+
+    with pytest.raises(ValueError):
+        interaction_network_pipeline(taxonomy, groups, association="pearson")
+
+
+@pytest.mark.parametrize("tuple_nodes", [False, True])
+def test_save_load_network_results(tmp_path, tuple_nodes):
+    labels = ["A", "B", "C", "D"]
+    if tuple_nodes:
+        labels = [(i, f"tax;{name}") for i, name in enumerate(labels)]
+    corr = pd.DataFrame(
+        [
+            [1.0, 0.9, -0.7, 0.0],
+            [0.9, 1.0, 0.2, 0.0],
+            [-0.7, 0.2, 1.0, 0.0],
+            [0.0, 0.0, 0.0, 1.0],
+        ],
+        index=labels,
+        columns=labels,
+    )
+    pvals = corr * 0 + 0.01
+    correlation_data = {"f1": {"correlation": corr, "p_vals_fdr": pvals}}
+
+    results = build_interaction_graphs(correlation_data)
+    key = network_results_key(correlation_data, 0.5, -0.5, 0.05)
+    assert key != network_results_key(correlation_data, 0.8, -0.5, 0.05)
+
+    assert load_network_results(str(tmp_path), key) is None
+    save_network_results(results, str(tmp_path), key)
+    loaded = load_network_results(str(tmp_path), key)
+
+    assert list(loaded.keys()) == ["f1"]
+    for item in [
+        "nodes",
+        "edges_pos",
+        "edges_neg",
+        "degree_centrality",
+        "top_betweenness",
+        "total_nodes",
+        "total_edges",
+    ]:
+        assert loaded["f1"][item] == results["f1"][item]
+    assert nx.utils.graphs_equal(loaded["f1"]["graph"], results["f1"]["graph"])
+
+    # the cached builder loads the stored results
+    cached = cached_interaction_graphs(correlation_data, str(tmp_path))
+    assert cached["f1"]["edges_pos"] == results["f1"]["edges_pos"]
+
+
+def test_interaction_network_pipeline_permutations():
+    rng = np.random.default_rng(0)
+    samples = [f"s{i}" for i in range(40)]
+    taxonomy = pd.DataFrame(
+        rng.poisson(20, size=(60, 40)),
+        index=[f"taxon{i}" for i in range(60)],
+        columns=samples,
+    )
+    # 10 strongly correlated pairs among 1770
+    for i in range(0, 20, 2):
+        taxonomy.iloc[i + 1] = taxonomy.iloc[i] * 2 + rng.poisson(2, 40)
+    groups = {"A": samples}
+
+    analytic = interaction_network_pipeline(taxonomy, groups, max_workers=1)
+    result = interaction_network_pipeline(
+        taxonomy, groups, max_workers=1, permutations=999
+    )
+    assert analytic["A"]["total_edges"] >= 10
+    assert result["A"]["total_edges"] >= 10
+    planted = {frozenset((f"taxon{i}", f"taxon{i + 1}")) for i in range(0, 20, 2)}
+    assert planted <= {frozenset(edge) for edge in result["A"]["graph"].edges}
+
+    with pytest.raises(ValueError):
+        interaction_network_pipeline(
+            taxonomy, groups, association="rho", permutations=199
+        )
@@ -0,0 +1,84 @@
+import os
+import pytest
+import pandas as pd
+
+from momics.benchmarks import synthetic_metadata, synthetic_taxonomy
+from momics.cli import main
+from momics.pipeline import load_pipeline_results, pipeline_config, run_pipeline
+
+
+@pytest.fixture
+def parquet_folder(tmp_path):
+    """Synthetic SSU and LSU tables and metadata written to a folder."""
+    for k, name in enumerate(["ssu", "lsu"]):
+        df = synthetic_taxonomy(n_samples=16, n_taxa=150, taxa_per_sample=50, seed=k)
+        df.to_parquet(tmp_path / f"metagoflow_analyses.{name}.parquet")
+    metadata = synthetic_metadata(16, seed=0)
+    metadata.to_csv(tmp_path / "metadata.csv", index=False)
+    return tmp_path
+
+
+def test_pipeline_config(tmp_path):
+    """Tests the configuration defaults, overrides and validation."""
+    path = tmp_path / "config.json"
+    path.write_text('{"normalize": "tss", "steps": ["alpha"]}')
+
+    config = pipeline_config({"normalize": "rarefy", "factor": None}, path=str(path))
+    assert config["normalize"] == "rarefy"
+    assert config["steps"] == ["alpha"]
+    assert config["prevalence_cutoff"] == 10
+
+    with pytest.raises(ValueError):
+        pipeline_config({"unknown": 1})
+    with pytest.raises(ValueError):
+        pipeline_config({"steps": ["network"]})
+
+
+def test_run_pipeline(parquet_folder, tmp_path):
+    """Tests the outputs of the pipeline and loading them back."""
+    output = tmp_path / "results"
+    manifest = run_pipeline(
+        str(parquet_folder),
+        str(output),
+        config={"tables": ["ssu"], "steps": ["alpha", "beta", "pcoa"]},
+        workers=1,
+    )
+
+    assert set(manifest["ssu"]["timings"]) == {"preprocess", "normalize", "alpha", "beta", "pcoa"}
+    assert os.path.exists(output / "manifest.json")
+
+    results = load_pipeline_results(str(output), "ssu")
+    pivot, beta = results["pivot"], results["beta"]
+    assert pivot.shape[1] == 16
+    assert results["alpha"].index.tolist() == pivot.columns.tolist()
+    assert beta.shape == (16, 16)
+    assert results["pcoa"].shape[0] == 16
+
+    with pytest.raises(ValueError):
+        run_pipeline(str(parquet_folder), str(output), config={"tables": ["go"]})
+
+
+def test_cli_run(parquet_folder, tmp_path):
+    """Tests the `momics run` command with the network step over both tables."""
+    output = tmp_path / "results"
+    code = main(
+        [
+            "run",
+            str(parquet_folder),
+            str(output),
+            "--metadata",
+            str(parquet_folder / "metadata.csv"),
+            "--steps",
+            "network",
+            "--factor",
+            "env_package",
+            "--workers",
+            "2",
+        ]
+    )
+    assert code == 0
+
+    for table in ["ssu", "lsu"]:
+        results = load_pipeline_results(str(output), table)
+        assert set(results) == {"manifest", "pivot", "normalized", "network"}
+        assert isinstance(results["pivot"], pd.DataFrame)
@@ -401,3 +401,158 @@ def test_beta_plot(norm, backend):
 #         assert (
 #             scatter.get_array().tolist() == pcoa_df[factor].tolist()
 #         ), "The color values are not correct"
+
+
+def test_cluster_order_distance_matrix():
+    """
+    Tests that clustering order puts the two close samples next to each other.
+    """
+    df = pd.DataFrame(
+        [
+            [0.0, 0.9, 0.1, 0.8],
+            [0.9, 0.0, 0.9, 0.2],
+            [0.1, 0.9, 0.0, 0.8],
+            [0.8, 0.2, 0.8, 0.0],
+        ],
+        index=["a", "b", "c", "d"],
+        columns=["a", "b", "c", "d"],
+    )
+    ordered = cluster_order_distance_matrix(df)
+
+    assert set(ordered.index) == set(df.index)
+    assert list(ordered.index) == list(ordered.columns)
+    pos = {name: i for i, name in enumerate(ordered.index)}
+    assert abs(pos["a"] - pos["c"]) == 1, "Close samples should be adjacent"
+    assert abs(pos["b"] - pos["d"]) == 1, "Close samples should be adjacent"
+
+
+def test_tile_distance_matrix():
+    """
+    Tests the tile_distance_matrix function averaging into tiles.
+    """
+    values = np.arange(36, dtype=float).reshape(6, 6)
+    df = pd.DataFrame(values, index=list("abcdef"), columns=list("abcdef"))
+
+    tiled = tile_distance_matrix(df, 3)
+    assert tiled.shape == (3, 3)
+    assert list(tiled.index) == ["a..b", "c..d", "e..f"]
+    assert tiled.iloc[0, 0] == values[:2, :2].mean()
+    assert tiled.iloc[2, 1] == values[4:, 2:4].mean()
+
+    # small matrices are left untouched
+    assert tile_distance_matrix(df, 10) is df
+
+
+def test_hvplot_heatmap_tiled(sample_beta_df):
+    """
+    Tests the tiled and rasterized modes of hvplot_heatmap.
+    """
+    heatmap = hvplot_heatmap(sample_beta_df, "GO:0001", cluster=True, max_tiles=2)
+    assert isinstance(heatmap, hv.element.HeatMap)
+    assert len(heatmap.dimension_values(2)) == 4, "Heatmap should have 2x2 tiles"
+
+    pytest.importorskip("datashader")
+    raster = hvplot_heatmap(sample_beta_df, "GO:0001", rasterize=True)
+    assert isinstance(raster, hv.DynamicMap)
+
+
+@pytest.mark.parametrize("color_by", [None, "factor", "color_by"])
+def test_hvplot_plot_pcoa_black_rasterized(color_by):
+    """
+    Tests that hvplot_plot_pcoa_black switches to the rasterized path above
+    the threshold and keeps hover only for a subset of samples.
+    """
+    pytest.importorskip("datashader")
+    rng = np.random.default_rng(0)
+    n = 50
+    pcoa_df = pd.DataFrame(
+        {
+            "PC1": rng.normal(size=n),
+            "PC2": rng.normal(size=n),
+            "factor": rng.choice(["A", "B", "C"], size=n).astype(object),
+            "color_by": rng.uniform(size=n),
+        },
+        index=pd.Index([f"sample{i}" for i in range(n)], name="ref_code"),
+    )
+
+    small = hvplot_plot_pcoa_black(pcoa_df, color_by=color_by)
+    assert isinstance(small, hv.element.Scatter)
+
+    fig = hvplot_plot_pcoa_black(
+        pcoa_df, color_by=color_by, rasterize_threshold=10, hover_samples=5
+    )
+    assert isinstance(fig, hv.DynamicMap)
+    overlay = fig[()]
+    hover = overlay.get(1)
+    assert isinstance(hover, hv.element.Scatter)
+    assert len(hover) == 5, "Hover should be kept only for the sampled subset"
+
+
+def test_build_sankey_links():
+    """
+    Tests that the Sankey links aggregate values over consecutive columns.
+    """
+    df = pd.DataFrame(
+        {
+            "phylum": ["P1", "P1", "P2", "P1"],
+            "class": ["C1", "C2", "C3", "C1"],
+            "order": ["O1", "O2", "O3", None],
+            "abundance": [1, 2, 3, 4],
+        }
+    )
+    sankey = build_sankey_links(df, ["phylum", "class", "order"], "abundance")
+
+    labels = sankey["label"]
+    links = {
+        (labels[s], labels[t]): v
+        for s, t, v in zip(sankey["source"], sankey["target"], sankey["value"])
+    }
+    assert links == {
+        ("P1", "C1"): 5,
+        ("P1", "C2"): 2,
+        ("P2", "C3"): 3,
+        ("C1", "O1"): 1,
+        ("C2", "O2"): 2,
+        ("C3", "O3"): 3,
+    }
+    levels = dict(zip(labels, sankey["level"]))
+    assert levels["P1"] == 0 and levels["C3"] == 1 and levels["O2"] == 2
+
+
+def test_get_sankey():
+    """Tests the get_sankey figure nodes and links."""
+    df = pd.DataFrame(
+        {
+            "phylum": ["P1", "P1", "P2"],
+            "class": ["C1", "C2", "C3"],
+            "abundance": [1, 2, 3],
+        }
+    )
+    fig = get_sankey(df, ["phylum", "class"], "abundance", title="test")
+
+    assert isinstance(fig, go.Figure)
+    sankey = fig.data[0]
+    assert len(sankey.node.label) == 5
+    assert sorted(sankey.link.value) == [1, 2, 3]
+    assert all("0.4" in color for color in sankey.link.color)
+
+
+@pytest.mark.parametrize("rasterize", [False, True])
+def test_hvplot_network(rasterize):
+    """
+    Tests the hvplot_network function with and without rasterized edges.
+    """
+    if rasterize:
+        pytest.importorskip("datashader")
+    G = nx.Graph(mode="test")
+    G.add_edges_from([("A", "B"), ("B", "C")], color="green")
+    G.add_edges_from([("A", "C")], color="red")
+
+    fig = hvplot_network(G, layout="spring", rasterize=rasterize)
+    if rasterize:
+        assert isinstance(fig, hv.DynamicMap)
+    else:
+        assert isinstance(fig, hv.Overlay)
+        points = fig.get(1)
+        assert isinstance(points, hv.Points)
+        assert sorted(points.dimension_values("node")) == ["A", "B", "C"]
@@ -0,0 +1,92 @@
+import json
+import pytest
+import numpy as np
+import pandas as pd
+
+from momics.profiling import (
+    profile,
+    profiled,
+    enable_profiling,
+    disable_profiling,
+    reset_profiling,
+    profiling_records,
+    profiling_summary,
+    dump_profiling,
+    input_shapes,
+)
+
+
+@pytest.fixture
+def profiling():
+    reset_profiling()
+    enable_profiling()
+    yield
+    disable_profiling()
+    reset_profiling()
+
+
+def test_input_shapes():
+    """Tests the shapes recorded for array-like and dictionary inputs."""
+    df = pd.DataFrame(np.zeros((3, 2)))
+    shapes = input_shapes(df, 5, tables={"a": np.zeros(4), "b": "x"})
+    assert shapes == {"0": [3, 2], "tables": {"a": [4]}}
+
+
+def test_profiled(profiling):
+    """Tests that profiled calls are recorded with their inputs."""
+
+    @profiled
+    def total(df):
+        return df.values.sum()
+
+    @profiled(name="named")
+    def fail():
+        raise RuntimeError("boom")
+
+    df = pd.DataFrame(np.ones((10, 3)))
+    assert total(df) == 30
+    with pytest.raises(RuntimeError):
+        fail()
+
+    records = profiling_records()
+    assert records["name"].tolist() == [
+        f"{total.__module__}.{total.__qualname__}",
+        "named",
+    ]
+    assert records.loc[0, "shapes"] == {"0": [10, 3]}
+    assert (records["wall_s"] >= 0).all()
+    assert (records["cpu_s"] >= 0).all()
+
+    summary = profiling_summary()
+    assert summary.loc["named", "calls"] == 1
+
+    dumped = json.loads(dump_profiling())
+    assert len(dumped) == 2
+
+
+def test_profile_block(profiling, tmp_path):
+    """Tests the context manager and the JSON dump to a file."""
+    with profile("allocate", size=10**6):
+        data = np.ones(10**6)
+    assert data.sum() == 10**6
+
+    path = tmp_path / "profile.json"
+    dump_profiling(str(path))
+    record = json.loads(path.read_text())[0]
+    assert record["name"] == "allocate"
+    assert record["shapes"] == {}
+
+
+def test_profiling_disabled():
+    """Tests that nothing is recorded while disabled."""
+    disable_profiling()
+    reset_profiling()
+
+    @profiled
+    def identity(x):
+        return x
+
+    assert identity(1) == 1
+    with profile("block"):
+        pass
+    assert profiling_records().empty
@@ -0,0 +1,139 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from momics.stats import compositional_correlation, compositional_from_taxonomy
+from momics.taxonomy import fdr_pvals
+
+
+@pytest.fixture(scope="module")
+def counts():
+    """Multinomial counts of 25 taxa in 50 samples, taxa 0 and 1 proportional."""
+    rng = np.random.default_rng(0)
+    basis = rng.lognormal(2, 1, (50, 25))
+    basis[:, 1] = basis[:, 0] * rng.lognormal(0, 0.1, 50)
+    values = np.array([rng.multinomial(2000, b / b.sum()) for b in basis])
+    return pd.DataFrame(values.T, index=[f"taxon{i}" for i in range(25)])
+
+
+@pytest.mark.parametrize("method", ["sparcc", "rho"])
+def test_compositional_from_taxonomy(counts, method):
+    """Tests the correlations, the p-values and their independence of the workers."""
+    result = compositional_from_taxonomy(
+        {"A": counts}, method=method, n_bootstraps=20, workers=1
+    )
+    correlation, p_vals = result["A"]["correlation"], result["A"]["p_vals"]
+    assert correlation.shape == p_vals.shape == (25, 25)
+    np.testing.assert_allclose(correlation.values, correlation.values.T)
+    assert correlation.loc["taxon0", "taxon1"] > 0.8
+    # the fitted null is not bounded below by 1 / (1 + n_bootstraps)
+    assert p_vals.loc["taxon0", "taxon1"] < 1e-6
+    assert ((p_vals.values > 0) & (p_vals.values <= 1)).sum() == 25 * 24
+    # the FDR correction takes the same structure as the Spearman p-values
+    assert fdr_pvals(p_vals, 0.05).shape == p_vals.shape
+
+    parallel = compositional_from_taxonomy(
+        {"A": counts}, method=method, n_bootstraps=20, workers=2
+    )
+    pd.testing.assert_frame_equal(parallel["A"]["p_vals"], p_vals)
+
+    with pytest.raises(ValueError):
+        compositional_from_taxonomy({"A": counts}, method=method, n_bootstraps=1)
+
+
+def test_sparcc_reduces_compositional_bias():
+    """Tests that SparCC does not find the negative bias of independent fractions."""
+    rng = np.random.default_rng(1)
+    basis = rng.lognormal(2, 1, (200, 8))
+    values = np.array([rng.multinomial(5000, b / b.sum()) for b in basis])
+    counts = pd.DataFrame(values.T)
+
+    sparcc = compositional_correlation(counts, iterations=10)
+    fractions = np.corrcoef(values / values.sum(axis=1, keepdims=True), rowvar=False)
+    upper = np.triu_indices(8, k=1)
+    assert abs(sparcc.values[upper].mean()) < abs(fractions[upper].mean())
+
+    with pytest.raises(ValueError):
+        compositional_correlation(counts, method="spearman")
+
+
+@pytest.mark.parametrize("strata", [None, ["a"] * 20 + ["b"] * 20])
+def test_permutation_edge_test(strata):
+    """Tests the permutation p-values against the analytic ones and the early stop."""
+    from momics.stats import permutation_edge_test, spearman_from_taxonomy
+
+    rng = np.random.default_rng(0)
+    values = rng.poisson(5, (30, 40)).astype(float)
+    values[1] = values[0] + rng.poisson(1, 40)
+    df = pd.DataFrame(values, index=[f"taxon{i}" for i in range(30)])
+    spearman = spearman_from_taxonomy({"A": df})["A"]
+
+    p_vals = permutation_edge_test(
+        df, spearman["correlation"], 0.3, -0.3, strata=strata, workers=1
+    )
+    correlation = spearman["correlation"].values
+    candidates = (np.abs(correlation) >= 0.3) & ~np.eye(30, dtype=bool)
+    assert np.isnan(p_vals.values[~candidates & ~np.eye(30, dtype=bool)]).all()
+    np.testing.assert_allclose(p_vals.values, p_vals.values.T)
+    # the strong edge runs all permutations, null edges stop early
+    assert p_vals.loc["taxon0", "taxon1"] == pytest.approx(1 / 1000)
+    np.testing.assert_allclose(
+        p_vals.values[candidates], spearman["p_vals"].values[candidates], atol=0.03
+    )
+
+    parallel = permutation_edge_test(
+        df, spearman["correlation"], 0.3, -0.3, strata=strata, workers=2
+    )
+    pd.testing.assert_frame_equal(parallel, p_vals)
+
+
+def test_spearman_sparse():
+    """Tests the sparse ranking against scipy, with ties and constant rows."""
+    from scipy import sparse
+    from scipy.stats import spearmanr
+    from momics.stats import spearman_from_taxonomy, spearman_sparse
+
+    rng = np.random.default_rng(2)
+    values = rng.poisson(2, (300, 60)) * (rng.random((300, 60)) < 0.2)
+    values[3] = 0
+    values[4] = 5
+    values[5, :] = 0
+    values[5, 0] = 1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        expected_corr, expected_p = spearmanr(values.T)
+
+    for x in (values, sparse.csr_matrix(values)):
+        corr, p_vals = spearman_sparse(x)
+        np.testing.assert_allclose(corr, expected_corr, atol=1e-8, equal_nan=True)
+        np.testing.assert_allclose(p_vals, expected_p, atol=1e-8, equal_nan=True)
+
+    df = pd.DataFrame(values[6:])
+    result = spearman_from_taxonomy({"A": df})["A"]
+    np.testing.assert_allclose(result["correlation"], expected_corr[6:, 6:], atol=1e-8)
+
+    with pytest.raises(ValueError):
+        spearman_sparse(-values)
+
+
+@pytest.mark.parametrize("position", [0, 3])
+def test_spearman_constant_rows(position):
+    """Tests constant taxa on the sparse and the dense path of spearman_from_taxonomy."""
+    from momics.stats import SPARSE_SPEARMAN_DENSITY, spearman_from_taxonomy
+
+    rng = np.random.default_rng(3)
+    sparse_values = rng.poisson(3, (8, 40)) * (rng.random((8, 40)) < 0.2)
+    dense_values = rng.poisson(5, (8, 40)) + 1
+    for values, is_sparse in ((sparse_values, True), (dense_values, False)):
+        values = values.astype(float)
+        values[position] = values[position, 0]
+        assert (np.count_nonzero(values) < SPARSE_SPEARMAN_DENSITY * values.size) == is_sparse
+        corr = spearman_from_taxonomy({"A": pd.DataFrame(values)})["A"]["correlation"]
+        other = [i for i in range(8) if i != position]
+
+        assert corr.iloc[position].isna().all() and corr[position].isna().all()
+        if is_sparse or position > 1:
+            # NaN for the constant taxon only
+            assert corr.iloc[other, other].notna().all().all()
+        else:
+            # scipy returns a scalar NaN for a constant first or second variable
+            assert corr.isna().all().all()
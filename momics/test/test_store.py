@@ -0,0 +1,96 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from momics.benchmarks import synthetic_metadata, synthetic_taxonomy
+from momics.diversity import calculate_shannon_index
+from momics.store import SampleStore
+from momics.taxonomy import compute_bray_curtis, pivot_taxonomic_data
+
+
+@pytest.fixture
+def batches():
+    """Metadata and SSU table of 12 samples, split into two sampling batches."""
+    metadata = synthetic_metadata(12, seed=0)
+    ssu = synthetic_taxonomy(n_samples=12, n_taxa=150, taxa_per_sample=40, seed=0)
+    first = metadata["ref_code"].iloc[:7]
+    return metadata, ssu, first
+
+
+def test_store_incremental_equals_full(batches, tmp_path):
+    """Tests that two ingestions give the results of processing all samples."""
+    metadata, ssu, first = batches
+    store = SampleStore(tmp_path / "store")
+
+    assert store.ingest({"ssu": ssu[ssu["ref_code"].isin(first)]}, metadata, first) == sorted(first)
+    new = store.new_ref_codes(metadata["ref_code"])
+    assert len(new) == 5
+    assert store.ingest({"ssu": ssu}, metadata) == new
+    assert store.ingest({"ssu": ssu}, metadata) == []
+
+    merged = ssu.merge(metadata[["ref_code", "source_mat_id"]], on="ref_code")
+    merged = merged.rename(columns={"source_mat_id": "source material ID"})
+    full = pivot_taxonomic_data(
+        merged.drop(columns="ref_code").set_index(["source material ID", "ncbi_tax_id"])
+    )
+
+    pd.testing.assert_frame_equal(store.load_pivot("ssu"), full, check_dtype=False)
+    np.testing.assert_allclose(
+        store.load_alpha("ssu")["Shannon"].values, calculate_shannon_index(full.T).values
+    )
+    pd.testing.assert_frame_equal(
+        store.load_beta("ssu"), compute_bray_curtis(full), check_names=False
+    )
+    assert len(store.load_table("ssu")) == len(ssu)
+
+    # the manifest is reloaded
+    assert SampleStore(tmp_path / "store").ref_codes == sorted(metadata["ref_code"])
+
+
+def test_store_metadata_only_samples(batches, tmp_path):
+    """Tests that samples without rows are ingested once their rows arrive."""
+    metadata, ssu, first = batches
+    store = SampleStore(tmp_path / "store")
+
+    assert store.ingest({"ssu": ssu[ssu["ref_code"].isin(first)]}, metadata) == sorted(
+        first
+    )
+    assert store.ref_codes == sorted(first)
+    assert len(store.new_ref_codes(metadata["ref_code"])) == 5
+
+    store.ingest({"ssu": ssu}, metadata)
+    assert store.ref_codes == sorted(metadata["ref_code"])
+    assert store.load_pivot("ssu").shape[1] == 12
+
+
+def test_store_replaces_unmapped_pivots(batches, tmp_path, monkeypatch):
+    """Tests that the previous pivots are read into memory before the replace."""
+    from momics.loader import matrices
+
+    metadata, ssu, first = batches
+    modes = []
+    load = matrices.load_abundance_matrix
+
+    def recording_load(folder, columns=None, mmap_mode="r"):
+        modes.append(mmap_mode)
+        return load(folder, columns=columns, mmap_mode=mmap_mode)
+
+    monkeypatch.setattr(matrices, "load_abundance_matrix", recording_load)
+    store = SampleStore(tmp_path / "store", rarefy_depth=100)
+    store.ingest({"ssu": ssu[ssu["ref_code"].isin(first)]})
+    store.ingest({"ssu": ssu})
+    assert modes == [None, None]
+
+
+def test_store_rarefy_depth(batches, tmp_path):
+    """Tests the rarefied pivots and the fixed depth of a store."""
+    metadata, ssu, first = batches
+    store = SampleStore(tmp_path / "store", rarefy_depth=100)
+    store.ingest({"ssu": ssu})
+
+    rarefied = store.load_pivot("ssu", rarefied=True)
+    assert rarefied.columns.name == "ref_code"
+    assert (rarefied.sum() == 100).all()
+
+    with pytest.raises(ValueError):
+        SampleStore(tmp_path / "store", rarefy_depth=200)
@@ -876,3 +876,257 @@ def test_fdr_pvals_no_significant():
     # All upper triangle values should be >= 0
     upper = result.values[np.triu_indices_from(result, k=1)]
     assert np.all(upper >= 0)
+
+
+def test_fdr_pvals_untested():
+    # NaN p-values are left out of the correction
+    data = [
+        [0.0, 0.01, np.nan],
+        [0.01, 0.0, 0.02],
+        [np.nan, 0.02, 0.0],
+    ]
+    df = pd.DataFrame(data, columns=["A", "B", "C"], index=["A", "B", "C"])
+    result = fdr_pvals(df, pval_cutoff=0.05)
+    assert np.isnan(result.loc["A", "C"])
+    assert result.loc["A", "B"] == pytest.approx(0.02)
+    assert result.loc["B", "C"] == pytest.approx(0.02)
+
+
+def test_bray_curtis_block_sparse():
+    """Tests the sparse Bray-Curtis kernel against the dense one."""
+    from scipy import sparse
+
+    rng = np.random.default_rng(0)
+    x = rng.poisson(1.0, size=(6, 40)) * (rng.random((6, 40)) < 0.3)
+    y = rng.poisson(1.0, size=(4, 40)) * (rng.random((4, 40)) < 0.3)
+    x[0] = 0
+
+    dense = bray_curtis_block(x, y)
+    np.testing.assert_allclose(
+        bray_curtis_block(sparse.csr_matrix(x), sparse.csr_matrix(y)), dense
+    )
+    assert np.isnan(bray_curtis_block(x[:1], x[:1])).all()
+
+
+@pytest.mark.parametrize("sparse_input", [False, True])
+def test_bray_curtis_matrix(sparse_input, tmp_path):
+    """Tests that growing and shrinking selections match the full computation."""
+    from momics.loader.matrices import load_abundance_matrix, save_abundance_matrix
+
+    rng = np.random.default_rng(1)
+    pivot = pd.DataFrame(
+        rng.poisson(2.0, size=(50, 10)) * (rng.random((50, 10)) < 0.4),
+        columns=pd.Index([f"S{k}" for k in range(10)], name="ref_code"),
+    )
+    full = compute_bray_curtis(pivot)
+    data = pivot
+    if sparse_input:
+        save_abundance_matrix(pivot, tmp_path, matrix_format="sparse")
+        data = load_abundance_matrix(tmp_path)
+
+    distances = BrayCurtisMatrix(data)
+    first = ["S3", "S1", "S7"]
+    pd.testing.assert_frame_equal(distances.select(first), full.loc[first, first])
+
+    grown = ["S0", "S1", "S3", "S5", "S7", "S9"]
+    pd.testing.assert_frame_equal(distances.select(grown), full.loc[grown, grown])
+    assert sorted(distances.computed) == grown
+
+    shrunk = ["S9", "S3"]
+    pd.testing.assert_frame_equal(distances.select(shrunk), full.loc[shrunk, shrunk])
+    assert len(distances.computed) == 6
+
+    with pytest.raises(KeyError):
+        distances.select(["S11"])
+
+
+@pytest.fixture
+def compositions():
+    """Counts of 12 samples and 30 features with zeros, one column per sample."""
+    rng = np.random.default_rng(3)
+    counts = rng.poisson(4, (30, 12)) * (rng.random((30, 12)) < 0.6)
+    idx = pd.MultiIndex.from_arrays(
+        [[f"taxon_{i}" for i in range(30)], range(30)],
+        names=["taxonomic_concat", "ncbi_tax_id"],
+    )
+    return pd.DataFrame(counts, index=idx, columns=[f"s{j}" for j in range(12)])
+
+
+def test_normalize_abundance_compositional(compositions):
+    """Tests the compositional transforms against skbio."""
+    from skbio.stats.composition import alr, clr, multi_replace, rclr
+
+    samples = compositions.T.to_numpy(dtype=float)
+    replaced = multi_replace(samples)
+    expected = {
+        "mult_replace": replaced,
+        "clr": clr(replaced),
+        "alr": alr(replaced, ref_idx=29),
+        "rclr": np.nan_to_num(rclr(samples)),
+        "log1p": np.log1p(samples),
+    }
+    for method, values in expected.items():
+        result = normalize_abundance(compositions, method=method)
+        assert list(result.columns) == list(compositions.columns)
+        np.testing.assert_allclose(result.T.values, values, atol=1e-10, err_msg=method)
+
+    result = normalize_abundance(compositions, method="alr", reference=("taxon_0", 0))
+    assert ("taxon_0", 0) not in result.index
+    np.testing.assert_allclose(result.T.values, alr(replaced, ref_idx=0), atol=1e-10)
+
+
+@pytest.mark.parametrize("method", ["rclr", "log1p"])
+def test_transform_abundance_sparse(compositions, method):
+    """Tests that the zero-preserving transforms keep sparse input sparse."""
+    from scipy import sparse
+    from momics.taxonomy import transform_abundance
+
+    samples = compositions.T.to_numpy(dtype=float)
+    samples[4] = 0
+    result = transform_abundance(sparse.csr_matrix(samples), method)
+    assert sparse.issparse(result)
+    np.testing.assert_allclose(result.toarray(), transform_abundance(samples, method))
+
+    sparse_df = compositions.astype(pd.SparseDtype(float, 0))
+    normalized = normalize_abundance(sparse_df, method=method)
+    assert isinstance(normalized.dtypes.iloc[0], pd.SparseDtype)
+    np.testing.assert_allclose(
+        normalized.sparse.to_dense().values,
+        normalize_abundance(compositions, method=method).values,
+    )
+
+    with pytest.raises(ValueError):
+        transform_abundance(-samples, "clr")
+
+
+@pytest.mark.parametrize("as_matrix", [False, True])
+def test_grouped_taxonomy(as_matrix):
+    """Tests the grouped view against split copies of the groups."""
+    from scipy import sparse
+    from momics.benchmarks import synthetic_taxonomy
+    from momics.diversity import calculate_shannon_index
+    from momics.loader import AbundanceMatrix
+    from momics.stats import spearman_from_taxonomy
+    from momics.taxonomy import GroupedTaxonomy
+
+    ssu = synthetic_taxonomy(n_samples=20, n_taxa=200, taxa_per_sample=30, seed=0)
+    pivot = pivot_taxonomic_data(ssu.set_index(["ref_code", "ncbi_tax_id"]))
+    samples = list(pivot.columns)
+    groups = {"a": samples[:7], "b": samples[7:15], "c": samples[15:]}
+    split = split_taxonomic_data_pivoted(pivot, groups)
+
+    data = pivot
+    if as_matrix:
+        data = AbundanceMatrix(
+            pivot.index, pivot.columns, csr=sparse.csr_matrix(pivot.values.T)
+        )
+    grouped = GroupedTaxonomy(data, groups)
+
+    assert list(grouped) == list(split)
+    for group in split:
+        pd.testing.assert_frame_equal(grouped[group], split[group], check_dtype=False)
+        np.testing.assert_allclose(
+            grouped.sums()[group], pivot[groups[group]].sum(axis=1)
+        )
+        np.testing.assert_allclose(
+            grouped.prevalence()[group], (pivot[groups[group]] > 0).mean(axis=1) * 100
+        )
+        np.testing.assert_allclose(
+            grouped.shannon()[group],
+            calculate_shannon_index(pivot[groups[group]].T),
+        )
+
+    correlations = spearman_from_taxonomy(grouped)
+    expected = spearman_from_taxonomy(split)
+    pd.testing.assert_frame_equal(
+        correlations["b"]["correlation"], expected["b"]["correlation"]
+    )
+
+    with pytest.raises(KeyError):
+        GroupedTaxonomy(pivot, {"a": ["missing"]})
+
+
+def test_grouped_taxonomy_nan():
+    """Tests that rows summing to NaN are removed like the summed filter did."""
+    from momics.taxonomy import GroupedTaxonomy
+
+    pivot = pd.DataFrame(
+        {"s1": [1.0, np.nan, np.nan, 0.0], "s2": [0.0, np.nan, 2.0, 0.0]},
+        index=["t1", "t2", "t3", "t4"],
+    )
+    groups = {"a": ["s1", "s2"]}
+    grouped = GroupedTaxonomy(pivot, groups)
+
+    expected = pivot[pivot.sum(axis=1) != 0]
+    assert grouped.nonzero_rows("a").tolist() == [True, False, True, False]
+    pd.testing.assert_frame_equal(grouped["a"], expected)
+
+
+def test_grouped_taxonomy_not_cached():
+    """Tests that memoised functions are computed for every grouped view."""
+    from momics.cache import enable_cache, disable_cache, clear_cache, cache_stats
+    from momics.stats import spearman_from_taxonomy
+    from momics.taxonomy import GroupedTaxonomy
+
+    rng = np.random.default_rng(0)
+    pivot = pd.DataFrame(
+        rng.integers(1, 10, size=(5, 6)).astype(float),
+        columns=[f"s{i}" for i in range(6)],
+    )
+    groups = {"a": list(pivot.columns)}
+    changed = pivot.copy()
+    changed.iloc[0] = changed.iloc[1] * 2
+
+    enable_cache("memory")
+    clear_cache()
+    try:
+        first = spearman_from_taxonomy(GroupedTaxonomy(pivot, groups))
+        second = spearman_from_taxonomy(GroupedTaxonomy(changed, groups))
+        assert first["a"]["correlation"].iloc[0, 1] != 1
+        assert second["a"]["correlation"].iloc[0, 1] == pytest.approx(1)
+        assert cache_stats().empty
+    finally:
+        clear_cache()
+        disable_cache()
+
+
+def test_split_metadata_groups():
+    """Tests the one-sort split against filtering the metadata per value."""
+    from momics.benchmarks import synthetic_metadata
+
+    metadata = synthetic_metadata(200, seed=0).set_index("ref_code")
+    metadata = metadata.astype({"obs_id": "category", "env_package": "category"})
+    metadata.loc[metadata.index[3], "env_package"] = np.nan
+
+    for factor in ["obs_id", "env_package"]:
+        groups = split_metadata(metadata, factor)
+        values = metadata[factor].unique()
+        assert [str(k) for k in groups] == [str(v) for v in values]
+        for value in values.dropna():
+            assert groups[value] == metadata.index[metadata[factor] == value].tolist()
+    assert [v for k, v in groups.items() if pd.isna(k)] == [[]]
+
+
+def test_split_taxonomic_data_interleaved():
+    """Tests that the groups keep the row order of an unsorted table."""
+    from momics.benchmarks import synthetic_taxonomy
+
+    ssu = synthetic_taxonomy(n_samples=30, n_taxa=100, taxa_per_sample=20, seed=0)
+    ssu = ssu.sample(frac=1, random_state=0).set_index("ref_code")
+    ref_codes = ssu.index.unique().tolist()
+    groups = {"a": ref_codes[::2] + ["missing"], "b": ref_codes[1::2]}
+
+    result = split_taxonomic_data(ssu, groups)
+    for value, codes in groups.items():
+        pd.testing.assert_frame_equal(result[value], ssu[ssu.index.isin(codes)])
+
+    multi = ssu.set_index("ncbi_tax_id", append=True)
+    result = split_taxonomic_data(multi, groups)
+    assert set(result["b"].index.get_level_values(0)) == set(groups["b"])
+
+    # the ref_code level is used wherever it is
+    swapped = multi.swaplevel()
+    result = split_taxonomic_data(swapped, groups)
+    pd.testing.assert_frame_equal(
+        result["b"], swapped[swapped.index.get_level_values("ref_code").isin(groups["b"])]
+    )
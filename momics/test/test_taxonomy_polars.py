@@ -0,0 +1,47 @@
+import pytest
+import pandas as pd
+
+from momics.benchmarks import synthetic_taxonomy
+from momics.constants import TAXONOMY_RANKS
+from momics.utils import taxonomy_common_preprocess01
+
+pytest.importorskip("polars")
+
+
+@pytest.fixture(scope="module")
+def taxonomy():
+    """Synthetic SSU table with empty ranks to fill placeholders of."""
+    df = synthetic_taxonomy(n_samples=20, n_taxa=300, taxa_per_sample=80, seed=5)
+    df.loc[df.sample(frac=0.1, random_state=0).index, "genus"] = ""
+    df.loc[df.sample(frac=0.1, random_state=1).index, "order"] = ""
+    return df.set_index(["ref_code", "ncbi_tax_id"])
+
+
+@pytest.mark.parametrize(
+    "high_taxon, mapping",
+    [("None", False), ("phylum", False), ("phylum", True), ("family", True)],
+)
+@pytest.mark.parametrize("pivot", [True, False])
+def test_polars_backend_parity(taxonomy, high_taxon, mapping, pivot):
+    """Tests that the polars backend returns the pandas results."""
+    expected = taxonomy_common_preprocess01(
+        taxonomy, high_taxon, mapping, 10, TAXONOMY_RANKS, pivot=pivot
+    )
+    result = taxonomy_common_preprocess01(
+        taxonomy, high_taxon, mapping, 10, TAXONOMY_RANKS, pivot=pivot, backend="polars"
+    )
+    assert len(result) > 0
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_polars_backend_single_index(taxonomy):
+    """Tests the pivot of a table indexed by the samples only."""
+    df = taxonomy.reset_index(level=1)
+    expected = taxonomy_common_preprocess01(df, "None", False, 20, TAXONOMY_RANKS, pivot=True)
+    result = taxonomy_common_preprocess01(
+        df, "None", False, 20, TAXONOMY_RANKS, pivot=True, backend="polars"
+    )
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    with pytest.raises(ValueError):
+        taxonomy_common_preprocess01(df, "None", False, 20, TAXONOMY_RANKS, backend="dask")
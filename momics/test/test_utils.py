@@ -48,3 +48,22 @@ Testing utilities for resource monitoring, mainly memory usage and RAM load.
 #     assert (
 #         percent_used == 50.0
 #     ), f"Expected used memory percentage to be 50.0%, but got {percent_used}%"
+
+
+def test_memory_usage_namespace():
+    """
+    Tests the memory_usage function on an explicit namespace.
+    """
+    import pandas as pd
+
+    namespace = {
+        "df": pd.DataFrame({"a": ["x" * 100] * 1000}),
+        "series": pd.Series(["y" * 100] * 500),
+        "small": 1,
+        "_hidden": 2,
+    }
+    mem_list = memory_usage(namespace)
+
+    assert [name for name, _ in mem_list] == ["df", "series", "small"]
+    assert mem_list[0][1] > 100 * 1000, "DataFrames should be measured deeply"
+    assert mem_list[1][1] > 100 * 500, "Series should be measured deeply"
@@ -2,9 +2,9 @@ import os
 import sys
 import psutil
 import logging
+import numpy as np
 import pandas as pd
 from typing import Tuple
-from IPython import get_ipython
 
 import pandas as pd
 from momics.taxonomy import (
@@ -28,6 +28,9 @@ FORMAT = "%(levelname)s | %(name)s | %(message)s"
 logging.basicConfig(level=logging.INFO, format=FORMAT)
 logger = logging.getLogger(__name__)
 
+# backends of taxonomy_common_preprocess01
+TAXONOMY_BACKENDS = ["pandas", "polars"]
+
 
 #####################
 # Environment setup #
@@ -62,6 +65,8 @@ def setup_ipython():
 
     This function installs the momics package and other dependencies for the IPython environment.
     """
+    from IPython import get_ipython
+
     if "google.colab" in str(get_ipython()):
         print("Google Colab")
 
@@ -162,22 +167,44 @@ def memory_load():
     return used_gb, total_gb
 
 
-def memory_usage():
+def memory_usage(namespace: dict = None):
     """
-    Get the memory usage of the current process.
+    Get the memory usage of the objects in the user environment.
+
+    The namespace defaults to the IPython user namespace in notebooks, otherwise to
+    the globals of the caller. DataFrames and Series are measured deeply, other
+    objects with `sys.getsizeof`.
+
+    Args:
+        namespace (dict, optional): The namespace to inspect.
 
     Returns:
         list: A list of tuples containing the names of the objects in the current environment
             and their corresponding sizes in bytes.
     """
-    # These are the usual ipython objects, including this one you are creating
-    ipython_vars = ["In", "Out", "exit", "quit", "get_ipython", "ipython_vars"]
+    from IPython import get_ipython
+
+    if namespace is None:
+        ipython = get_ipython()
+        if ipython is not None:
+            namespace = ipython.user_ns
+        else:
+            namespace = sys._getframe(1).f_globals
+
+    # These are the usual ipython objects
+    ipython_vars = ["In", "Out", "exit", "quit", "get_ipython"]
+
+    def size_of(obj):
+        if isinstance(obj, (pd.DataFrame, pd.Series)):
+            # an int for a Series, a Series of the columns for a DataFrame
+            return int(np.sum(obj.memory_usage(deep=True)))
+        return sys.getsizeof(obj)
 
     # Get a sorted list of the objects and their sizes
     mem_list = sorted(
         [
-            (x, sys.getsizeof(globals().get(x)))
-            for x in dir()
+            (x, size_of(obj))
+            for x, obj in list(namespace.items())
             if not x.startswith("_") and x not in sys.modules and x not in ipython_vars
         ],
         key=lambda x: x[1],
@@ -217,9 +244,83 @@ def load_and_clean(
     return full_metadata, mgf_parquet_dfs
 
 
+def load_and_clean_incremental(
+    store_folder: str,
+    valid_samples: pd.DataFrame = None,
+    rarefy_depth: int = None,
+) -> Tuple[pd.DataFrame, dict]:
+    """
+    Incremental version of `load_and_clean`, which processes only the samples
+    not yet in the local store and appends them, see `momics.store.SampleStore`.
+
+    The metadata is always loaded, the data tables only if there are new samples.
+    The UDAL queries return whole tables, the new samples are selected locally.
+
+    Args:
+        store_folder (str): Folder of the sample store.
+        valid_samples (pd.DataFrame, optional): Samples to keep, see `enhance_metadata`.
+        rarefy_depth (int, optional): Rarefaction depth of the store.
+
+    Returns:
+        Tuple[pd.DataFrame, dict]: The cleaned metadata and the long tables of
+            all the samples in the store.
+    """
+    from momics.store import SampleStore
+
+    full_metadata = get_metadata_udal()
+    full_metadata, added_columns = enhance_metadata(full_metadata, valid_samples)
+
+    store = SampleStore(store_folder, rarefy_depth=rarefy_depth)
+    new = store.new_ref_codes(full_metadata["ref_code"])
+    if new:
+        logger.info(f"{len(new)} new samples, loading the data tables")
+        store.ingest(load_parquets_udal(), full_metadata, ref_codes=new)
+    else:
+        logger.info("No new samples, using the local store")
+    mgf_parquet_dfs = store.load_tables()
+
+    added_columns = {col: col.replace("_", " ") for col in added_columns}
+    COL_NAMES_HASH.update(added_columns)
+    full_metadata = clean_metadata(full_metadata, COL_NAMES_HASH)
+
+    return full_metadata, mgf_parquet_dfs
+
+
 def taxonomy_common_preprocess01(
-    df, high_taxon, mapping, prevalence_cutoff_value, taxonomy_ranks, pivot=False
+    df,
+    high_taxon,
+    mapping,
+    prevalence_cutoff_value,
+    taxonomy_ranks,
+    pivot=False,
+    backend="pandas",
 ):
+    """
+    Fill the taxonomy placeholders, remove the high taxa and apply the prevalence
+    cutoff, optionally on the pivot table.
+
+    Args:
+        df (pd.DataFrame): Taxonomy table indexed by the samples.
+        high_taxon (str): Rank to remove the higher taxa of, or "None".
+        mapping (bool): Whether to map the lower taxa up to `high_taxon`.
+        prevalence_cutoff_value (float): Prevalence threshold in percent.
+        taxonomy_ranks (list): Ordered ranks from higher to lower.
+        pivot (bool): Whether to return the pivot table. Defaults to False.
+        backend (str): 'pandas' or 'polars', which runs the chain as a lazy
+            multithreaded query, see `momics.taxonomy_polars`. Defaults to "pandas".
+
+    Returns:
+        pd.DataFrame: The preprocessed taxonomy.
+    """
+    if backend not in TAXONOMY_BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}, use one of {TAXONOMY_BACKENDS}")
+    if backend == "polars":
+        from momics.taxonomy_polars import taxonomy_common_preprocess_polars
+
+        return taxonomy_common_preprocess_polars(
+            df, high_taxon, mapping, prevalence_cutoff_value, taxonomy_ranks, pivot
+        )
+
     df1 = fill_taxonomy_placeholders(df, taxonomy_ranks)
 
     logger.info("Preprocessing taxonomy...")